@@ -1,17 +1,38 @@
-import oracledb
+import argparse
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 from datetime import datetime
-from wordcloud import WordCloud # Will need to install this: pip install wordcloud
 
-# --- Database Connection Details ---
-DB_USER = "bank_reviews_user"
-DB_PASSWORD = "bankreviewsuser" # REPLACE WITH YOUR ACTUAL PASSWORD
-DB_HOST = "localhost"
-DB_PORT = 1521
-DB_SERVICE_NAME = "XEPDB1" # CONFIRM THIS MATCHES YOUR PDB (or XE)
+from charts import (CHART_WORKERS, plot_rating_distribution, plot_rating_vs_score, plot_sentiment_by_bank,
+                    plot_sentiment_distribution, plot_sentiment_trend, plot_top_themes, plot_wordcloud,
+                    render_charts, top_frequencies, word_frequencies)
+from db_backend import close_backend, get_backend
+from instrumentation import stage
+from rollups import load_daily_rollup, rolling_sentiment, week_over_week_pain_points
+from theme_matcher import NO_THEME_LABEL, split_theme_label
+# Connection details and the Oracle/SQLite choice live in db_backend.py
+
+# --- Insights Settings ---
+# 'sql' runs every aggregate as a GROUP BY in the database and only transfers the small results;
+# 'pandas' loads every review into a DataFrame first (the original behaviour).
+INSIGHTS_MODE = 'sql'
+# Labels as written by analyze_reviews.py
+POSITIVE_LABEL = 'positive'
+NEGATIVE_LABEL = 'negative'
+TEXT_FETCH_BATCH_SIZE = 5000 # Rows per round trip when streaming review text for the word cloud
+# Trends are read from the daily rollup table the loader maintains (see rollups.py)
+TREND_WINDOWS = (7, 30) # Trailing windows, in days, for the rolling sentiment
+TREND_PAIN_POINT_WEEKS = 4 # Recent weeks shown in the week-over-week pain point table
+# One (review_id, theme) row per theme of a review, from the Review_Themes bridge table the loader
+# maintains; reviews without any theme count as NO_THEME_LABEL. A review with two themes counts
+# towards both, instead of under a combined "A, B" label of its own.
+REVIEW_THEME_ROWS_SQL = f"""(
+            SELECT rt.review_id, t.theme_name AS theme
+            FROM Review_Themes rt JOIN Themes t ON t.theme_id = rt.theme_id
+            UNION ALL
+            SELECT review_id, '{NO_THEME_LABEL}' FROM Reviews WHERE theme_mask = 0
+        )"""
 
 # --- Output Directory for Visualizations ---
 output_dir = 'visualizations'
@@ -22,211 +43,363 @@ else:
     print(f"Directory already exists: {output_dir}")
 
 def load_data_from_oracle():
-    connection = None
+    backend = get_backend()
     try:
-        print("Attempting to connect to Oracle database...")
-        connection = oracledb.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            service_name=DB_SERVICE_NAME
-        )
-        print("Successfully connected to Oracle database.")
-
-        # Load Banks data
-        banks_query = "SELECT bank_id, bank_name FROM Banks"
-        banks_df = pd.read_sql(banks_query, connection)
-        print(f"Loaded {len(banks_df)} banks.")
-        # print("Columns in banks_df:", banks_df.columns.tolist()) # Debugging line, can keep or remove
-
-        # Load Reviews data - IMPORTANT: Using TO_CHAR for CLOBs and correct column names
-        reviews_query = """
-        SELECT
-            review_id, bank_id, TO_CHAR(review_text) AS review_text, rating, review_date, source,
-            sentiment_label, sentiment_score, identified_themes
-        FROM Reviews
-        """
-        reviews_df = pd.read_sql(reviews_query, connection)
-        print(f"Loaded {len(reviews_df)} reviews.")
-        # print("Columns in reviews_df:", reviews_df.columns.tolist()) # Debugging line, can keep or remove
+        print(f"Attempting to connect to the {backend.name} database...")
+        with backend.connection() as connection:
+            print(f"Successfully connected to the {backend.name} database.")
+
+            # Load Banks data
+            banks_query = "SELECT bank_id, bank_name FROM Banks"
+            banks_df = query_df(connection, banks_query, ['BANK_ID', 'BANK_NAME'])
+            print(f"Loaded {len(banks_df)} banks.")
+
+            # Load Reviews data (CLOBs are fetched as strings by the backend, so no TO_CHAR needed)
+            reviews_query = """
+            SELECT
+                review_id, bank_id, review_text, rating, review_date, source,
+                sentiment_label, sentiment_score, identified_themes
+            FROM Reviews
+            """
+            reviews_df = query_df(connection, reviews_query, [
+                'REVIEW_ID', 'BANK_ID', 'REVIEW_TEXT', 'RATING', 'REVIEW_DATE', 'SOURCE',
+                'SENTIMENT_LABEL', 'SENTIMENT_SCORE', 'IDENTIFIED_THEMES'
+            ])
+            print(f"Loaded {len(reviews_df)} reviews.")
 
         # Merge dataframes to include bank_name in reviews_df
-        # Using 'BANK_ID' as confirmed by previous debugging
         reviews_df = pd.merge(reviews_df, banks_df, on='BANK_ID', how='left')
         print("Merged reviews with bank names.")
 
         return reviews_df
 
-    except oracledb.Error as e:
-        error_obj, = e.args
-        print(f"Oracle Error Code: {error_obj.code}")
-        print(f"Oracle Error Message: {error_obj.message}")
+    except backend.errors as e:
+        for line in backend.describe_error(e):
+            print(line)
         return None
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return None
+
+
+# --- Aggregates ---
+# Both modes produce the same dict of small Series/DataFrames, which the insights and charts use.
+
+def query_df(connection, sql, columns, params=None):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params or {})
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
     finally:
-        if connection:
-            connection.close()
-            print("Database connection closed.")
+        cursor.close()
+
+# Same numbers as Series.describe(), computed from a value -> count histogram. Ratings only take
+# a handful of values, so this replaces STDDEV/PERCENTILE_CONT (which SQLite lacks) with one GROUP BY.
+def describe_histogram(counts):
+    counts = counts[counts > 0].sort_index()
+    values = counts.index.to_numpy(dtype=float)
+    weights = counts.to_numpy(dtype=float)
+    n = weights.sum()
+    stats = {'count': n, 'mean': np.nan, 'std': np.nan, 'min': np.nan, '25%': np.nan, '50%': np.nan, '75%': np.nan, 'max': np.nan}
+    if n == 0:
+        return pd.Series(stats)
+    mean = (values * weights).sum() / n
+    stats['mean'] = mean
+    stats['std'] = np.sqrt((weights * (values - mean) ** 2).sum() / (n - 1)) if n > 1 else np.nan
+    stats['min'], stats['max'] = values[0], values[-1]
+    ends = np.cumsum(weights) # Sorted position just past each value's last occurrence
+    for q in (0.25, 0.5, 0.75):
+        position = q * (n - 1) # Linear interpolation, as PERCENTILE_CONT and pandas do
+        lower = values[np.searchsorted(ends, np.floor(position), side='right')]
+        upper = values[np.searchsorted(ends, np.ceil(position), side='right')]
+        stats[f'{int(q * 100)}%'] = lower + (upper - lower) * (position - np.floor(position))
+    return pd.Series(stats)
+
+def compute_aggregates_in_sql(connection):
+    aggregates = {}
+    labels = {'positive': POSITIVE_LABEL, 'negative': NEGATIVE_LABEL}
+
+    rating_counts = query_df(connection, """
+        SELECT rating, COUNT(*)
+        FROM Reviews
+        WHERE rating IS NOT NULL
+        GROUP BY rating""", ['rating', 'count']).set_index('rating')['count']
+    aggregates['rating_stats'] = describe_histogram(rating_counts)
+
+    unthemed = query_df(connection, """
+        SELECT COUNT(*) FROM Reviews
+        WHERE theme_mask IS NULL AND identified_themes IS NOT NULL""", ['count'])['count'].iloc[0]
+    if unthemed:
+        print(f"Note: {unthemed} reviews have no theme_mask and are left out of the theme aggregates; "
+              f"run 'python insert_data_to_oracle.py --backfill-themes' to include them.")
+
+    theme_counts_by_label = query_df(connection, f"""
+        SELECT r.sentiment_label, rt.theme, COUNT(*)
+        FROM Reviews r JOIN {REVIEW_THEME_ROWS_SQL} rt ON rt.review_id = r.review_id
+        WHERE r.sentiment_label IN (:positive, :negative)
+        GROUP BY r.sentiment_label, rt.theme""", ['label', 'theme', 'count'], labels)
+    for key, label in labels.items():
+        subset = theme_counts_by_label[theme_counts_by_label['label'] == label]
+        aggregates[f'{key}_themes'] = subset.set_index('theme')['count'].sort_values(ascending=False)
+
+    by_theme = query_df(connection, f"""
+        SELECT rt.theme, COUNT(*), AVG(r.rating)
+        FROM Reviews r JOIN {REVIEW_THEME_ROWS_SQL} rt ON rt.review_id = r.review_id
+        GROUP BY rt.theme""", ['theme', 'count', 'avg_rating'])
+    aggregates['avg_rating_by_theme'] = by_theme.set_index('theme')['avg_rating'].astype(float).sort_values(ascending=False)
+    aggregates['theme_counts'] = by_theme.set_index('theme')['count'].sort_values(ascending=False)
+
+    by_bank = query_df(connection, """
+        SELECT b.bank_name, r.sentiment_label, COUNT(*), SUM(r.rating)
+        FROM Reviews r JOIN Banks b ON b.bank_id = r.bank_id
+        GROUP BY b.bank_name, r.sentiment_label""", ['bank', 'label', 'count', 'rating_sum'])
+    bank_totals = by_bank.groupby('bank')[['count', 'rating_sum']].sum()
+    aggregates['avg_rating_by_bank'] = (bank_totals['rating_sum'] / bank_totals['count']).sort_values(ascending=False)
+    aggregates['sentiment_counts_by_bank'] = by_bank.pivot(index='bank', columns='label', values='count').fillna(0)
+
+    pain_points = query_df(connection, f"""
+        SELECT bank_name, theme, n FROM (
+            SELECT b.bank_name, rt.theme, COUNT(*) AS n,
+                   ROW_NUMBER() OVER (PARTITION BY b.bank_name ORDER BY COUNT(*) DESC) AS rn
+            FROM Reviews r JOIN Banks b ON b.bank_id = r.bank_id
+                 JOIN {REVIEW_THEME_ROWS_SQL} rt ON rt.review_id = r.review_id
+            WHERE r.sentiment_label = :negative
+            GROUP BY b.bank_name, rt.theme
+        ) WHERE rn <= 3""", ['bank', 'theme', 'count'], {'negative': NEGATIVE_LABEL})
+    aggregates['top_pain_points_by_bank'] = {
+        bank: group.set_index('theme')['count'].sort_values(ascending=False)
+        for bank, group in pain_points.groupby('bank')
+    }
+
+    aggregates['rating_counts'] = query_df(connection, """
+        SELECT rating, COUNT(*) FROM Reviews GROUP BY rating""", ['rating', 'count']
+    ).set_index('rating')['count'].sort_index()
+    aggregates['sentiment_counts'] = by_bank.groupby('label')['count'].sum().sort_values(ascending=False)
+
+    # Scores rounded to 0.01 give at most 5 x 3 x 101 points for the scatter plot, whatever the row count
+    aggregates['rating_score_points'] = query_df(connection, """
+        SELECT rating, sentiment_label, ROUND(sentiment_score, 2), COUNT(*)
+        FROM Reviews
+        GROUP BY rating, sentiment_label, ROUND(sentiment_score, 2)""",
+        ['rating', 'sentiment_label', 'sentiment_score', 'count'])
+    aggregates['rating_score_points']['sentiment_score'] = aggregates['rating_score_points']['sentiment_score'].astype(float)
+    return aggregates
+
+# One row per review and theme (THEME column), matching REVIEW_THEME_ROWS_SQL; reviews with a missing
+# label get no row
+def explode_themes(df):
+    themes = df['IDENTIFIED_THEMES'].map(
+        lambda label: split_theme_label(label) or ([NO_THEME_LABEL] if label == NO_THEME_LABEL else [])
+    )
+    return df.assign(THEME=themes).explode('THEME').dropna(subset=['THEME'])
+
+def compute_aggregates_in_pandas(all_reviews_df):
+    aggregates = {}
+    df = all_reviews_df
+    by_theme = explode_themes(df)
+    aggregates['rating_stats'] = df['RATING'].describe()
+    aggregates['positive_themes'] = by_theme[by_theme['SENTIMENT_LABEL'] == POSITIVE_LABEL]['THEME'].value_counts()
+    aggregates['negative_themes'] = by_theme[by_theme['SENTIMENT_LABEL'] == NEGATIVE_LABEL]['THEME'].value_counts()
+    aggregates['avg_rating_by_theme'] = by_theme.groupby('THEME')['RATING'].mean().sort_values(ascending=False)
+    aggregates['theme_counts'] = by_theme['THEME'].value_counts()
+    aggregates['avg_rating_by_bank'] = df.groupby('BANK_NAME')['RATING'].mean().sort_values(ascending=False)
+    aggregates['sentiment_counts_by_bank'] = df.groupby('BANK_NAME')['SENTIMENT_LABEL'].value_counts().unstack().fillna(0)
+    negatives = by_theme[by_theme['SENTIMENT_LABEL'] == NEGATIVE_LABEL]
+    aggregates['top_pain_points_by_bank'] = {
+        bank: group['THEME'].value_counts().head(3)
+        for bank, group in negatives.groupby('BANK_NAME')
+    }
+    aggregates['rating_counts'] = df['RATING'].value_counts().sort_index()
+    aggregates['sentiment_counts'] = df['SENTIMENT_LABEL'].value_counts()
+    points = df.assign(SENTIMENT_SCORE=df['SENTIMENT_SCORE'].round(2))
+    aggregates['rating_score_points'] = (
+        points.groupby(['RATING', 'SENTIMENT_LABEL', 'SENTIMENT_SCORE']).size().reset_index()
+    )
+    aggregates['rating_score_points'].columns = ['rating', 'sentiment_label', 'sentiment_score', 'count']
+    return aggregates
+
+# Stream review text in batches (only the word cloud needs it)
+def iter_review_text(connection, batch_size=TEXT_FETCH_BATCH_SIZE):
+    cursor = connection.cursor()
+    cursor.arraysize = batch_size
+    if hasattr(cursor, 'prefetchrows'): # Oracle only
+        cursor.prefetchrows = batch_size
+    try:
+        cursor.execute("SELECT review_text FROM Reviews")
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for (text,) in rows:
+                if text is not None:
+                    yield text
+    finally:
+        cursor.close()
 
-if __name__ == "__main__":
-    all_reviews_df = load_data_from_oracle()
+
+# --- Insights ---
+def print_insights(aggregates):
+    print("\nBasic Statistics for Ratings:")
+    print(aggregates['rating_stats'])
+
+    # --- INSIGHTS & RECOMMENDATIONS ---
+    print("\n--- DERIVING INSIGHTS ---")
+
+    # 1. Identify Drivers (Strengths) and Pain Points (Weaknesses)
+    print("\n--- Drivers (Positive Themes) ---")
+    print("Top 5 Drivers:")
+    print(aggregates['positive_themes'].head(5))
+
+    print("\n--- Pain Points (Negative Themes) ---")
+    print("Top 5 Pain Points:")
+    print(aggregates['negative_themes'].head(5))
+
+    print("\n--- Average Rating by Identified Theme ---")
+    avg_rating_by_theme = aggregates['avg_rating_by_theme']
+    print("Themes with highest average ratings:")
+    print(avg_rating_by_theme.head(10))
+    print("\nThemes with lowest average ratings:")
+    print(avg_rating_by_theme.tail(10))
+
+
+    # 2. Compare Banks
+    print("\n--- BANK COMPARISONS ---")
+    print("\nAverage Rating by Bank:")
+    print(aggregates['avg_rating_by_bank'])
+
+    print("\nSentiment Distribution by Bank:")
+    sentiment_counts_by_bank = aggregates['sentiment_counts_by_bank']
+    sentiment_by_bank = sentiment_counts_by_bank.div(sentiment_counts_by_bank.sum(axis=1), axis=0).fillna(0)
+    print(sentiment_by_bank)
+
+    print("\nTop 3 Pain Points per Bank:")
+    for bank_name in aggregates['avg_rating_by_bank'].index:
+        print(f"\n--- {bank_name} ---")
+        bank_negative_themes = aggregates['top_pain_points_by_bank'].get(bank_name, pd.Series(dtype='int64'))
+        if not bank_negative_themes.empty:
+            print(bank_negative_themes)
+        else:
+            print("No significant negative themes identified for this bank.")
+
+    # --- Recommendations based on Insights (Manually formulated based on output) ---
+    print("\n--- RECOMMENDATIONS ---")
+    print("Based on the above insights, here are some recommendations:")
+    print("1. Prioritize 'Crashes/Bugs' and 'Transaction Performance' fixes: If these are top pain points, immediate attention is needed for app stability and speed.")
+    print("2. Enhance 'Customer Support' for specific banks: If one bank consistently has lower sentiment/ratings for support, target training or improved in-app help for them.")
+    print("3. Leverage 'Ease of Use' as a key feature: If 'Ease of Use' is a strong driver for positive sentiment, promote this feature in marketing and ensure new features maintain simplicity.")
+    print("4. Investigate 'Other' category reviews: The 'Other' category in themes can be a catch-all. Reviewing these texts manually might reveal new, uncategorized insights for further app improvement.")
+
+
+def compute_trends(connection, backend):
+    daily = load_daily_rollup(connection, backend)
+    return {
+        'rolling_sentiment': rolling_sentiment(daily, TREND_WINDOWS, POSITIVE_LABEL),
+        'pain_point_deltas': week_over_week_pain_points(daily, NEGATIVE_LABEL),
+    }
+
+def print_trends(trends):
+    rolling = trends['rolling_sentiment']
+    if rolling.empty:
+        print("\nNo rollup data for trends yet (run insert_data_to_oracle.py).")
+        return
+    print("\n--- SENTIMENT TRENDS (latest day per bank) ---")
+    print(rolling.groupby(level='bank').tail(1).to_string())
+
+    deltas = trends['pain_point_deltas']
+    if deltas.empty:
+        return
+    recent_weeks = sorted(deltas['week'].unique())[-TREND_PAIN_POINT_WEEKS:]
+    latest = deltas[deltas['week'] == recent_weeks[-1]].sort_values('delta', ascending=False)
+    print(f"\n--- Week-over-Week Pain Points (week of {pd.Timestamp(recent_weeks[-1]).date()}) ---")
+    print(latest[['bank', 'theme', 'negative_reviews', 'previous_week', 'delta']].to_string(index=False))
+
+# --- Visualizations ---
+# Every chart is drawn from the pre-aggregated results (see charts.py); only the word cloud reads
+# review text, and that is reduced to word counts as it streams past.
+def chart_inputs(aggregates, trends=None, frequencies=None):
+    charts = [
+        ('overall_rating_distribution.png', plot_rating_distribution, aggregates['rating_counts']),
+        ('overall_sentiment_distribution.png', plot_sentiment_distribution, aggregates['sentiment_counts']),
+        ('sentiment_by_bank.png', plot_sentiment_by_bank, aggregates['sentiment_counts_by_bank']),
+        ('top_themes.png', plot_top_themes, aggregates['theme_counts']),
+        ('rating_vs_sentiment_score.png', plot_rating_vs_score, aggregates['rating_score_points']),
+    ]
+    # Rolling positive share per bank, one line each
+    if trends is not None and not trends['rolling_sentiment'].empty:
+        window = max(TREND_WINDOWS)
+        column = f'positive_share_{window}d'
+        data = trends['rolling_sentiment'][[column]].reset_index()
+        charts.append(('sentiment_trend.png', plot_sentiment_trend, {'data': data, 'column': column, 'window': window}))
+    if frequencies:
+        charts.append(('review_wordcloud.png', plot_wordcloud, frequencies))
+    return charts
+
+def render_visualizations(aggregates, review_texts, trends=None, force=False):
+    print("\n--- GENERATING VISUALIZATIONS ---")
+    frequencies = None
+    try:
+        frequencies = top_frequencies(word_frequencies(review_texts))
+    except ImportError:
+        print("Skipping Word Cloud: 'wordcloud' library not installed. Run 'pip install wordcloud' to enable.")
+
+    result = render_charts(chart_inputs(aggregates, trends, frequencies), output_dir, force=force)
+    for file_name, error in result['failed'].items():
+        print(f"Error generating {file_name}: {error}")
+    print(f"Drew {len(result['drawn'])} charts, skipped {len(result['skipped'])} unchanged "
+          f"({CHART_WORKERS} worker processes).")
+    print("\nAll visualizations generated and saved in the 'visualizations/' folder.")
+    return result
+
+def run_sql_insights(force_charts=False):
+    backend = get_backend()
+    try:
+        print(f"Attempting to connect to the {backend.name} database...")
+        with backend.connection() as connection:
+            print(f"Successfully connected to the {backend.name} database.")
+            with stage('aggregates_sql') as record:
+                aggregates = compute_aggregates_in_sql(connection)
+                record.rows_in = int(aggregates['rating_stats']['count'])
+            print(f"Computed aggregates in the database over {int(aggregates['rating_stats']['count'])} reviews.")
+            print_insights(aggregates)
+            with stage('trends'):
+                trends = compute_trends(connection, backend)
+            print_trends(trends)
+            # Includes streaming the review text for the word cloud
+            with stage('render_charts', rows_in=int(aggregates['rating_stats']['count'])) as record:
+                charts = render_visualizations(aggregates, iter_review_text(connection), trends, force_charts)
+                record.extra.update(charts_drawn=len(charts['drawn']), charts_skipped=len(charts['skipped']))
+        print("Database connection released.")
+    except backend.errors as e:
+        for line in backend.describe_error(e):
+            print(line)
+
+def run_pandas_insights(force_charts=False):
+    with stage('load_reviews') as record:
+        all_reviews_df = load_data_from_oracle()
+        record.rows_out = None if all_reviews_df is None else len(all_reviews_df)
 
     if all_reviews_df is not None:
         print("\nFirst 5 rows of loaded data:")
         print(all_reviews_df.head())
         print("\nData Types:")
         print(all_reviews_df.info())
-        print("\nBasic Statistics for Ratings:")
-        # Corrected column name to 'RATING'
-        print(all_reviews_df['RATING'].describe())
-
-        # --- INSIGHTS & RECOMMENDATIONS ---
-        print("\n--- DERIVING INSIGHTS ---")
-
-        # 1. Identify Drivers (Strengths) and Pain Points (Weaknesses)
-        print("\n--- Drivers (Positive Themes) ---")
-        # Ensure sentiment label is 'Positive' (case-sensitive)
-        positive_themes = all_reviews_df[all_reviews_df['SENTIMENT_LABEL'] == 'Positive']['IDENTIFIED_THEMES'].value_counts()
-        print("Top 5 Drivers:")
-        print(positive_themes.head(5))
-
-        print("\n--- Pain Points (Negative Themes) ---")
-        # Ensure sentiment label is 'Negative' (case-sensitive)
-        negative_themes = all_reviews_df[all_reviews_df['SENTIMENT_LABEL'] == 'Negative']['IDENTIFIED_THEMES'].value_counts()
-        print("Top 5 Pain Points:")
-        print(negative_themes.head(5))
-
-        print("\n--- Average Rating by Identified Theme ---")
-        # Corrected column name to 'RATING'
-        avg_rating_by_theme = all_reviews_df.groupby('IDENTIFIED_THEMES')['RATING'].mean().sort_values(ascending=False)
-        print("Themes with highest average ratings:")
-        print(avg_rating_by_theme.head(10))
-        print("\nThemes with lowest average ratings:")
-        print(avg_rating_by_theme.tail(10))
-
-
-        # 2. Compare Banks
-        print("\n--- BANK COMPARISONS ---")
-        # Corrected column name to 'RATING'
-        print("\nAverage Rating by Bank:")
-        avg_rating_by_bank = all_reviews_df.groupby('BANK_NAME')['RATING'].mean().sort_values(ascending=False)
-        print(avg_rating_by_bank)
-
-        print("\nSentiment Distribution by Bank:")
-        # Ensure 'SENTIMENT_LABEL' and 'BANK_NAME' are correctly cased
-        sentiment_by_bank = all_reviews_df.groupby('BANK_NAME')['SENTIMENT_LABEL'].value_counts(normalize=True).unstack().fillna(0)
-        print(sentiment_by_bank)
-
-        print("\nTop 3 Pain Points per Bank:")
-        for bank_name in all_reviews_df['BANK_NAME'].unique():
-            print(f"\n--- {bank_name} ---")
-            bank_negative_themes = all_reviews_df[
-                (all_reviews_df['BANK_NAME'] == bank_name) &
-                (all_reviews_df['SENTIMENT_LABEL'] == 'Negative')
-            ]['IDENTIFIED_THEMES'].value_counts().head(3)
-            if not bank_negative_themes.empty:
-                print(bank_negative_themes)
-            else:
-                print("No significant negative themes identified for this bank.")
-
-        # --- Recommendations based on Insights (Manually formulated based on output) ---
-        print("\n--- RECOMMENDATIONS ---")
-        print("Based on the above insights, here are some recommendations:")
-        print("1. Prioritize 'Crashes/Bugs' and 'Transaction Performance' fixes: If these are top pain points, immediate attention is needed for app stability and speed.")
-        print("2. Enhance 'Customer Support' for specific banks: If one bank consistently has lower sentiment/ratings for support, target training or improved in-app help for them.")
-        print("3. Leverage 'Ease of Use' as a key feature: If 'Ease of Use' is a strong driver for positive sentiment, promote this feature in marketing and ensure new features maintain simplicity.")
-        print("4. Investigate 'Other' category reviews: The 'Other' category in themes can be a catch-all. Reviewing these texts manually might reveal new, uncategorized insights for further app improvement.")
-
-
-        # --- VISUALIZATIONS ---
-        print("\n--- GENERATING VISUALIZATIONS ---")
-
-        # 1. Overall Rating Distribution
-        plt.figure(figsize=(8, 5))
-        sns.countplot(data=all_reviews_df, x='RATING', palette='viridis')
-        plt.title('Overall Rating Distribution')
-        plt.xlabel('Rating (1-5)')
-        plt.ylabel('Number of Reviews')
-        plt.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'overall_rating_distribution.png'))
-        # plt.show() # Uncomment if you want plots to pop up immediately
-
-        # 2. Overall Sentiment Distribution
-        plt.figure(figsize=(8, 5))
-        sns.countplot(data=all_reviews_df, x='SENTIMENT_LABEL', order=all_reviews_df['SENTIMENT_LABEL'].value_counts().index, palette='coolwarm')
-        plt.title('Overall Sentiment Distribution')
-        plt.xlabel('Sentiment Label')
-        plt.ylabel('Number of Reviews')
-        plt.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'overall_sentiment_distribution.png'))
-        # plt.show()
-
-        # 3. Sentiment Distribution by Bank
-        plt.figure(figsize=(12, 6))
-        sns.countplot(data=all_reviews_df, x='BANK_NAME', hue='SENTIMENT_LABEL', palette='muted')
-        plt.title('Sentiment Distribution by Bank')
-        plt.xlabel('Bank Name')
-        plt.ylabel('Number of Reviews')
-        plt.xticks(rotation=45, ha='right')
-        plt.legend(title='Sentiment')
-        plt.grid(axis='y', linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'sentiment_by_bank.png'))
-        # plt.show()
-
-        # 4. Top 10 Identified Themes
-        # Adjust 'Other' handling if it's too dominant and uninformative for your data
-        plt.figure(figsize=(10, 6))
-        # Filter out 'Other' if it's not insightful, or adjust the head() number
-        themes_for_plot = all_reviews_df['IDENTIFIED_THEMES'].value_counts()
-        if 'Other' in themes_for_plot.index:
-            themes_for_plot = themes_for_plot.drop('Other')
-        top_themes = themes_for_plot.head(10) # Get top 10 after potential 'Other' removal
-        sns.barplot(x=top_themes.index, y=top_themes.values, palette='plasma')
-        plt.title('Top Identified Themes in Reviews (Excluding "Other" if present)')
-        plt.xlabel('Theme')
-        plt.ylabel('Number of Occurrences')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'top_themes.png'))
-        # plt.show()
-
-        # 5. Rating vs Sentiment Score Scatter Plot
-        plt.figure(figsize=(10, 6))
-        # Ensure correct column names: 'RATING', 'SENTIMENT_SCORE', 'SENTIMENT_LABEL'
-        sns.scatterplot(data=all_reviews_df, x='RATING', y='SENTIMENT_SCORE', hue='SENTIMENT_LABEL', palette='viridis', alpha=0.7)
-        plt.title('Rating vs Sentiment Score')
-        plt.xlabel('Rating')
-        plt.ylabel('Sentiment Score')
-        plt.grid(linestyle='--', alpha=0.7)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, 'rating_vs_sentiment_score.png'))
-        # plt.show()
-
-        # Optional: Word Cloud (Requires pip install wordcloud)
-        try:
-            print("\nGenerating Word Cloud (requires 'wordcloud' library)...")
-            all_text = ' '.join(all_reviews_df['REVIEW_TEXT'].dropna().astype(str)) # Ensure text is string
-            wordcloud = WordCloud(width=800, height=400, background_color='white').generate(all_text)
-            plt.figure(figsize=(10, 5))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.title('Word Cloud of Review Text')
-            plt.tight_layout()
-            plt.savefig(os.path.join(output_dir, 'review_wordcloud.png'))
-            # plt.show()
-            print("Word Cloud generated successfully.")
-        except ImportError:
-            print("Skipping Word Cloud: 'wordcloud' library not installed. Run 'pip install wordcloud' to enable.")
-        except Exception as e:
-            print(f"Error generating Word Cloud: {e}")
-
-        print("\nAll visualizations generated and saved in the 'visualizations/' folder.")
-
+        with stage('aggregates_pandas', rows_in=len(all_reviews_df)):
+            aggregates = compute_aggregates_in_pandas(all_reviews_df)
+        print_insights(aggregates)
+        with stage('render_charts', rows_in=len(all_reviews_df)) as record:
+            charts = render_visualizations(aggregates, all_reviews_df['REVIEW_TEXT'].dropna(), force=force_charts)
+            record.extra.update(charts_drawn=len(charts['drawn']), charts_skipped=len(charts['skipped']))
     else:
-        print("Failed to load data from Oracle. Cannot proceed with insights and visualizations.")
\ No newline at end of file
+        print("Failed to load data from Oracle. Cannot proceed with insights and visualizations.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the review insights and draw the charts.")
+    parser.add_argument('--force-charts', action='store_true', help="Redraw every chart, even if its input is unchanged")
+    args = parser.parse_args()
+    try:
+        if INSIGHTS_MODE == 'sql':
+            run_sql_insights(args.force_charts)
+        else:
+            run_pandas_insights(args.force_charts)
+    finally:
+        close_backend()
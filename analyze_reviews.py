@@ -1,73 +1,223 @@
 import pandas as pd
-from transformers import pipeline
-import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from collections import defaultdict
+import argparse
+import os
 import re
+import threading
+import time
+from instrumentation import stage
+from review_cache import ReviewCache, cached_map
+from theme_matcher import ThemeMatcher
+
+# --- Sentiment Scoring Settings ---
+# 'batched' sorts reviews by token length and scores them in batches (much faster on CPU);
+# 'per_review' keeps the original one-call-per-review behaviour.
+SENTIMENT_MODE = 'batched'
+SENTIMENT_BATCH_SIZE = 32 # Tune per host using the reviews/sec printed after scoring
+SENTIMENT_MAX_LENGTH = 512 # distilbert's maximum sequence length; longer reviews are truncated
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+SENTIMENT_MODEL_REVISION = "main" # Pin to a commit hash so cached scores stay tied to one model version
+# 'torch' (fp32), 'torch_int8', 'onnx' or 'onnx_int8'; run sentiment_backends.py to check parity and speed
+SENTIMENT_BACKEND = os.environ.get('BANK_REVIEWS_SENTIMENT_BACKEND', 'torch')
+SENTIMENT_NUM_THREADS = int(os.environ.get('BANK_REVIEWS_SENTIMENT_THREADS', 0)) # Intra-op threads; 0 = library default
+# Answer trivial reviews (short lexicon matches confirmed by the rating, emoji-only, non-English) without
+# the model and score each distinct remaining text once; see triage.py for the rules and threshold
+SENTIMENT_TRIAGE = os.environ.get('BANK_REVIEWS_SENTIMENT_TRIAGE', '1') != '0'
+
+# --- Result Cache Settings ---
+# Sentiment results and spaCy tokens are cached on disk, keyed by (review text, model, revision),
+# so reruns only run inference on new or changed reviews. Set USE_CACHE = False to always recompute.
+USE_CACHE = True
+CACHE_PATH = '.cache/review_cache.sqlite'
+CACHE_MAX_ENTRIES = 2_000_000
+THEME_PREPROCESS_VERSION = "1" # Bump when preprocess_text_for_theme changes to invalidate cached tokens
+
+# --- spaCy Preprocessing Settings ---
+# Only the tagger, attribute_ruler and lemmatizer (plus tok2vec) are needed for POS + lemmas,
+# so the dependency parser and NER are never loaded.
+SPACY_MODEL = "en_core_web_sm"
+SPACY_EXCLUDE = ["parser", "ner"]
+# -1 = one worker per CPU core; 1 = run in this process. Only the one-shot run of this script fans out:
+# the pipeline and scoring service call spaCy per chunk/request from threads, where starting (and
+# forking) a fresh set of workers each time costs more than it saves, so they pass n_process=1.
+SPACY_N_PROCESS = -1
+SPACY_BATCH_SIZE = 256 # Texts sent to each worker at a time
+
+# --- Keyword Extraction Settings ---
+# Top TF-IDF keywords are printed for each grouping; 'month' is derived from the review date.
+# e.g. [['bank'], ['bank', 'month'], ['bank', 'rating']]
+KEYWORD_GROUPINGS = [['bank']]
+
+# --- Topic Discovery Settings ---
+# Adds a topic_id column from the incremental topic model in topic_discovery.py. The model is trained
+# on the first run and saved; later runs only assign topics (use --retrain-topics to train afresh).
+TOPIC_DISCOVERY = True
+
+# Models (and transformers/spaCy/sklearn themselves) are imported on first use, so importing this module,
+# spawning spaCy workers or running commands that never touch a model stays cheap. The same goes for
+# the helper modules that pull in pyarrow (review_store) or scipy (keyword_extraction, topic_discovery):
+# they are imported inside the functions that use them.
+sentiment_pipeline = None
+nlp = None
+_model_lock = threading.Lock() # Pipeline worker threads may ask for a model at the same time
 
-# Load the cleaned data from Task 1
-try:
-    df = pd.read_csv('bank_app_reviews.csv')
-    print("Loaded bank_app_reviews.csv successfully.")
-except FileNotFoundError:
-    print("Error: bank_app_reviews.csv not found. Please run Task 1 first.")
-    exit()
 
 # --- 1. Sentiment Analysis ---
-print("\nStarting Sentiment Analysis...")
 
-# Load pre-trained sentiment analysis model from Hugging Face
+# Load pre-trained sentiment analysis model from Hugging Face (on the configured CPU backend)
 # This model classifies text as 'POSITIVE' or 'NEGATIVE'
-sentiment_pipeline = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+def get_sentiment_pipeline():
+    global sentiment_pipeline
+    with _model_lock:
+        if sentiment_pipeline is None:
+            from sentiment_backends import load_sentiment_pipeline
+            sentiment_pipeline = load_sentiment_pipeline(SENTIMENT_BACKEND, SENTIMENT_MODEL, SENTIMENT_MODEL_REVISION,
+                                                         SENTIMENT_NUM_THREADS)
+    return sentiment_pipeline
+
+# Map a pipeline result to our (label, score) convention
+def map_sentiment_result(result):
+    # Map 'POSITIVE'/'NEGATIVE' to positive/negative and score
+    if result['label'] == 'POSITIVE':
+        return 'positive', result['score']
+    elif result['label'] == 'NEGATIVE':
+        return 'negative', result['score']
+    else:
+        return 'neutral', result['score'] # Should not happen with this model, but good practice
 
 # Function to get sentiment label and score
-def get_sentiment(text):
+def get_sentiment(text, pipe=None):
     if pd.isna(text) or text.strip() == "":
         return "neutral", 0.5 # Assign neutral for empty or missing reviews
     try:
-        result = sentiment_pipeline(text)[0]
-        # Map 'POSITIVE'/'NEGATIVE' to positive/negative and score
-        if result['label'] == 'POSITIVE':
-            return 'positive', result['score']
-        elif result['label'] == 'NEGATIVE':
-            return 'negative', result['score']
-        else:
-            return 'neutral', result['score'] # Should not happen with this model, but good practice
+        result = (pipe or get_sentiment_pipeline())(text, truncation=True, max_length=SENTIMENT_MAX_LENGTH)[0]
+        return map_sentiment_result(result)
     except Exception as e:
         print(f"Error processing sentiment for text: {text[:50]}... Error: {e}")
         return "neutral", 0.5 # Default to neutral if there's an error
 
-# Apply sentiment analysis
-# This might take a while depending on the number of reviews and your hardware
-# For a large number of reviews, consider batching or using a GPU if available
-df[['sentiment_label', 'sentiment_score']] = df['review'].apply(
-    lambda x: pd.Series(get_sentiment(x))
-)
-print("Sentiment analysis complete.")
+# Batched version of get_sentiment: returns (labels, scores) lists aligned with `texts`.
+# `pipe` defaults to the configured backend's pipeline.
+def get_sentiment_batched(texts, batch_size=SENTIMENT_BATCH_SIZE, max_length=SENTIMENT_MAX_LENGTH, pipe=None):
+    pipe = pipe or get_sentiment_pipeline()
+    texts = list(texts)
+    labels = ["neutral"] * len(texts) # Empty or missing reviews stay neutral, as in get_sentiment
+    scores = [0.5] * len(texts)
+
+    valid_positions = [i for i, text in enumerate(texts) if not (pd.isna(text) or str(text).strip() == "")]
+    if not valid_positions:
+        return labels, scores
+    valid_texts = [str(texts[i]) for i in valid_positions]
+
+    # Sort by token length so each batch holds reviews of similar length and pads very little
+    token_ids = pipe.tokenizer(valid_texts, truncation=True, max_length=max_length)['input_ids']
+    order = sorted(range(len(valid_texts)), key=lambda k: len(token_ids[k]))
 
-# Aggregate by bank and rating
-print("\nAggregating sentiment by bank and rating:")
-# Calculate mean sentiment score for positive/negative labels
-# Note: distilbert gives scores for POS/NEG. We can interpret positive scores for positive, and (1-score) for negative for consistency.
-# Or simply look at the label distribution and average score per label.
-sentiment_summary = df.groupby(['bank', 'rating', 'sentiment_label']).size().unstack(fill_value=0)
-print(sentiment_summary)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        bucket_texts = [valid_texts[k] for k in bucket]
+        try:
+            results = pipe(bucket_texts, batch_size=batch_size, truncation=True, max_length=max_length)
+            bucket_sentiments = [map_sentiment_result(result) for result in results]
+        except Exception as e:
+            # Fall back to scoring this bucket one review at a time so one bad text doesn't lose the batch
+            print(f"Error processing sentiment batch at position {start}: {e}. Retrying per review.")
+            bucket_sentiments = [get_sentiment(text, pipe) for text in bucket_texts]
+        for k, (label, score) in zip(bucket, bucket_sentiments):
+            labels[valid_positions[k]] = label
+            scores[valid_positions[k]] = score
+
+    return labels, scores
+
+# Score a list of reviews with the configured mode; returns [label, score] pairs
+def score_sentiment(texts):
+    if SENTIMENT_MODE == 'batched':
+        labels, scores = get_sentiment_batched(texts)
+        return [[label, score] for label, score in zip(labels, scores)]
+    return [list(get_sentiment(text)) for text in texts]
+
+# Sentiment for a frame through the triage (triage.py): only the distinct texts routed to the model are
+# scored (and only those missing from the cache reach it). Returns (labels, scores, summary, model seconds).
+def triaged_sentiment(df, review_cache=None):
+    from sentiment_backends import cache_model_name
+    from triage import ROUTE_MODEL, triage_reviews, triage_summary
+    with stage('sentiment_triage', rows_in=len(df)) as record:
+        triaged = triage_reviews(df['review'], df['rating'] if 'rating' in df.columns else None)
+        summary = triage_summary(triaged)
+        record.extra.update(summary)
+    needs_model = (triaged['route'] == ROUTE_MODEL).to_numpy()
+    # One review per distinct key goes to the model, as written (keys are lower-cased)
+    first_of_key = pd.Series(triaged['text_key'].to_numpy()).loc[needs_model].drop_duplicates()
+    model_keys = first_of_key.to_numpy()
+    model_texts = df['review'].iloc[first_of_key.index]
+
+    model_start = time.perf_counter()
+    with stage('sentiment_model', rows_in=len(model_keys)):
+        sentiments = cached_map(review_cache, model_texts, cache_model_name(SENTIMENT_MODEL, SENTIMENT_BACKEND),
+                                SENTIMENT_MODEL_REVISION, score_sentiment)
+    model_seconds = time.perf_counter() - model_start
+
+    by_key = dict(zip(model_keys, sentiments))
+    labels = triaged['sentiment_label'].to_numpy(copy=True)
+    scores = triaged['sentiment_score'].to_numpy(copy=True)
+    model_results = [by_key[key] for key in triaged.loc[needs_model, 'text_key']]
+    labels[needs_model] = [label for label, _ in model_results]
+    scores[needs_model] = [score for _, score in model_results]
+    return labels, scores, summary, model_seconds
+
+def print_triage_summary(summary, rows, elapsed, model_seconds):
+    print(f"Triage: {summary['skipped_fraction']:.1%} of {rows} reviews skipped the model "
+          f"({summary['rows_lexicon']} lexicon, {summary['rows_no_letters']} emoji/symbols only, "
+          f"{summary['rows_non_english']} non-English, {summary['rows_empty']} empty, "
+          f"{summary['rows_duplicate']} repeated texts); {summary['model_texts']} distinct texts went to the model.")
+    if summary['model_texts'] and model_seconds > 0:
+        # What scoring every review would have cost at the rate the model just ran
+        untriaged = model_seconds / summary['model_texts'] * rows
+        print(f"Estimated speedup from triage: {untriaged / max(elapsed, 1e-9):.1f}x "
+              f"(~{untriaged:.2f}s to score every review vs {elapsed:.2f}s).")
+
+# Apply sentiment analysis (only reviews missing from the cache reach the model)
+# This might take a while depending on the number of reviews and your hardware
+def add_sentiment_columns(df, review_cache=None):
+    sentiment_start = time.perf_counter()
+    if SENTIMENT_TRIAGE:
+        labels, scores, summary, model_seconds = triaged_sentiment(df, review_cache)
+    else:
+        from sentiment_backends import cache_model_name
+        sentiments = cached_map(review_cache, df['review'], cache_model_name(SENTIMENT_MODEL, SENTIMENT_BACKEND),
+                                SENTIMENT_MODEL_REVISION, score_sentiment)
+        labels = [label for label, _ in sentiments]
+        scores = [score for _, score in sentiments]
+    df = df.assign(sentiment_label=labels, sentiment_score=pd.to_numeric(pd.Series(scores, index=df.index)))
+    sentiment_elapsed = time.perf_counter() - sentiment_start
+    print(f"Sentiment analysis complete: {len(df)} reviews in {sentiment_elapsed:.2f}s "
+          f"({len(df) / max(sentiment_elapsed, 1e-9):.1f} reviews/sec, backend={SENTIMENT_BACKEND}, mode={SENTIMENT_MODE}, "
+          f"batch_size={SENTIMENT_BATCH_SIZE}).")
+    if SENTIMENT_TRIAGE:
+        print_triage_summary(summary, len(df), sentiment_elapsed, model_seconds)
+    return df
 
 
 # --- 2. Thematic Analysis ---
-print("\nStarting Thematic Analysis...")
 
 # Preprocessing for thematic analysis (using spaCy)
-nlp = spacy.load("en_core_web_sm") # Load small English model
+def get_nlp():
+    global nlp
+    with _model_lock:
+        if nlp is None:
+            import spacy
+            nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE) # Load small English model without parser/NER
+    return nlp
 
-def preprocess_text_for_theme(text):
+# Lowercase and strip everything but letters and spaces; None for missing reviews
+def clean_text_for_theme(text):
     if pd.isna(text):
-        return ""
+        return None
     # Convert to lowercase
-    text = text.lower()
+    text = str(text).lower()
     # Remove special characters, numbers (keep letters and spaces)
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    doc = nlp(text)
+    return re.sub(r'[^a-zA-Z\s]', '', text)
+
+def tokens_from_doc(doc):
     # Lemmatization and stop-word removal, keep only nouns and adjectives for keywords
     tokens = [
         token.lemma_ for token in doc
@@ -76,32 +226,66 @@ def preprocess_text_for_theme(text):
     ]
     return " ".join(tokens)
 
-df['processed_review'] = df['review'].apply(preprocess_text_for_theme)
-print("Reviews preprocessed for thematic analysis (lemmatization, stop-word removal, etc.).")
+def preprocess_text_for_theme(text):
+    cleaned = clean_text_for_theme(text)
+    if cleaned is None:
+        return ""
+    return tokens_from_doc(get_nlp()(cleaned))
+
+# Streaming version of preprocess_text_for_theme over many texts using nlp.pipe,
+# optionally fanned out over several worker processes. Returns strings aligned with `texts`.
+def preprocess_texts_for_theme(texts, n_process=SPACY_N_PROCESS, batch_size=SPACY_BATCH_SIZE):
+    texts = list(texts)
+    processed = [""] * len(texts)
+    cleaned = [(i, clean_text_for_theme(text)) for i, text in enumerate(texts)]
+    # Texts left blank by cleaning (emoji-only, non-Latin script) have no tokens; repeated texts are parsed once
+    cleaned = [(i, text) for i, text in cleaned if text is not None and text.strip()]
+    unique_texts = list(dict.fromkeys(text for _, text in cleaned))
+    if not unique_texts:
+        return processed
 
+    if n_process == -1:
+        n_process = os.cpu_count() or 1
+    # Starting workers costs more than it saves on small inputs
+    n_process = max(1, min(n_process, len(unique_texts) // batch_size))
 
-tfidf_vectorizer = TfidfVectorizer(max_features=1000, ngram_range=(1, 2)) # Consider unigrams and bigrams
-tfidf_matrix = tfidf_vectorizer.fit_transform(df['processed_review'])
-feature_names = tfidf_vectorizer.get_feature_names_out()
+    docs = get_nlp().pipe(unique_texts, n_process=n_process, batch_size=batch_size)
+    tokens = {text: tokens_from_doc(doc) for text, doc in zip(unique_texts, docs)}
+    for i, text in cleaned:
+        processed[i] = tokens[text]
+    return processed
+
+def add_processed_review_column(df, review_cache=None, n_process=SPACY_N_PROCESS):
+    model_revision = f"{get_nlp().meta['version']}-preprocess-{THEME_PREPROCESS_VERSION}"
+    df['processed_review'] = cached_map(
+        review_cache, df['review'], SPACY_MODEL, model_revision,
+        lambda texts: preprocess_texts_for_theme(texts, n_process=n_process)
+    )
+    return df
+
+# Get top N keywords per group (summed TF-IDF scores); any grouping works, e.g. ['bank', 'month']
+def extract_keywords(df, by=('bank',), top_n_keywords=15):
+    from keyword_extraction import grouped_keywords, print_keywords
+    keywords = grouped_keywords(df, by, top_n=top_n_keywords)
+    print_keywords(keywords, by)
+    return keywords
 
 # Get top N keywords for each bank
-top_n_keywords = 15
-bank_keywords = defaultdict(list)
+def extract_bank_keywords(df, top_n_keywords=15):
+    return extract_keywords(df, ['bank'], top_n_keywords)
 
-for bank in df['bank'].unique():
-    print(f"\nTop keywords for {bank}:")
-    bank_reviews_idx = df[df['bank'] == bank].index
-    bank_tfidf_matrix = tfidf_matrix[bank_reviews_idx]
 
-    # Sum TF-IDF scores for each feature across the bank's reviews
-    feature_scores = bank_tfidf_matrix.sum(axis=0).A1 # .A1 converts matrix to 1D array
-    # Get indices of top scores
-    top_indices = feature_scores.argsort()[-top_n_keywords:][::-1]
-    for i in top_indices:
-        keyword = feature_names[i]
-        score = feature_scores[i]
-        bank_keywords[bank].append((keyword, score))
-        print(f"- {keyword} ({score:.2f})")
+# Per-review topic ids from the saved topic model, training (and saving) it first if there is none
+def discover_topics(df, retrain=False):
+    from topic_discovery import TOPIC_MODEL_PATH, open_topic_model, print_topics
+    model = open_topic_model(TOPIC_MODEL_PATH, fresh=retrain)
+    if not model.fitted:
+        print(f"Training topic model on {len(df)} reviews...")
+        model.partial_fit(df['processed_review'])
+        model.save(TOPIC_MODEL_PATH)
+        print(f"Topic model saved to {TOPIC_MODEL_PATH}")
+    print_topics(model)
+    return model.assign(df['processed_review'])
 
 
 theme_keywords = {
@@ -112,25 +296,103 @@ theme_keywords = {
     'Feature Requests': ['feature', 'add', 'option', 'update', 'new']
 }
 
-# Function to assign themes to reviews
+# Compiled once; matches keywords on word boundaries in a single pass per review
+theme_matcher = ThemeMatcher(theme_keywords)
+
+# Function to assign themes to a single review (see theme_matcher.assign_themes for whole columns)
 def assign_theme(review_text, theme_keywords_map):
-    themes = []
-    text_lower = str(review_text).lower() # Ensure string and lowercase
-    for theme, keywords in theme_keywords_map.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                themes.append(theme)
-                break # Assign theme if any keyword is found
-    return ", ".join(themes) if themes else "Other"
-
-# Apply thematic assignment
-df['identified_themes'] = df['review'].apply(lambda x: assign_theme(x, theme_keywords))
-print("\nReviews assigned to themes based on keyword matching.")
-
-# Save results to a new CSV
-output_filename_analysis = 'bank_app_reviews_analyzed.csv'
-df[['review', 'rating', 'date', 'bank', 'source', 'sentiment_label', 'sentiment_score', 'identified_themes']].to_csv(output_filename_analysis, index=False, encoding='utf-8')
-print(f"\nAnalyzed data saved to {output_filename_analysis}")
-
-print("\nFirst 5 rows of analyzed data:")
-print(df[['review', 'rating', 'sentiment_label', 'sentiment_score', 'identified_themes']].head())
\ No newline at end of file
+    matcher = theme_matcher if theme_keywords_map is theme_keywords else ThemeMatcher(theme_keywords_map)
+    return matcher.assign_themes([review_text]).iloc[0]
+
+
+# With service_url set, sentiment and spaCy preprocessing run in a warm scoring_service.py worker
+# (which keeps its own cache) instead of loading the models in this process
+def main(service_url=None, retrain_topics=False):
+    import review_store
+    review_cache = ReviewCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES) if USE_CACHE and not service_url else None
+    client = None
+    if service_url:
+        from scoring_service import ScoringClient
+        client = ScoringClient(service_url)
+
+    # Load the cleaned data from Task 1 (only the columns analysis needs)
+    input_path = review_store.raw_path()
+    try:
+        with stage('load_input') as record:
+            df = review_store.read_reviews(input_path, columns=['review', 'rating', 'date', 'bank', 'source'],
+                                           optional_columns=['store_review_id'])
+            record.rows_out = len(df)
+        print(f"Loaded {input_path} successfully.")
+    except FileNotFoundError:
+        print(f"Error: {input_path} not found. Please run Task 1 first.")
+        return
+
+    print("\nStarting Sentiment Analysis...")
+    with stage('sentiment', rows_in=len(df)) as record:
+        if client is not None:
+            df = client.add_columns(df, ['sentiment'])
+        else:
+            df = add_sentiment_columns(df, review_cache)
+        record.rows_out = len(df)
+
+    # Aggregate by bank and rating
+    print("\nAggregating sentiment by bank and rating:")
+    # Calculate mean sentiment score for positive/negative labels
+    # Note: distilbert gives scores for POS/NEG. We can interpret positive scores for positive, and (1-score) for negative for consistency.
+    # Or simply look at the label distribution and average score per label.
+    sentiment_summary = df.groupby(['bank', 'rating', 'sentiment_label'], observed=True).size().unstack(fill_value=0)
+    print(sentiment_summary)
+
+    print("\nStarting Thematic Analysis...")
+    preprocess_start = time.perf_counter()
+    with stage('theme_preprocess', rows_in=len(df)) as record:
+        if client is not None:
+            df = client.add_columns(df, ['processed_review'])
+        else:
+            df = add_processed_review_column(df, review_cache)
+        record.rows_out = len(df)
+    print(f"Reviews preprocessed for thematic analysis (lemmatization, stop-word removal, etc.) "
+          f"in {time.perf_counter() - preprocess_start:.2f}s.")
+
+    with stage('tfidf_keywords', rows_in=len(df)):
+        for by in KEYWORD_GROUPINGS:
+            extract_keywords(df, by)
+
+    # Apply thematic assignment
+    with stage('assign_themes', rows_in=len(df)) as record:
+        df['identified_themes'] = theme_matcher.assign_themes(df['review']).values
+        record.rows_out = len(df)
+    print("\nReviews assigned to themes based on keyword matching.")
+
+    output_columns = ['review', 'rating', 'date', 'bank', 'source', 'sentiment_label', 'sentiment_score', 'identified_themes']
+    if 'store_review_id' in df.columns: # Carried through so the loader keys reviews on it
+        output_columns.append('store_review_id')
+    if TOPIC_DISCOVERY:
+        with stage('topic_discovery', rows_in=len(df)) as record:
+            df['topic_id'] = discover_topics(df, retrain_topics).values
+            record.rows_out = len(df)
+        from topic_discovery import topic_theme_summary
+        print("\nReviews per discovered topic and theme:")
+        print(topic_theme_summary(df['topic_id'], df['identified_themes']))
+        output_columns.append('topic_id')
+
+    # Save results (Parquet dataset or CSV, see review_store.INTERMEDIATE_FORMAT)
+    output_filename_analysis = review_store.analyzed_path()
+    with stage('save_output', rows_in=len(df)) as record:
+        review_store.write_reviews(df[output_columns], output_filename_analysis)
+        record.rows_out = len(df)
+    print(f"\nAnalyzed data saved to {output_filename_analysis}")
+
+    print("\nFirst 5 rows of analyzed data:")
+    print(df[['review', 'rating', 'sentiment_label', 'sentiment_score', 'identified_themes']].head())
+
+    if review_cache is not None:
+        print("\n" + review_cache.stats_summary())
+        review_cache.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add sentiment and themes to the cleaned reviews.")
+    parser.add_argument('--service', help="URL of a running scoring_service.py worker, e.g. http://127.0.0.1:8765")
+    parser.add_argument('--retrain-topics', action='store_true', help="Train a new topic model instead of reusing the saved one")
+    args = parser.parse_args()
+    main(args.service, args.retrain_topics)
@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import review_store
+
+# --- Benchmark Settings ---
+SEED_DATA_PATH = 'bank_app_reviews.csv' # Real reviews whose distributions the synthetic corpus copies
+BENCH_SCALES = [10_000, 100_000, 1_000_000, 10_000_000]
+BENCH_SEED = 42
+CORPUS_DIR = os.path.join('.cache', 'bench') # Generated corpora are reused across runs (one per size and seed)
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+GENERATE_CHUNK_SIZE = 250_000 # Rows generated and written per step, bounds generator memory
+MODEL_STAGE_SAMPLE = 2_000 # get_sentiment / preprocess_text_for_theme run on a sample and are extrapolated
+LOAD_CHUNK_SIZE = 10_000
+STAGES = ['dedupe', 'near_dedupe', 'sentiment_triage', 'get_sentiment', 'preprocess_text_for_theme', 'tfidf_keywords',
+          'assign_theme', 'db_load', 'insights_queries']
+
+_ETHIOPIC = re.compile(r'[\u1200-\u139f\u2d80-\u2ddf]') # Ethiopic and Ethiopic Extended blocks
+
+
+# --- Synthetic Corpus ---
+# 'amharic' if the review has any Ethiopic script, 'other' for emoji / other non-ASCII text, else 'english'
+def review_language(text):
+    if _ETHIOPIC.search(text):
+        return 'amharic'
+    return 'other' if any(ord(c) > 127 for c in text) else 'english'
+
+# Word frequency tables per (language, rating), falling back to the language as a whole for rare pairs
+def build_vocabularies(seed_df):
+    vocabularies = {}
+    for key, group in seed_df.groupby(['language', 'rating']):
+        words = pd.Series([w for text in group['review'] for w in text.split()]).value_counts()
+        if len(words) >= 20:
+            vocabularies[key] = (words.index.to_numpy(dtype=object), (words / words.sum()).to_numpy())
+    for language, group in seed_df.groupby('language'):
+        words = pd.Series([w for text in group['review'] for w in text.split()]).value_counts()
+        vocabularies[language] = (words.index.to_numpy(dtype=object), (words / words.sum()).to_numpy())
+    return vocabularies
+
+def load_seed(path=SEED_DATA_PATH):
+    seed_df = pd.read_csv(path).dropna(subset=['review', 'rating'])
+    seed_df['review'] = seed_df['review'].astype(str)
+    seed_df['language'] = seed_df['review'].map(review_language)
+    seed_df['words'] = seed_df['review'].str.split().str.len().clip(lower=1)
+    return seed_df
+
+# Yield DataFrames of synthetic reviews. Each row copies the bank, rating, language, word count, date
+# and source of a randomly drawn seed review, so those joint distributions are preserved; its words
+# are drawn from the seed vocabulary of the same language and rating.
+def generate_reviews(n_rows, seed_df, seed=BENCH_SEED, chunk_size=GENERATE_CHUNK_SIZE):
+    rng = np.random.default_rng(seed)
+    vocabularies = build_vocabularies(seed_df)
+    for start in range(0, n_rows, chunk_size):
+        templates = seed_df.iloc[rng.integers(0, len(seed_df), size=min(chunk_size, n_rows - start))]
+        texts = np.empty(len(templates), dtype=object)
+        for (language, rating), positions in templates.groupby(['language', 'rating']).indices.items():
+            words, weights = vocabularies.get((language, rating), vocabularies[language])
+            counts = templates['words'].to_numpy()[positions]
+            drawn = words[rng.choice(len(words), size=counts.sum(), p=weights)]
+            for position, row_words in zip(positions, np.split(drawn, np.cumsum(counts)[:-1])):
+                texts[position] = " ".join(row_words)
+        yield pd.DataFrame({
+            'review': texts,
+            'rating': templates['rating'].to_numpy(),
+            'date': templates['date'].to_numpy(),
+            'bank': templates['bank'].to_numpy(),
+            'source': templates['source'].to_numpy(),
+        })
+
+# Path of the cached corpus for (n_rows, seed), generating it first if needed
+def synthetic_corpus(n_rows, seed=BENCH_SEED, seed_path=SEED_DATA_PATH):
+    path = os.path.join(CORPUS_DIR, f"reviews_{n_rows}_{seed}.parquet")
+    if os.path.exists(path):
+        return path
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    print(f"Generating {n_rows} synthetic reviews into {path}...")
+    started = time.perf_counter()
+    seed_df = load_seed(seed_path)
+    tmp_path = path.replace('.parquet', '.tmp.parquet') # Only a complete corpus gets the final name
+    for i, chunk in enumerate(generate_reviews(n_rows, seed_df, seed)):
+        review_store.write_reviews(chunk, tmp_path, append=i > 0)
+    os.replace(tmp_path, path)
+    print(f"Generated in {time.perf_counter() - started:.1f}s.")
+    return path
+
+
+# --- Stages ---
+# Each stage takes the benchmark state dict, does its work and returns the number of rows processed.
+# Stages that need a model run on a sample; their time is extrapolated to the full corpus.
+def stage_dedupe(state):
+    from scrape_reviews import preprocess_reviews
+    raw = state['df'].rename(columns={'review': 'review_text', 'bank': 'bank_name'})
+    state['df'] = preprocess_reviews(raw, verbose=False).reset_index(drop=True)
+    return len(raw)
+
+def stage_near_dedupe(state):
+    from near_duplicates import NearDuplicateIndex
+    index = NearDuplicateIndex(':memory:')
+    index.find_and_add(state['df']['review'], state['df']['bank'])
+    state['near_duplicates'] = index.duplicates
+    index.close()
+    return len(state['df'])
+
+# Routing only (no model): the share of reviews the triage answers without distilbert is in the results
+def stage_sentiment_triage(state):
+    from triage import triage_reviews, triage_summary
+    df = state['df']
+    state['triage'] = triage_summary(triage_reviews(df['review'], df['rating']))
+    print(f"  {state['triage']['skipped_fraction']:.1%} of reviews skip the sentiment model")
+    return len(df)
+
+def stage_get_sentiment(state):
+    import analyze_reviews
+    sample = state['sample']
+    labels, scores = analyze_reviews.get_sentiment_batched(sample['review'])
+    state['sample'] = sample.assign(sentiment_label=labels, sentiment_score=scores)
+    return len(sample)
+
+def stage_preprocess_text_for_theme(state):
+    import analyze_reviews
+    sample = state['sample']
+    state['sample'] = sample.assign(processed_review=analyze_reviews.preprocess_texts_for_theme(sample['review']))
+    return len(sample)
+
+def stage_tfidf_keywords(state):
+    import analyze_reviews
+    df = state['df']
+    if 'processed_review' not in df.columns:
+        # Without spaCy output for every row, the cleaned text stands in (same vocabulary size and shape)
+        df = df.assign(processed_review=[analyze_reviews.clean_text_for_theme(t) or "" for t in df['review']])
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyze_reviews.extract_bank_keywords(df)
+    return len(df)
+
+def stage_assign_theme(state):
+    import analyze_reviews
+    state['df']['identified_themes'] = analyze_reviews.theme_matcher.assign_themes(state['df']['review']).values
+    return len(state['df'])
+
+def stage_db_load(state):
+    import insert_data_to_oracle as loader
+    from db_backend import SQLiteBackend
+    df = state['df']
+    if 'sentiment_label' not in df.columns:
+        # Sentiment only ran on a sample; labels implied by the rating give the same column shapes
+        df = df.assign(sentiment_label=np.where(df['rating'] >= 3, 'positive', 'negative'),
+                       sentiment_score=0.9)
+    if 'identified_themes' not in df.columns:
+        df = df.assign(identified_themes='Other')
+    backend = SQLiteBackend(state['db_path'])
+    banks = loader.BankDimension(backend)
+    themes = loader.ThemeDimension(backend)
+    with backend.connection() as connection:
+        cursor = connection.cursor()
+        for start in range(0, len(df), LOAD_CHUNK_SIZE):
+            chunk = df.iloc[start:start + LOAD_CHUNK_SIZE]
+            rows, _, _ = loader.prepare_review_rows(chunk, banks.resolve(cursor, chunk['bank'].dropna().unique()),
+                                                    themes.resolve(cursor, chunk['identified_themes'].dropna().unique()))
+            loader.load_reviews(cursor, rows, backend=backend)
+            connection.commit()
+        cursor.close()
+    state['backend'] = backend
+    return len(df)
+
+def stage_insights_queries(state):
+    with contextlib.redirect_stdout(io.StringIO()): # The module announces its chart directory on import
+        import analysis_and_insights
+    with state['backend'].connection() as connection:
+        aggregates = analysis_and_insights.compute_aggregates_in_sql(connection)
+    return int(aggregates['rating_stats']['count'])
+
+STAGE_FUNCTIONS = {name: globals()[f"stage_{name}"] for name in STAGES}
+SAMPLED_STAGES = {'get_sentiment', 'preprocess_text_for_theme'}
+
+
+# --- Harness ---
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(n_rows, stages=STAGES, seed=BENCH_SEED, model_sample=MODEL_STAGE_SAMPLE):
+    corpus_path = synthetic_corpus(n_rows, seed)
+    df = review_store.read_reviews(corpus_path)
+    df['bank'] = df['bank'].astype(str)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    state = {'df': df, 'sample': df.sample(n=min(model_sample, len(df)), random_state=seed).reset_index(drop=True)}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        state['db_path'] = os.path.join(tmp, 'bench.sqlite')
+        for name in stages:
+            print(f"[{n_rows} rows] {name}...")
+            started = time.perf_counter()
+            result = {'stage': name, 'sampled': name in SAMPLED_STAGES}
+            try:
+                rows = STAGE_FUNCTIONS[name](state)
+                seconds = time.perf_counter() - started
+                result.update(rows=rows, seconds=round(seconds, 4), rows_per_sec=round(rows / max(seconds, 1e-9), 1))
+                if result['sampled']:
+                    result['extrapolated_seconds'] = round(seconds * len(state['df']) / max(rows, 1), 2)
+            except Exception as e: # e.g. a model library missing on this host; the other stages still run
+                result['error'] = f"{type(e).__name__}: {e}"
+                print(f"  skipped: {result['error']}")
+            results.append(result)
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'rows': n_rows,
+        'rows_after_dedupe': len(state['df']),
+        'near_duplicates': state.get('near_duplicates'),
+        'triage': state.get('triage'),
+        'seed': seed,
+        'model_sample': model_sample,
+        'stages': results,
+    }
+
+# Per-stage time ratio against an earlier result file (>1 means this run is slower)
+def compare_results(current, baseline):
+    before = {stage['stage']: stage for stage in baseline['stages'] if 'seconds' in stage}
+    print(f"\n--- Compared with {baseline.get('commit')} ({baseline.get('timestamp')}) ---")
+    for stage in current['stages']:
+        old = before.get(stage['stage'])
+        if 'seconds' in stage and old:
+            ratio = stage['seconds'] / max(old['seconds'], 1e-9)
+            flag = "  <-- slower" if ratio > 1.1 else ""
+            print(f"{stage['stage']:<28} {old['seconds']:>10.3f}s -> {stage['seconds']:>10.3f}s ({ratio:.2f}x){flag}")
+
+def print_results(result):
+    print(f"\n--- Benchmark: {result['rows']} rows ({result['rows_after_dedupe']} after dedupe) ---")
+    for stage in result['stages']:
+        if 'error' in stage:
+            print(f"{stage['stage']:<28} skipped ({stage['error']})")
+            continue
+        extra = f"  (sample of {stage['rows']}, ~{stage['extrapolated_seconds']}s for all rows)" if stage['sampled'] else ""
+        print(f"{stage['stage']:<28} {stage['seconds']:>10.3f}s {stage['rows_per_sec']:>12.1f} rows/s{extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each analysis stage on a synthetic review corpus.")
+    parser.add_argument('--rows', type=int, nargs='+', default=BENCH_SCALES[:1],
+                        help=f"Corpus sizes to run (e.g. {' '.join(map(str, BENCH_SCALES))})")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--seed', type=int, default=BENCH_SEED)
+    parser.add_argument('--model-sample', type=int, default=MODEL_STAGE_SAMPLE)
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for n_rows in args.rows:
+        result = run_benchmark(n_rows, args.stages, args.seed, args.model_sample)
+        print_results(result)
+        path = os.path.join(args.output_dir, f"bench_{n_rows}_{result['commit'] or 'nocommit'}_"
+                                             f"{result['timestamp'].replace(':', '')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {path}")
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f:
+                compare_results(result, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg') # Charts are only saved to files, so no display backend is needed (also in pool workers)
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+# --- Chart Rendering Settings ---
+# Every chart is drawn from a small pre-aggregated input (counts, frequencies), in a pool of worker
+# processes. A chart whose input hash matches the one recorded when it was last drawn is skipped.
+CHART_WORKERS = int(os.environ.get('BANK_REVIEWS_CHART_WORKERS', min(4, os.cpu_count() or 1)))
+CHART_HASHES_FILE = '.chart_hashes.json' # In the output directory, next to the charts it describes
+CHART_STYLE_VERSION = 1 # Part of every input hash; bump it when the drawing code changes, to redraw all charts
+WORDCLOUD_MAX_WORDS = 200 # Words drawn in the word cloud (WordCloud's default)
+_TOKEN_PATTERN = re.compile(r"\w[\w']+") # Same tokens as WordCloud.process_text
+
+
+# --- Word Cloud Frequencies ---
+# Word counts over a stream of review texts, one text at a time, so memory grows with the vocabulary
+# rather than the corpus. Lower-cased, without WordCloud's stopwords and possessive 's.
+def word_frequencies(texts, counts=None):
+    from wordcloud import STOPWORDS
+    stopwords = {word.lower() for word in STOPWORDS}
+    counts = Counter() if counts is None else counts
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        for word in _TOKEN_PATTERN.findall(text.lower()):
+            if word.endswith("'s"):
+                word = word[:-2]
+            if word not in stopwords and not word.isdigit():
+                counts[word] += 1
+    return counts
+
+def top_frequencies(counts, max_words=WORDCLOUD_MAX_WORDS):
+    return dict(counts.most_common(max_words))
+
+
+# --- Charts ---
+# Each function draws one figure from its input, saves it to `path` and closes it
+def _save(fig, path):
+    fig.tight_layout()
+    # Saved under a temporary name first, so an interrupted run never leaves a half-written chart
+    tmp_path = path + '.tmp'
+    fig.savefig(tmp_path, format=os.path.splitext(path)[1].lstrip('.') or 'png')
+    os.replace(tmp_path, path)
+
+def plot_rating_distribution(rating_counts, path):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    try:
+        sns.barplot(x=rating_counts.index.astype(int), y=rating_counts.values, palette='viridis', ax=ax)
+        ax.set_title('Overall Rating Distribution')
+        ax.set_xlabel('Rating (1-5)')
+        ax.set_ylabel('Number of Reviews')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+def plot_sentiment_distribution(sentiment_counts, path):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    try:
+        sns.barplot(x=sentiment_counts.index, y=sentiment_counts.values, palette='coolwarm', ax=ax)
+        ax.set_title('Overall Sentiment Distribution')
+        ax.set_xlabel('Sentiment Label')
+        ax.set_ylabel('Number of Reviews')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+def plot_sentiment_by_bank(sentiment_counts_by_bank, path):
+    sentiment_by_bank_long = sentiment_counts_by_bank.stack().rename('count').reset_index()
+    sentiment_by_bank_long.columns = ['bank', 'sentiment_label', 'count']
+    fig, ax = plt.subplots(figsize=(12, 6))
+    try:
+        sns.barplot(data=sentiment_by_bank_long, x='bank', y='count', hue='sentiment_label', palette='muted', ax=ax)
+        ax.set_title('Sentiment Distribution by Bank')
+        ax.set_xlabel('Bank Name')
+        ax.set_ylabel('Number of Reviews')
+        ax.tick_params(axis='x', labelrotation=45)
+        plt.setp(ax.get_xticklabels(), ha='right')
+        ax.legend(title='Sentiment')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+# Top 10 themes, without "Other" (adjust if it's too dominant and uninformative for your data)
+def plot_top_themes(theme_counts, path):
+    if 'Other' in theme_counts.index:
+        theme_counts = theme_counts.drop('Other')
+    top_themes = theme_counts.head(10)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        sns.barplot(x=top_themes.index, y=top_themes.values, palette='plasma', ax=ax)
+        ax.set_title('Top Identified Themes in Reviews (Excluding "Other" if present)')
+        ax.set_xlabel('Theme')
+        ax.set_ylabel('Number of Occurrences')
+        ax.tick_params(axis='x', labelrotation=45)
+        plt.setp(ax.get_xticklabels(), ha='right')
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+# Point size = number of reviews at that (rating, score) position
+def plot_rating_vs_score(rating_score_points, path):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        sns.scatterplot(data=rating_score_points, x='rating', y='sentiment_score', hue='sentiment_label',
+                        size='count', palette='viridis', alpha=0.7, ax=ax)
+        ax.set_title('Rating vs Sentiment Score')
+        ax.set_xlabel('Rating')
+        ax.set_ylabel('Sentiment Score')
+        ax.grid(linestyle='--', alpha=0.7)
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+# Input: {'data': long frame with day, bank and the share column, 'column': ..., 'window': days}
+def plot_sentiment_trend(trend, path):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    try:
+        sns.lineplot(data=trend['data'], x='day', y=trend['column'], hue='bank', ax=ax)
+        ax.set_title(f"Share of Positive Reviews (trailing {trend['window']} days)")
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Positive Share')
+        ax.grid(linestyle='--', alpha=0.7)
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+def plot_wordcloud(frequencies, path):
+    from wordcloud import WordCloud
+    wordcloud = WordCloud(width=800, height=400, background_color='white',
+                          max_words=WORDCLOUD_MAX_WORDS).generate_from_frequencies(frequencies)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    try:
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+        ax.set_title('Word Cloud of Review Text')
+        _save(fig, path)
+    finally:
+        plt.close(fig)
+
+
+# --- Cache-Aware Rendering ---
+# Stable hash of a chart input (Series/DataFrames by content, other inputs as sorted JSON)
+def input_hash(name, data):
+    digest = hashlib.sha256(f"{name}\x1f{CHART_STYLE_VERSION}".encode('utf-8'))
+    def update(value):
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            digest.update(value.to_csv().encode('utf-8'))
+        elif isinstance(value, dict):
+            for key in sorted(value, key=str):
+                digest.update(f"\x1e{key}\x1f".encode('utf-8'))
+                update(value[key])
+        else:
+            digest.update(json.dumps(value, default=str).encode('utf-8'))
+    update(data)
+    return digest.hexdigest()
+
+def _load_hashes(output_dir):
+    path = os.path.join(output_dir, CHART_HASHES_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_hashes(output_dir, hashes):
+    path = os.path.join(output_dir, CHART_HASHES_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# Runs in a pool worker (or in-process); returns (file name, error message or None)
+def _render(job):
+    file_name, plot, data, path = job
+    try:
+        plot(data, path)
+        return file_name, None
+    except ImportError as e:
+        return file_name, f"missing library ({e})"
+    except Exception as e:
+        return file_name, str(e)
+
+# charts: [(file name, plot function, input), ...]. Draws the charts whose input changed since the
+# last run (or whose file is missing) in up to `workers` processes; force=True redraws everything.
+# Returns {'drawn': [...], 'skipped': [...], 'failed': {file name: error}}.
+def render_charts(charts, output_dir, workers=CHART_WORKERS, force=False):
+    os.makedirs(output_dir, exist_ok=True)
+    hashes = _load_hashes(output_dir)
+    jobs, new_hashes, skipped = [], {}, []
+    for file_name, plot, data in charts:
+        path = os.path.join(output_dir, file_name)
+        new_hashes[file_name] = input_hash(file_name, data)
+        if not force and hashes.get(file_name) == new_hashes[file_name] and os.path.exists(path):
+            skipped.append(file_name)
+        else:
+            jobs.append((file_name, plot, data, path))
+
+    if len(jobs) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_render, jobs))
+    else:
+        results = [_render(job) for job in jobs]
+
+    failed = {file_name: error for file_name, error in results if error is not None}
+    for file_name, _, _, _ in jobs:
+        if file_name in failed:
+            hashes.pop(file_name, None)
+        else:
+            hashes[file_name] = new_hashes[file_name]
+    _save_hashes(output_dir, hashes)
+    return {'drawn': [job[0] for job in jobs if job[0] not in failed], 'skipped': skipped, 'failed': failed}
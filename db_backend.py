@@ -0,0 +1,423 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from rollups import MISSING_VALUE, ROLLUP_TABLE
+
+# --- Database Connection Details ---
+# Environment variables override these defaults, so credentials don't need to be edited into the scripts
+DB_BACKEND = os.environ.get('BANK_REVIEWS_DB_BACKEND', 'oracle') # 'oracle' or 'sqlite' (local stand-in)
+DB_USER = os.environ.get('BANK_REVIEWS_DB_USER', "bank_reviews_user")
+DB_PASSWORD = os.environ.get('BANK_REVIEWS_DB_PASSWORD', "bankreviewsuser") # REPLACE WITH YOUR ACTUAL PASSWORD
+DB_HOST = os.environ.get('BANK_REVIEWS_DB_HOST', "localhost")
+DB_PORT = int(os.environ.get('BANK_REVIEWS_DB_PORT', 1521))
+DB_SERVICE_NAME = os.environ.get('BANK_REVIEWS_DB_SERVICE_NAME', "XEPDB1") # CONFIRM THIS MATCHES YOUR PDB (or XE)
+SQLITE_PATH = os.environ.get('BANK_REVIEWS_SQLITE_PATH', 'bank_reviews.sqlite')
+
+# --- Connection Pool Settings (Oracle) ---
+POOL_MIN_SESSIONS = int(os.environ.get('BANK_REVIEWS_POOL_MIN', 1))
+POOL_MAX_SESSIONS = int(os.environ.get('BANK_REVIEWS_POOL_MAX', 8)) # Upper bound on parallel workers holding a session
+POOL_INCREMENT = 1
+POOL_WAIT_TIMEOUT_MS = 30000 # How long acquire() waits for a free session before failing
+STATEMENT_CACHE_SIZE = 50 # Parsed statements kept per session
+
+
+# Times every connection acquire so pool contention shows up in the run summary
+class AcquireStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def summary(self):
+        average_ms = self.total_seconds / self.count * 1000 if self.count else 0.0
+        return (f"{self.count} connection acquires, avg {average_ms:.2f} ms, "
+                f"max {self.max_seconds * 1000:.2f} ms")
+
+
+# --- Oracle ---
+class OracleBackend:
+    name = 'oracle'
+    in_list_limit = 1000 # Oracle's maximum number of expressions in an IN list
+    day_function = 'TRUNC' # Date part of a DATE column
+    # True when theme_mask has the bit of theme_id set (theme ids are bit positions, see the Themes table)
+    theme_bit_test = "BITAND({mask}, POWER(2, {theme_id})) > 0"
+
+    INSERT_REVIEW_SQL = """INSERT INTO Reviews (
+        bank_id, review_text, rating, review_date, source,
+        sentiment_label, sentiment_score, identified_themes, theme_mask, review_key
+    ) VALUES (
+        :1, :2, :3, :4, :5, :6, :7, :8, :9, :10
+    )"""
+
+    STAGE_REVIEW_SQL = INSERT_REVIEW_SQL.replace("INSERT INTO Reviews", "INSERT INTO Reviews_Stage")
+
+    # Unchanged rows are skipped by the WHERE clause, so reloading the same chunk writes nothing.
+    # review_text is a CLOB, which DECODE can't compare, so it goes through DBMS_LOB.COMPARE.
+    MERGE_REVIEWS_SQL = """MERGE INTO Reviews r
+    USING Reviews_Stage s
+    ON (r.review_key = s.review_key)
+    WHEN MATCHED THEN UPDATE SET
+        r.bank_id = s.bank_id, r.review_text = s.review_text, r.rating = s.rating, r.review_date = s.review_date,
+        r.source = s.source, r.sentiment_label = s.sentiment_label, r.sentiment_score = s.sentiment_score,
+        r.identified_themes = s.identified_themes, r.theme_mask = s.theme_mask
+        WHERE DECODE(r.bank_id, s.bank_id, 0, 1) = 1
+           OR DBMS_LOB.COMPARE(r.review_text, s.review_text) <> 0
+           OR DECODE(r.rating, s.rating, 0, 1) = 1
+           OR DECODE(r.review_date, s.review_date, 0, 1) = 1
+           OR DECODE(r.source, s.source, 0, 1) = 1
+           OR DECODE(r.sentiment_label, s.sentiment_label, 0, 1) = 1
+           OR DECODE(r.sentiment_score, s.sentiment_score, 0, 1) = 1
+           OR DECODE(r.identified_themes, s.identified_themes, 0, 1) = 1
+           OR DECODE(r.theme_mask, s.theme_mask, 0, 1) = 1
+    WHEN NOT MATCHED THEN INSERT (
+        bank_id, review_text, rating, review_date, source,
+        sentiment_label, sentiment_score, identified_themes, theme_mask, review_key
+    ) VALUES (
+        s.bank_id, s.review_text, s.rating, s.review_date, s.source,
+        s.sentiment_label, s.sentiment_score, s.identified_themes, s.theme_mask, s.review_key
+    )"""
+
+    # Adds a delta row to the daily rollup (see rollups.py); counts and sums are added, not replaced
+    UPSERT_ROLLUP_SQL = f"""MERGE INTO {ROLLUP_TABLE} t
+    USING (SELECT :1 AS bank_id, :2 AS review_day, :3 AS rating, :4 AS sentiment_label, :5 AS identified_themes,
+                  :6 AS review_count, :7 AS score_sum, :8 AS rating_sum FROM dual) d
+    ON (t.bank_id = d.bank_id AND t.review_day = d.review_day AND t.rating = d.rating
+        AND t.sentiment_label = d.sentiment_label AND t.identified_themes = d.identified_themes)
+    WHEN MATCHED THEN UPDATE SET
+        t.review_count = t.review_count + d.review_count, t.score_sum = t.score_sum + d.score_sum,
+        t.rating_sum = t.rating_sum + d.rating_sum
+    WHEN NOT MATCHED THEN INSERT (
+        bank_id, review_day, rating, sentiment_label, identified_themes, review_count, score_sum, rating_sum
+    ) VALUES (
+        d.bank_id, d.review_day, d.rating, d.sentiment_label, d.identified_themes, d.review_count, d.score_sum, d.rating_sum
+    )"""
+
+    REBUILD_ROLLUP_SQL = f"""INSERT INTO {ROLLUP_TABLE} (
+        bank_id, review_day, rating, sentiment_label, identified_themes, review_count, score_sum, rating_sum
+    )
+    SELECT bank_id, TRUNC(review_date), rating, NVL(sentiment_label, '{MISSING_VALUE}'),
+           NVL(identified_themes, '{MISSING_VALUE}'), COUNT(*), NVL(SUM(sentiment_score), 0), SUM(rating)
+    FROM Reviews
+    GROUP BY bank_id, TRUNC(review_date), rating, NVL(sentiment_label, '{MISSING_VALUE}'),
+             NVL(identified_themes, '{MISSING_VALUE}')"""
+
+    def __init__(self, min_sessions=POOL_MIN_SESSIONS, max_sessions=POOL_MAX_SESSIONS):
+        import oracledb
+        self.oracledb = oracledb
+        self.errors = (oracledb.Error,)
+        # Fetch CLOBs as plain strings, so review text never needs TO_CHAR (or a LOB round trip per row)
+        oracledb.defaults.fetch_lobs = False
+        self.acquire_stats = AcquireStats()
+        self.pool = oracledb.create_pool(
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT,
+            service_name=DB_SERVICE_NAME,
+            min=min_sessions,
+            max=max_sessions,
+            increment=POOL_INCREMENT,
+            stmtcachesize=STATEMENT_CACHE_SIZE,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=POOL_WAIT_TIMEOUT_MS
+        )
+
+    # Borrow a pooled session for the duration of a `with` block
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        connection = self.pool.acquire()
+        self.acquire_stats.record(time.perf_counter() - started)
+        try:
+            yield connection
+        finally:
+            self.pool.release(connection)
+
+    def placeholders(self, count):
+        return ", ".join(f":{i + 1}" for i in range(count))
+
+    # Rollup days bind as DATE
+    def day_value(self, day):
+        return day.to_pydatetime()
+
+    def describe_error(self, e):
+        error_obj, = e.args
+        return [f"Oracle Error Code: {error_obj.code}", f"Oracle Error Message: {error_obj.message}"]
+
+    # MERGE rather than INSERT so a name added concurrently by another loader isn't an error
+    def add_banks(self, cursor, bank_names):
+        cursor.executemany(
+            """MERGE INTO Banks b
+            USING (SELECT :1 AS bank_name FROM dual) s
+            ON (b.bank_name = s.bank_name)
+            WHEN NOT MATCHED THEN INSERT (bank_name) VALUES (s.bank_name)""",
+            [(name,) for name in bank_names]
+        )
+
+    # Fix bind types once per cursor so every executemany reuses the same buffers.
+    # review_text is bound as LONG, which Oracle accepts for CLOB columns without creating temporary LOBs.
+    def set_review_input_sizes(self, cursor):
+        oracledb = self.oracledb
+        cursor.setinputsizes(
+            oracledb.DB_TYPE_NUMBER, oracledb.DB_TYPE_LONG, oracledb.DB_TYPE_NUMBER, oracledb.DB_TYPE_DATE,
+            50, 20, oracledb.DB_TYPE_NUMBER, 255, oracledb.DB_TYPE_NUMBER, 64
+        )
+
+    # Array-insert prepared rows with batcherrors so bad rows are reported instead of failing the batch.
+    # Returns (inserted count, [(row offset, error message), ...]).
+    def insert_reviews(self, cursor, rows):
+        if not rows:
+            return 0, []
+        self.set_review_input_sizes(cursor)
+        cursor.executemany(self.INSERT_REVIEW_SQL, rows, batcherrors=True)
+        batch_errors = [(error.offset, error.message) for error in cursor.getbatcherrors()]
+        return len(rows) - len(batch_errors), batch_errors
+
+    # Stage prepared rows and MERGE them into Reviews on review_key.
+    # Returns (rows inserted or updated, [(row offset, error message), ...]).
+    # Must be committed by the caller, which also empties the (ON COMMIT DELETE ROWS) stage table.
+    def merge_reviews(self, cursor, rows):
+        if not rows:
+            return 0, []
+        self.set_review_input_sizes(cursor)
+        cursor.executemany(self.STAGE_REVIEW_SQL, rows, batcherrors=True)
+        batch_errors = [(error.offset, error.message) for error in cursor.getbatcherrors()]
+        cursor.setinputsizes()
+        cursor.execute(self.MERGE_REVIEWS_SQL)
+        return cursor.rowcount, batch_errors
+
+    def upsert_rollup(self, cursor, rows):
+        cursor.executemany(self.UPSERT_ROLLUP_SQL, rows)
+
+    # (theme_id, theme_name) pairs; a name added concurrently by another loader keeps its existing id
+    def add_themes(self, cursor, themes):
+        cursor.executemany(
+            """MERGE INTO Themes t
+            USING (SELECT :1 AS theme_id, :2 AS theme_name FROM dual) s
+            ON (t.theme_name = s.theme_name)
+            WHEN NOT MATCHED THEN INSERT (theme_id, theme_name) VALUES (s.theme_id, s.theme_name)""",
+            themes
+        )
+
+    def close(self):
+        print(f"Oracle pool: {self.acquire_stats.summary()}")
+        self.pool.close()
+
+
+# --- SQLite (local stand-in for benchmarking without an Oracle instance) ---
+class SQLiteBackend:
+    name = 'sqlite'
+    in_list_limit = 500 # Keep well below SQLite's bound-parameter limit
+    day_function = 'date'
+    theme_bit_test = "(({mask} >> {theme_id}) & 1) = 1"
+
+    # The Banks/Reviews/Themes/rollup tables from schema.sql, in SQLite types
+    SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS Banks (
+        bank_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bank_name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS Reviews (
+        review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bank_id INTEGER NOT NULL REFERENCES Banks (bank_id),
+        review_text TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        review_date TEXT NOT NULL,
+        source TEXT NOT NULL,
+        sentiment_label TEXT,
+        sentiment_score REAL,
+        identified_themes TEXT,
+        theme_mask INTEGER,
+        review_key TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_reviews_bank_id ON Reviews (bank_id);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_review_key ON Reviews (review_key);
+    CREATE INDEX IF NOT EXISTS idx_reviews_review_date ON Reviews (review_date);
+    CREATE INDEX IF NOT EXISTS idx_reviews_bank_sentiment ON Reviews (bank_id, sentiment_label);
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        bank_id INTEGER NOT NULL REFERENCES Banks (bank_id),
+        review_day TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        sentiment_label TEXT NOT NULL,
+        identified_themes TEXT NOT NULL,
+        review_count INTEGER NOT NULL,
+        score_sum REAL NOT NULL,
+        rating_sum INTEGER NOT NULL,
+        PRIMARY KEY (bank_id, review_day, rating, sentiment_label, identified_themes)
+    );
+    CREATE INDEX IF NOT EXISTS idx_rollup_review_day ON {ROLLUP_TABLE} (review_day);
+    CREATE TABLE IF NOT EXISTS Themes (
+        theme_id INTEGER PRIMARY KEY CHECK (theme_id BETWEEN 0 AND 62),
+        theme_name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS Review_Themes (
+        review_id INTEGER NOT NULL REFERENCES Reviews (review_id) ON DELETE CASCADE,
+        theme_id INTEGER NOT NULL REFERENCES Themes (theme_id),
+        PRIMARY KEY (review_id, theme_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_review_themes_theme_id ON Review_Themes (theme_id, review_id);
+    """
+
+    INSERT_REVIEW_SQL = """INSERT INTO Reviews (
+        bank_id, review_text, rating, review_date, source,
+        sentiment_label, sentiment_score, identified_themes, theme_mask, review_key
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+    # SQLite's upsert plays the role of Oracle's MERGE; unchanged rows are skipped by the WHERE clause
+    MERGE_REVIEWS_SQL = INSERT_REVIEW_SQL + """
+    ON CONFLICT (review_key) DO UPDATE SET
+        bank_id = excluded.bank_id, review_text = excluded.review_text, rating = excluded.rating,
+        review_date = excluded.review_date, source = excluded.source, sentiment_label = excluded.sentiment_label,
+        sentiment_score = excluded.sentiment_score, identified_themes = excluded.identified_themes,
+        theme_mask = excluded.theme_mask
+    WHERE Reviews.bank_id IS NOT excluded.bank_id
+       OR Reviews.review_text IS NOT excluded.review_text
+       OR Reviews.rating IS NOT excluded.rating
+       OR Reviews.review_date IS NOT excluded.review_date
+       OR Reviews.source IS NOT excluded.source
+       OR Reviews.sentiment_label IS NOT excluded.sentiment_label
+       OR Reviews.sentiment_score IS NOT excluded.sentiment_score
+       OR Reviews.identified_themes IS NOT excluded.identified_themes
+       OR Reviews.theme_mask IS NOT excluded.theme_mask"""
+
+    UPSERT_ROLLUP_SQL = f"""INSERT INTO {ROLLUP_TABLE} (
+        bank_id, review_day, rating, sentiment_label, identified_themes, review_count, score_sum, rating_sum
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (bank_id, review_day, rating, sentiment_label, identified_themes) DO UPDATE SET
+        review_count = review_count + excluded.review_count, score_sum = score_sum + excluded.score_sum,
+        rating_sum = rating_sum + excluded.rating_sum"""
+
+    # Scores are rounded per review like the Oracle NUMBER(5,4) column, so deltas and rebuilds agree
+    REBUILD_ROLLUP_SQL = f"""INSERT INTO {ROLLUP_TABLE} (
+        bank_id, review_day, rating, sentiment_label, identified_themes, review_count, score_sum, rating_sum
+    )
+    SELECT bank_id, date(review_date), rating, COALESCE(sentiment_label, '{MISSING_VALUE}'),
+           COALESCE(identified_themes, '{MISSING_VALUE}'), COUNT(*), COALESCE(SUM(ROUND(sentiment_score, 4)), 0),
+           SUM(rating)
+    FROM Reviews
+    GROUP BY 1, 2, 3, 4, 5"""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.errors = (sqlite3.Error,)
+        self.acquire_stats = AcquireStats()
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+            # Databases created before theme_mask existed get the column; --backfill-themes fills it
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(Reviews)")}
+            if 'theme_mask' not in columns:
+                connection.execute("ALTER TABLE Reviews ADD COLUMN theme_mask INTEGER")
+            connection.commit()
+        finally:
+            connection.close()
+
+    # SQLite connections are cheap, so each `with` block opens its own
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA foreign_keys=ON")
+        self.acquire_stats.record(time.perf_counter() - started)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def placeholders(self, count):
+        return ", ".join("?" * count)
+
+    # Rollup days are stored as 'YYYY-MM-DD' text, which sorts and compares as dates
+    def day_value(self, day):
+        return day.strftime('%Y-%m-%d')
+
+    def describe_error(self, e):
+        return [f"SQLite Error: {e}"]
+
+    def add_banks(self, cursor, bank_names):
+        cursor.executemany("INSERT OR IGNORE INTO Banks (bank_name) VALUES (?)", [(name,) for name in bank_names])
+
+    # sqlite3 only binds builtin types: numpy scalars become Python numbers, timestamps become text
+    @staticmethod
+    def _bindable(value):
+        if hasattr(value, 'strftime'):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
+
+    # executemany stops at the first bad row, so on error the chunk is retried row by row inside a
+    # savepoint to report every failing offset, like Oracle's batcherrors. sqlite3 opens no implicit
+    # transaction for SAVEPOINT, and RELEASE of an outermost savepoint commits, so a transaction is
+    # begun first: the rows stay part of the caller's transaction (with its rollup and theme updates).
+    def _executemany_with_errors(self, cursor, sql, rows):
+        rows = [tuple(self._bindable(value) for value in row) for row in rows]
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute("SAVEPOINT load_chunk")
+        try:
+            cursor.executemany(sql, rows)
+            changed = cursor.rowcount
+            cursor.execute("RELEASE load_chunk")
+            return changed, []
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO load_chunk")
+        changed = 0
+        batch_errors = []
+        for offset, row in enumerate(rows):
+            try:
+                cursor.execute(sql, row)
+                changed += cursor.rowcount
+            except sqlite3.Error as e:
+                batch_errors.append((offset, str(e)))
+        cursor.execute("RELEASE load_chunk")
+        return changed, batch_errors
+
+    def insert_reviews(self, cursor, rows):
+        if not rows:
+            return 0, []
+        return self._executemany_with_errors(cursor, self.INSERT_REVIEW_SQL, rows)
+
+    def merge_reviews(self, cursor, rows):
+        if not rows:
+            return 0, []
+        return self._executemany_with_errors(cursor, self.MERGE_REVIEWS_SQL, rows)
+
+    def upsert_rollup(self, cursor, rows):
+        cursor.executemany(self.UPSERT_ROLLUP_SQL, rows)
+
+    def add_themes(self, cursor, themes):
+        cursor.executemany("INSERT OR IGNORE INTO Themes (theme_id, theme_name) VALUES (?, ?)", themes)
+
+    def close(self):
+        print(f"SQLite backend ({self.path}): {self.acquire_stats.summary()}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Shared backend for the process (one Oracle pool, however many workers use it)
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = SQLiteBackend() if DB_BACKEND == 'sqlite' else OracleBackend()
+        return _backend
+
+def close_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+            _backend = None
@@ -1,137 +1,413 @@
-import oracledb
+import argparse
 import pandas as pd
 import os
-from datetime import datetime
+import json
+import time
+import hashlib
+import review_store
+from instrumentation import stage
+from review_cache import normalize_review_text
+from db_backend import close_backend, get_backend
+from rollups import apply_rollup_delta, ensure_rollup, fetch_existing_reviews, rebuild_rollup, rollup_delta
+from theme_matcher import split_theme_label
 
 # --- 1. Database Connection Details ---
-DB_USER = "bank_reviews_user"
-DB_PASSWORD = "bankreviewsuser" # REPLACE WITH YOUR ACTUAL PASSWORD
-DB_HOST = "localhost"
-DB_PORT = 1521
-DB_SERVICE_NAME = "XEPDB1" # CONFIRM THIS MATCHES YOUR PDB (or XE)
+# Credentials, pool sizes and the backend ('oracle' or the local 'sqlite' stand-in) live in db_backend.py
 
 # --- 2. Path to your Cleaned Data ---
-CLEANED_DATA_PATH = 'bank_app_reviews_analyzed.csv'
+CLEANED_DATA_PATH = review_store.analyzed_path() # Parquet dataset or CSV, see review_store.INTERMEDIATE_FORMAT
+LOAD_COLUMNS = ['review', 'rating', 'date', 'bank', 'source', 'sentiment_label', 'sentiment_score', 'identified_themes']
 
-# --- 3. Main Data Insertion Logic ---
-def insert_data_to_oracle():
-    connection = None
-    cursor = None
-    try:
-        # Establish database connection
-        print("Attempting to connect to Oracle database...")
-        connection = oracledb.connect(
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            service_name=DB_SERVICE_NAME
-        )
-        cursor = connection.cursor()
-        print("Successfully connected to Oracle database.")
-
-        # --- Read Cleaned Data ---
-        print(f"Reading cleaned data from: {CLEANED_DATA_PATH}")
-        try:
-            df = pd.read_csv(CLEANED_DATA_PATH)
-            print(f"Loaded {len(df)} rows from cleaned data.")
-            print("Columns in loaded DataFrame:", df.columns.tolist())
-        except FileNotFoundError:
-            print(f"Error: Cleaned data file not found at {CLEANED_DATA_PATH}")
-            return
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            return
+# --- Bulk Load Settings ---
+LOAD_CHUNK_SIZE = 10000 # Rows per executemany + commit
+LOAD_CHECKPOINT_PATH = 'load_checkpoint.json' # Rows already committed, so an interrupted load can resume
+REJECTED_ROWS_PATH = 'rejected_reviews.csv' # Rows that failed validation or were refused by Oracle
+# 'merge' upserts on REVIEW_KEY, so reloading the same data is a no-op and changed rows are updated;
+# 'insert' appends every row (faster for a first load into an empty table)
+LOAD_MODE = 'merge'
+# Keep Review_Daily_Rollup (rollups.py) in step with every chunk, in the same transaction
+MAINTAIN_ROLLUP = True
+# Keep the Review_Themes bridge table in step with Reviews.theme_mask, in the same transaction
+MAINTAIN_THEME_BRIDGE = True
+MAX_THEMES = 63 # Theme ids are bit positions in theme_mask, a signed 64-bit integer
 
-        # --- Insert into Banks Table ---
-        print("Inserting unique bank names into Banks table...")
-        unique_banks = df['bank'].dropna().unique() # This one is already correct!
-        bank_id_map = {}
-
-        banks_to_insert = []
-        for bank_name in unique_banks:
-            banks_to_insert.append({"bank_name": bank_name})
-
-        for bank_name in unique_banks:
-            cursor.execute("SELECT bank_id FROM Banks WHERE bank_name = :bank_name", bank_name=bank_name)
-            existing_bank_id = cursor.fetchone()
-            if existing_bank_id:
-                bank_id_map[bank_name] = existing_bank_id[0]
-            else:
-                id_var = cursor.var(oracledb.NUMBER)
-                cursor.execute(
-                    "INSERT INTO Banks (bank_name) VALUES (:bank_name) RETURNING bank_id INTO :bank_id",
-                    bank_name=bank_name,
-                    bank_id=id_var
-                )
-                new_bank_id = id_var.getvalue()[0]
-                bank_id_map[bank_name] = new_bank_id
-        print(f"Finished inserting {len(bank_id_map)} unique banks.")
+# --- 3. Insert Helpers ---
+# In-process name -> bank_id cache for the Banks dimension. The whole table is read once; names
+# not in it are added with one array-bound statement and their ids fetched in one query, so resolving
+# a chunk costs at most a few round trips however many banks it mentions. One instance can be
+# shared by every chunk of a load (streaming and incremental loaders keep theirs for the run).
+class BankDimension:
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.bank_id_map = {}
+        self.pending = set() # Names inserted in the current, not yet committed transaction
+        self.loaded = False
+
+    def resolve(self, cursor, bank_names):
+        if not self.loaded:
+            cursor.execute("SELECT bank_id, bank_name FROM Banks")
+            self.bank_id_map.update((name, bank_id) for bank_id, name in cursor.fetchall())
+            self.loaded = True
+
+        missing = [name for name in dict.fromkeys(bank_names) if name not in self.bank_id_map]
+        if missing:
+            self.backend.add_banks(cursor, missing)
+            limit = self.backend.in_list_limit
+            for start in range(0, len(missing), limit):
+                names = missing[start:start + limit]
+                placeholders = self.backend.placeholders(len(names))
+                cursor.execute(f"SELECT bank_id, bank_name FROM Banks WHERE bank_name IN ({placeholders})", names)
+                self.bank_id_map.update((name, bank_id) for bank_id, name in cursor.fetchall())
+            self.pending.update(missing)
+        return self.bank_id_map
+
+    # Call after the transaction that inserted new banks commits
+    def committed(self):
+        self.pending.clear()
+
+    # Call after a rollback: ids handed out for uncommitted banks no longer exist
+    def rolled_back(self):
+        for name in self.pending:
+            self.bank_id_map.pop(name, None)
+        self.pending.clear()
+
+# In-process name -> theme_id cache for the Themes dimension, used like BankDimension. A theme's id is
+# its bit in Reviews.theme_mask, so ids are handed out here (the next unused bit) rather than by an
+# identity column. resolve() takes identified_themes labels and adds any theme names not seen before.
+class ThemeDimension:
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.theme_ids = {}
+        self.pending = set()
+        self.loaded = False
+
+    def _load(self, cursor):
+        cursor.execute("SELECT theme_id, theme_name FROM Themes")
+        self.theme_ids.update((name, theme_id) for theme_id, name in cursor.fetchall())
+        self.loaded = True
+
+    def resolve(self, cursor, labels):
+        if not self.loaded:
+            self._load(cursor)
+
+        names = dict.fromkeys(name for label in labels for name in split_theme_label(label))
+        missing = [name for name in names if name not in self.theme_ids]
+        if missing:
+            next_id = max(self.theme_ids.values(), default=-1) + 1
+            if next_id + len(missing) > MAX_THEMES:
+                raise ValueError(f"theme_mask holds at most {MAX_THEMES} themes; {next_id} exist and "
+                                 f"{len(missing)} more were found ({', '.join(missing)}).")
+            self.backend.add_themes(cursor, [(next_id + i, name) for i, name in enumerate(missing)])
+            # The table is tiny, so read it again: another loader may have added some of these names first
+            self._load(cursor)
+            unresolved = [name for name in missing if name not in self.theme_ids]
+            if unresolved:
+                raise ValueError(f"Theme ids for {', '.join(unresolved)} were taken by another loader; retry the load.")
+            self.pending.update(missing)
+        return self.theme_ids
+
+    def committed(self):
+        self.pending.clear()
+
+    def rolled_back(self):
+        for name in self.pending:
+            self.theme_ids.pop(name, None)
+        self.pending.clear()
+
+# Stable natural key for a review: the Play Store review id when the input carries one (the
+# store_review_id column of scraped reviews), otherwise a hash of bank + source + normalized text + date.
+# Reviews without an id (e.g. the shipped CSVs) with the same text, bank and day share that hash.
+def review_key(bank, source, text, date, store_review_id=None):
+    if store_review_id is not None and store_review_id == store_review_id: # skip None/NaN
+        payload = f"play:{store_review_id}"
+    else:
+        payload = "\x1f".join([str(bank), str(source), normalize_review_text(text), str(date)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# Theme bitmask (bit theme_id set for each theme in the label) per identified_themes label, computed
+# once per distinct label; 0 for "Other", None for a missing label
+def theme_masks(labels, theme_ids):
+    labels = pd.Series(labels)
+    lookup = {
+        label: sum(1 << theme_ids[name] for name in set(split_theme_label(label)))
+        for label in labels.dropna().unique()
+    }
+    return pd.Series([lookup.get(label) for label in labels], index=labels.index, dtype=object)
+
+# Convert an analyzed DataFrame into Reviews bind rows column by column.
+# Returns (rows, rejected, row_index): rejected is a DataFrame of input rows that can't be loaded and
+# row_index holds the input index of each bind row (to trace Oracle batch errors back to the input).
+# theme_ids (from ThemeDimension.resolve) fills theme_mask; without it the column is left NULL.
+def prepare_review_rows(df, bank_id_map, theme_ids=None):
+    store_review_ids = df['store_review_id'] if 'store_review_id' in df.columns else [None] * len(df)
+    df = df.reindex(columns=LOAD_COLUMNS)
+    # CSV input carries 'YYYY-MM-DD' strings, Parquet input typed dates; keys always use the string form
+    review_dates = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    date_keys = review_dates.dt.strftime('%Y-%m-%d').fillna(df['date'].astype(str))
+    prepared = pd.DataFrame({
+        'bank_id': df['bank'].map(bank_id_map),
+        'review_text': df['review'],
+        'rating': pd.to_numeric(df['rating'], errors='coerce'),
+        'review_date': review_dates,
+        'source': df['source'],
+        'sentiment_label': df['sentiment_label'],
+        'sentiment_score': pd.to_numeric(df['sentiment_score'], errors='coerce'),
+        'identified_themes': df['identified_themes'],
+        'theme_mask': theme_masks(df['identified_themes'], theme_ids) if theme_ids is not None else None,
+        'review_key': [
+            review_key(bank, source, text, date, store_review_id)
+            for bank, source, text, date, store_review_id in zip(
+                df['bank'], df['source'], df['review'], date_keys, store_review_ids
+            )
+        ],
+    }, index=df.index)
+
+    # Columns that are NOT NULL in schema.sql; rows missing any of them would be rejected by Oracle anyway
+    reasons = pd.Series('', index=df.index)
+    reasons[prepared['bank_id'].isna()] = 'unknown bank'
+    reasons[prepared['review_text'].isna()] = 'missing review text'
+    reasons[prepared['rating'].isna()] = 'invalid rating'
+    reasons[prepared['review_date'].isna()] = 'invalid date'
+    reasons[prepared['source'].isna()] = 'missing source'
+    valid = reasons == ''
+
+    rejected = df[~valid].assign(error=reasons[~valid])
+    prepared = prepared[valid].astype({'bank_id': 'int64', 'rating': 'int64', 'review_text': str, 'source': str})
+
+    # MERGE needs each key at most once per statement; the last occurrence wins
+    prepared = prepared.drop_duplicates(subset='review_key', keep='last')
+
+    # NaN -> None so optional columns bind as NULL (Timestamps bind as DATE since they subclass datetime)
+    prepared = prepared.astype(object).where(prepared.notna(), None)
+    return list(prepared.itertuples(index=False, name=None)), rejected, prepared.index
+
+# Rebuild the Review_Themes rows of the given reviews from their theme_mask: per batch of ids, one
+# DELETE and one INSERT ... SELECT that joins Themes on the bit test, so the masks never leave the database
+def refresh_review_themes(cursor, backend, ids, id_column='review_key'):
+    bit_test = backend.theme_bit_test.format(mask='r.theme_mask', theme_id='t.theme_id')
+    limit = backend.in_list_limit
+    for start in range(0, len(ids), limit):
+        chunk = list(ids[start:start + limit])
+        placeholders = backend.placeholders(len(chunk))
+        cursor.execute(f"""DELETE FROM Review_Themes WHERE review_id IN (
+            SELECT review_id FROM Reviews WHERE {id_column} IN ({placeholders}))""", chunk)
+        cursor.execute(f"""INSERT INTO Review_Themes (review_id, theme_id)
+            SELECT r.review_id, t.theme_id FROM Reviews r JOIN Themes t ON {bit_test}
+            WHERE r.{id_column} IN ({placeholders})""", chunk)
+
+# Keys of the written rows whose theme_mask is new or differs from what the key held before
+def changed_theme_keys(rows, existing=None, batch_errors=()):
+    refused = {offset for offset, _ in batch_errors}
+    before = {}
+    if existing is not None and len(existing):
+        masks = existing['theme_mask'].astype(object).where(existing['theme_mask'].notna(), None)
+        before = dict(zip(existing['review_key'], masks))
+    return [
+        row[-1] for offset, row in enumerate(rows)
+        if offset not in refused and (row[-1] not in before or before[row[-1]] != row[-2])
+    ]
+
+# Write prepared rows with the backend's array insert or merge, and apply the matching rollup delta
+# and Review_Themes changes. Returns (rows written, [(row offset, error message), ...]); the caller commits.
+def load_reviews(cursor, reviews_data_for_db, mode=None, backend=None):
+    backend = backend or get_backend()
+    merging = (mode or LOAD_MODE) == 'merge'
+    maintain_rollup = MAINTAIN_ROLLUP and len(reviews_data_for_db) > 0
+    maintain_bridge = MAINTAIN_THEME_BRIDGE and len(reviews_data_for_db) > 0
+    existing = None
+    if (maintain_rollup or maintain_bridge) and merging:
+        # What the merged keys held before, so updated reviews move from their old rollup group
+        # and only reviews whose themes changed get their bridge rows rewritten
+        existing = fetch_existing_reviews(cursor, backend, [row[-1] for row in reviews_data_for_db])
+    if merging:
+        written, batch_errors = backend.merge_reviews(cursor, reviews_data_for_db)
+    else:
+        written, batch_errors = backend.insert_reviews(cursor, reviews_data_for_db)
+    if maintain_rollup:
+        apply_rollup_delta(cursor, backend, rollup_delta(reviews_data_for_db, existing, batch_errors))
+    if maintain_bridge:
+        refresh_review_themes(cursor, backend, changed_theme_keys(reviews_data_for_db, existing, batch_errors))
+    return written, batch_errors
 
+# --- Load Checkpoint & Rejected Rows ---
+def load_checkpoint(input_path):
+    if not os.path.exists(LOAD_CHECKPOINT_PATH):
+        return 0
+    with open(LOAD_CHECKPOINT_PATH, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    return checkpoint['next_row'] if checkpoint.get('input') == input_path else 0
+
+def save_checkpoint(input_path, next_row):
+    with open(LOAD_CHECKPOINT_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'input': input_path, 'next_row': next_row}, f)
+
+def clear_checkpoint():
+    if os.path.exists(LOAD_CHECKPOINT_PATH):
+        os.remove(LOAD_CHECKPOINT_PATH)
+
+def save_rejected_rows(rejected):
+    if rejected.empty:
+        return
+    rejected.to_csv(REJECTED_ROWS_PATH, mode='a', header=not os.path.exists(REJECTED_ROWS_PATH),
+                    index=False, encoding='utf-8')
+
+
+# --- 4. Main Data Insertion Logic ---
+# Stream the cleaned reviews (CSV or Parquet) into the database chunk by chunk, committing each chunk
+def load_reviews_in_chunks(connection, cursor, backend, path=CLEANED_DATA_PATH):
+    # --- Read Cleaned Data (in chunks) ---
+    print(f"Reading cleaned data from: {path}")
+    if not os.path.exists(path):
+        print(f"Error: Cleaned data file not found at {path}")
+        return
+    chunks = review_store.iter_review_chunks(path, LOAD_CHUNK_SIZE, columns=LOAD_COLUMNS,
+                                             optional_columns=['store_review_id'])
+
+    # Skip rows committed by an earlier, interrupted load of the same file
+    start_row = load_checkpoint(path)
+    if start_row:
+        print(f"Resuming load at row {start_row} (from {LOAD_CHECKPOINT_PATH}).")
+
+    banks = BankDimension(backend)
+    themes = ThemeDimension(backend)
+    rows_read = 0
+    inserted_total = 0
+    rejected_total = 0
+    load_start = time.perf_counter()
+    if os.path.exists(REJECTED_ROWS_PATH) and not start_row:
+        os.remove(REJECTED_ROWS_PATH)
+
+    for df in chunks:
+        chunk_start = rows_read
+        rows_read += len(df)
+        if rows_read <= start_row:
+            continue
+        if chunk_start < start_row:
+            df = df.iloc[start_row - chunk_start:]
+
+        # --- Insert into Banks Table ---
+        with stage('resolve_banks', rows_in=len(df)):
+            bank_id_map = banks.resolve(cursor, df['bank'].dropna().unique())
+        with stage('resolve_themes', rows_in=len(df)):
+            theme_ids = themes.resolve(cursor, df['identified_themes'].dropna().unique())
 
         # --- Insert into Reviews Table ---
-        print("Preparing reviews data for insertion...")
-        reviews_data_for_db = []
-        for index, row in df.iterrows():
-            # CHANGE 1: Access 'bank' column, not 'Bank Name'
-            bank_id = bank_id_map.get(row['bank'])
-            if bank_id is None:
-                # CHANGE 2: Update warning message to use 'bank'
-                print(f"Warning: Could not find bank_id for '{row['bank']}'. Skipping review.")
-                continue
-
-            reviews_data_for_db.append((
-                bank_id,
-                # CHANGE 3: Use 'review'
-                str(row['review']),
-                # CHANGE 4: Use 'rating'
-                int(row['rating']),
-                # CHANGE 5: Use 'date' and ensure format matches your CSV
-                datetime.strptime(str(row['date']), '%Y-%m-%d'),
-                # CHANGE 6: Use 'source'
-                str(row['source']),
-                # CHANGE 7: Use 'sentiment_label'
-                row.get('sentiment_label'),
-                # CHANGE 8: Use 'sentiment_score'
-                row.get('sentiment_score'),
-                # CHANGE 9: Use 'identified_themes'
-                row.get('identified_themes')
-            ))
-
-        print(f"Inserting {len(reviews_data_for_db)} reviews into Reviews table...")
-        cursor.executemany(
-            """INSERT INTO Reviews (
-                bank_id, review_text, rating, review_date, source,
-                sentiment_label, sentiment_score, identified_themes
-            ) VALUES (
-                :1, :2, :3, :4, :5, :6, :7, :8
-            )""",
-            reviews_data_for_db
-        )
-        print(f"Successfully inserted {cursor.rowcount} reviews.")
-
-        connection.commit()
-        print("Data insertion committed successfully.")
-
-    except oracledb.Error as e:
-        error_obj, = e.args
-        print(f"Oracle Error Code: {error_obj.code}")
-        print(f"Oracle Error Message: {error_obj.message}")
-        print("Transaction rolled back due to error.")
-        if connection:
-            connection.rollback()
+        with stage('prepare_rows', rows_in=len(df)) as record:
+            reviews_data_for_db, rejected, row_index = prepare_review_rows(df, bank_id_map, theme_ids)
+            record.rows_out = len(reviews_data_for_db)
+        with stage('write_rows', rows_in=len(reviews_data_for_db)) as record:
+            inserted, batch_errors = load_reviews(cursor, reviews_data_for_db, backend=backend)
+            record.rows_out = inserted
+            record.extra['mode'] = LOAD_MODE
+        if batch_errors:
+            refused = df.loc[row_index[[offset for offset, _ in batch_errors]]]
+            rejected = pd.concat([rejected, refused.assign(error=[message for _, message in batch_errors])])
+        with stage('commit', rows_in=len(reviews_data_for_db)):
+            connection.commit()
+        banks.committed()
+        themes.committed()
+        save_checkpoint(path, rows_read)
+        save_rejected_rows(rejected)
+
+        inserted_total += inserted
+        rejected_total += len(rejected)
+        elapsed = time.perf_counter() - load_start
+        print(f"Committed rows up to {rows_read}: {inserted_total} written ({LOAD_MODE}), {rejected_total} rejected "
+              f"({inserted_total / max(elapsed, 1e-9):.0f} rows/sec).")
+
+    print(f"Banks dimension holds {len(banks.bank_id_map)} banks, Themes dimension {len(themes.theme_ids)} themes.")
+    print(f"Successfully wrote {inserted_total} new or changed reviews ({LOAD_MODE} mode) in {time.perf_counter() - load_start:.2f}s.")
+    if rejected_total:
+        print(f"{rejected_total} rows were rejected; see {REJECTED_ROWS_PATH} for the rows and reasons.")
+    clear_checkpoint()
+    print("Data insertion committed successfully.")
+
+def insert_data_to_oracle():
+    try:
+        print("Attempting to connect to the database...")
+        backend = get_backend()
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        print("Transaction rolled back due to error.")
-        if connection:
-            connection.rollback()
+        print(f"Could not set up the database backend: {e}")
+        return
+
+    try:
+        with backend.connection() as connection:
+            print(f"Successfully connected to the {backend.name} database.")
+            cursor = connection.cursor()
+            try:
+                if MAINTAIN_ROLLUP:
+                    ensure_rollup(connection, backend)
+                load_reviews_in_chunks(connection, cursor, backend)
+            except backend.errors as e:
+                for line in backend.describe_error(e):
+                    print(line)
+                print("Transaction rolled back due to error.")
+                connection.rollback()
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+                print("Transaction rolled back due to error.")
+                connection.rollback()
+            finally:
+                cursor.close()
+                print("Cursor closed.")
+        print("Database connection released.")
+    finally:
+        close_backend()
+
+# Recompute Review_Daily_Rollup from Reviews (e.g. after rows were changed outside this loader)
+def rebuild_daily_rollup():
+    backend = get_backend()
+    try:
+        with backend.connection() as connection:
+            rebuild_rollup(connection, backend)
+    except backend.errors as e:
+        for line in backend.describe_error(e):
+            print(line)
+    finally:
+        close_backend()
+
+# Fill theme_mask and Review_Themes for reviews loaded before those existed, from their identified_themes
+def backfill_themes(batch_size=LOAD_CHUNK_SIZE):
+    backend = get_backend()
+    themes = ThemeDimension(backend)
+    try:
+        with backend.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""SELECT review_id, identified_themes FROM Reviews
+                    WHERE theme_mask IS NULL AND identified_themes IS NOT NULL""")
+                pending = pd.DataFrame(cursor.fetchall(), columns=['review_id', 'identified_themes'])
+                print(f"{len(pending)} reviews have no theme_mask yet.")
+                for start in range(0, len(pending), batch_size):
+                    batch = pending.iloc[start:start + batch_size]
+                    theme_ids = themes.resolve(cursor, batch['identified_themes'].unique())
+                    masks = theme_masks(batch['identified_themes'], theme_ids)
+                    review_ids = [int(review_id) for review_id in batch['review_id']]
+                    cursor.executemany("UPDATE Reviews SET theme_mask = :theme_mask WHERE review_id = :review_id",
+                                       [{'theme_mask': mask, 'review_id': review_id}
+                                        for mask, review_id in zip(masks, review_ids)])
+                    refresh_review_themes(cursor, backend, review_ids, id_column='review_id')
+                    connection.commit()
+                    themes.committed()
+                    print(f"Backfilled themes for {min(start + batch_size, len(pending))} of {len(pending)} reviews.")
+            except backend.errors as e:
+                connection.rollback()
+                for line in backend.describe_error(e):
+                    print(line)
+            finally:
+                cursor.close()
     finally:
-        if cursor:
-            cursor.close()
-            print("Cursor closed.")
-        if connection:
-            connection.close()
-            print("Database connection closed.")
+        close_backend()
 
 if __name__ == "__main__":
-    insert_data_to_oracle()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the analyzed reviews into the database.")
+    parser.add_argument('--rebuild-rollup', action='store_true', help="Only recompute the daily rollup table from Reviews")
+    parser.add_argument('--backfill-themes', action='store_true',
+                        help="Only fill theme_mask and Review_Themes for reviews loaded before they existed")
+    args = parser.parse_args()
+    if args.rebuild_rollup:
+        rebuild_daily_rollup()
+    elif args.backfill_themes:
+        backfill_themes()
+    else:
+        insert_data_to_oracle()
@@ -0,0 +1,182 @@
+import cProfile
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource # Unix
+except ImportError:
+    resource = None
+try:
+    import psutil # Fallback for peak memory on Windows
+except ImportError:
+    psutil = None
+
+# --- Instrumentation Settings ---
+# Every stage appends one JSON line to METRICS_LOG_PATH and refreshes <script>.prom in METRICS_DIR
+# (Prometheus text format, e.g. for node_exporter's textfile collector).
+METRICS_ENABLED = os.environ.get('BANK_REVIEWS_METRICS', '1') != '0'
+METRICS_DIR = os.environ.get('BANK_REVIEWS_METRICS_DIR', 'metrics')
+METRICS_LOG_PATH = os.path.join(METRICS_DIR, 'stages.jsonl')
+METRIC_PREFIX = 'bank_reviews_stage'
+# Opt-in cProfile around the hot loops: a comma-separated list of stage names, or 'all'.
+# Profiles land in PROFILE_DIR as .prof files (open with pstats, snakeviz, ...). For py-spy, run
+# `py-spy record --threads -- python <script>.py`: the thread running a stage is renamed after it.
+PROFILE_STAGES = {name.strip() for name in os.environ.get('BANK_REVIEWS_PROFILE', '').split(',') if name.strip()}
+PROFILE_DIR = os.path.join(METRICS_DIR, 'profiles')
+
+_lock = threading.Lock()
+_totals = {} # (script, stage) -> summed counters for this process, exported as Prometheus counters
+_run_started_at = time.time()
+
+
+def script_name():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+# Peak resident set size of this process so far, in bytes (None if it can't be measured here)
+def peak_rss_bytes():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 # bytes on macOS, KiB on Linux
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+def profiling_enabled(name):
+    return 'all' in PROFILE_STAGES or name in PROFILE_STAGES
+
+
+# Counters for one run of a stage; set rows_in / rows_out inside the `with` block if not known up front
+class StageRecord:
+    def __init__(self, script, stage, rows_in=None):
+        self.script = script
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.extra = {} # Any other stage-specific numbers to include in the JSON log line
+
+    def as_dict(self, wall, cpu, process_cpu, status):
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        return {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'script': self.script,
+            'stage': self.stage,
+            'status': status,
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(cpu, 6),
+            'process_cpu_seconds': round(process_cpu, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_second': round(rows / wall, 2) if rows and wall > 0 else None,
+            'peak_rss_bytes': peak_rss_bytes(),
+            **self.extra,
+        }
+
+
+# Time a stage: wall time, CPU time, rows in/out, throughput and peak RSS. cpu_seconds is the calling
+# thread's CPU time; process_cpu_seconds also counts library worker threads (torch, BLAS) but, in the
+# threaded pipeline, other stages running at the same time too.
+#   with stage('sentiment', rows_in=len(df)) as record:
+#       ...
+#       record.rows_out = len(df)
+# Errors are recorded with status 'error' and re-raised.
+@contextmanager
+def stage(name, rows_in=None, script=None):
+    record = StageRecord(script or script_name(), name, rows_in)
+    if not METRICS_ENABLED:
+        yield record
+        return
+
+    profiler = cProfile.Profile() if profiling_enabled(name) else None
+    thread = threading.current_thread()
+    thread_name = thread.name
+    thread.name = f"{thread_name}:{name}"
+    status = 'ok'
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    process_cpu_start = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        process_cpu = time.process_time() - process_cpu_start
+        thread.name = thread_name
+        entry = record.as_dict(wall, cpu, process_cpu, status)
+        _record(entry)
+        if profiler is not None:
+            _dump_profile(profiler, record)
+
+def _record(entry):
+    with _lock:
+        totals = _totals.setdefault((entry['script'], entry['stage']), {
+            'calls': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows_in': 0, 'rows_out': 0,
+            'peak_rss_bytes': 0,
+        })
+        totals['calls'] += 1
+        totals['errors'] += entry['status'] != 'ok'
+        totals['wall_seconds'] += entry['wall_seconds']
+        totals['cpu_seconds'] += entry['cpu_seconds']
+        totals['rows_in'] += entry['rows_in'] or 0
+        totals['rows_out'] += entry['rows_out'] or 0
+        totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'], entry['peak_rss_bytes'] or 0)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with open(METRICS_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        # Pool worker processes only log lines; the .prom file belongs to the main process
+        if multiprocessing.parent_process() is None:
+            _write_prometheus(entry['script'])
+
+def _dump_profile(profiler, record):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{record.script}-{record.stage}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    print(f"Profile for stage '{record.stage}' written to {path}")
+
+
+# --- Prometheus Export ---
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Rewrite <script>.prom with this process's totals; written via a temp file so scrapers never see half a file
+def _write_prometheus(script):
+    metrics = [
+        ('calls_total', 'counter', 'Times the stage ran', lambda t: t['calls']),
+        ('errors_total', 'counter', 'Runs of the stage that raised', lambda t: t['errors']),
+        ('wall_seconds_total', 'counter', 'Wall-clock time spent in the stage', lambda t: t['wall_seconds']),
+        ('cpu_seconds_total', 'counter', 'CPU time of the thread running the stage', lambda t: t['cpu_seconds']),
+        ('rows_in_total', 'counter', 'Rows passed into the stage', lambda t: t['rows_in']),
+        ('rows_out_total', 'counter', 'Rows produced by the stage', lambda t: t['rows_out']),
+        ('rows_per_second', 'gauge', 'Rows in per wall-clock second',
+         lambda t: t['rows_in'] / t['wall_seconds'] if t['wall_seconds'] else 0),
+        ('peak_rss_bytes', 'gauge', 'Peak process RSS seen at the end of the stage', lambda t: t['peak_rss_bytes']),
+    ]
+    stages = sorted((stage, totals) for (owner, stage), totals in _totals.items() if owner == script)
+    lines = []
+    for suffix, kind, help_text, value in metrics:
+        metric = f"{METRIC_PREFIX}_{suffix}"
+        lines.append(f"# HELP {metric} {help_text}.")
+        lines.append(f"# TYPE {metric} {kind}")
+        for stage_name, totals in stages:
+            lines.append(f'{metric}{{script="{_label_value(script)}",stage="{_label_value(stage_name)}"}} {value(totals):.6g}')
+    lines.append(f"# HELP {METRIC_PREFIX}_run_start_timestamp_seconds Start time of the process that wrote this file.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_run_start_timestamp_seconds gauge")
+    lines.append(f'{METRIC_PREFIX}_run_start_timestamp_seconds{{script="{_label_value(script)}"}} {_run_started_at:.3f}')
+
+    path = os.path.join(METRICS_DIR, f"{script}.prom")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,236 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# --- Keyword Extraction Settings ---
+DEFAULT_TOP_N = 15
+DEFAULT_MAX_FEATURES = 1000
+DEFAULT_NGRAM_RANGE = (1, 2) # Unigrams and bigrams
+STREAMING_N_FEATURES = 2 ** 20 # Hash buckets of the streaming index; collisions are rare at review vocabulary sizes
+STATE_DIR = '.cache'
+
+
+# --- Grouping ---
+# Group id per row for any combination of columns, e.g. ['bank'], ['bank', 'month'], ['bank', 'rating'].
+# 'month' is derived from the date column ('YYYY-MM') when the frame has no such column.
+# Returns (codes, labels): labels[codes[i]] is row i's group, a value for one column or a tuple for several.
+def group_codes(df, by):
+    column_codes, column_values = [], []
+    for name in by:
+        if name == 'month' and 'month' not in df.columns:
+            values = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m')
+        else:
+            values = df[name]
+        codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=False)
+        column_codes.append(codes)
+        column_values.append(np.asarray(uniques, dtype=object))
+    if not len(df):
+        return np.empty(0, dtype=np.int64), []
+
+    # One integer per combination, then numbered densely in sorted order
+    dims = tuple(max(len(values), 1) for values in column_values)
+    combined = np.ravel_multi_index(column_codes, dims)
+    codes, combined_uniques = pd.factorize(combined, sort=True)
+    per_column = np.unravel_index(combined_uniques, dims)
+    labels = [
+        tuple(plain_label(values[i]) for values, i in zip(column_values, indices)) if len(by) > 1
+        else plain_label(column_values[0][indices[0]])
+        for indices in zip(*per_column)
+    ]
+    return codes, labels
+
+# NumPy scalars and NaN become plain Python values, so labels compare, hash and serialise consistently
+def plain_label(value):
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NaT:
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+# Sparse (groups x rows) 0/1 matrix; multiplied with a (rows x terms) matrix it sums every group in one product
+def group_indicator(codes, n_groups):
+    return sparse.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(n_groups, len(codes)))
+
+# Top-n (term, score) pairs of every row of a sparse (groups x terms) score matrix
+def top_terms(scores, term_for_index, top_n=DEFAULT_TOP_N):
+    scores = sparse.csr_matrix(scores)
+    result = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        data, indices = scores.data[start:end], scores.indices[start:end]
+        if len(data) > top_n:
+            keep = np.argpartition(data, -top_n)[-top_n:]
+            data, indices = data[keep], indices[keep]
+        order = np.argsort(-data, kind='stable')
+        result.append([(term_for_index(indices[i]), float(data[i])) for i in order])
+    return result
+
+
+# --- In-Memory (Batch) Mode ---
+# TF-IDF over the whole frame, then the summed scores of every group from one sparse matrix product.
+# Returns {group label: [(keyword, summed TF-IDF score), ...]}.
+def grouped_keywords(df, by=('bank',), top_n=DEFAULT_TOP_N, text_column='processed_review',
+                     max_features=DEFAULT_MAX_FEATURES, ngram_range=DEFAULT_NGRAM_RANGE):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    if not len(df):
+        return {}
+    vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
+    tfidf_matrix = vectorizer.fit_transform(df[text_column].fillna('').astype(str))
+    feature_names = vectorizer.get_feature_names_out()
+
+    codes, labels = group_codes(df, list(by))
+    group_scores = group_indicator(codes, len(labels)) @ tfidf_matrix
+    return dict(zip(labels, top_terms(group_scores, feature_names.__getitem__, top_n)))
+
+
+# --- Out-of-Core (Streaming) Mode ---
+# Fixed-size term space for streaming work: terms are hashed into n_features buckets, so there is no
+# vocabulary to fit and any chunk can be vectorised on its own. Keeps per-bucket document frequencies
+# (for IDF over everything seen so far) and the first term seen in each bucket, to name buckets again;
+# both are bounded by n_features, however many distinct terms the stream contains.
+class HashedVocabulary:
+    def __init__(self, n_features=STREAMING_N_FEATURES, ngram_range=DEFAULT_NGRAM_RANGE):
+        from sklearn.feature_extraction import FeatureHasher
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        # Same tokenisation as the batch TfidfVectorizer
+        self.analyzer = TfidfVectorizer(ngram_range=self.ngram_range).build_analyzer()
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False)
+        self.documents = 0
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.terms = {} # Bucket -> first term seen in it (at most one term per bucket)
+
+    # Sparse (texts x buckets) term counts; update=True also adds the texts to the document frequencies
+    def count(self, texts, update=True):
+        tokens = [self.analyzer(text) for text in pd.Series(texts).fillna('').astype(str)]
+        counts = self.hasher.transform(tokens).tocsr()
+        counts.sum_duplicates()
+        if update:
+            self._learn_terms(tokens)
+            self.documents += counts.shape[0]
+            self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        return counts
+
+    # TF-IDF rows (L2-normalised, as TfidfVectorizer returns them) using the IDF seen so far
+    def tfidf(self, texts, update=True):
+        from sklearn.preprocessing import normalize
+        counts = self.count(texts, update).astype(np.float64)
+        return normalize(counts.multiply(self.idf()[np.newaxis, :]).tocsr())
+
+    # Name the buckets this chunk touches for the first time (one hasher call for the chunk's distinct
+    # terms); terms landing in an already named bucket are not kept
+    def _learn_terms(self, tokens):
+        chunk_terms = sorted({term for document in tokens for term in document})
+        if not chunk_terms:
+            return
+        buckets = self.hasher.transform([[term] for term in chunk_terms]).tocsr().indices
+        for bucket, term in zip(buckets.tolist(), chunk_terms):
+            if bucket not in self.terms:
+                self.terms[bucket] = term
+
+    # Smoothed IDF, as TfidfVectorizer computes it
+    def idf(self):
+        return np.log((1 + self.documents) / (1 + self.document_frequency)) + 1
+
+    def term(self, bucket):
+        return self.terms.get(int(bucket), f"#{bucket}")
+
+
+# Keywords per group that can be refreshed chunk by chunk without refitting on the full history.
+# Per group, the index sums each review's L2-normalised term counts; IDF is applied when keywords
+# are read, so every score reflects the corpus seen so far.
+# Scores approximate the batch mode (normalisation happens before IDF and the vocabulary is not
+# capped at max_features), so rankings are close but not identical.
+class StreamingKeywordIndex:
+    def __init__(self, by=('bank',), n_features=STREAMING_N_FEATURES, ngram_range=DEFAULT_NGRAM_RANGE):
+        self.by = list(by)
+        self.vocabulary = HashedVocabulary(n_features, ngram_range)
+        self.group_labels = []
+        self.group_rows = {}
+        self.group_sums = sparse.csr_matrix((0, n_features))
+
+    def partial_fit(self, df, text_column='processed_review'):
+        from sklearn.preprocessing import normalize
+        if not len(df):
+            return self
+        counts = self.vocabulary.count(df[text_column])
+        codes, labels = group_codes(df, self.by)
+        rows = np.array([self._group_row(label) for label in labels], dtype=np.int64)
+        self.group_sums.resize((len(self.group_labels), self.vocabulary.n_features))
+        self.group_sums = self.group_sums + group_indicator(rows[codes], len(self.group_labels)) @ normalize(counts)
+        return self
+
+    def _group_row(self, label):
+        if label not in self.group_rows:
+            self.group_rows[label] = len(self.group_labels)
+            self.group_labels.append(label)
+        return self.group_rows[label]
+
+    # {group label: [(keyword, score), ...]} over everything seen so far
+    def keywords(self, top_n=DEFAULT_TOP_N):
+        if not self.vocabulary.documents:
+            return {}
+        scores = self.group_sums.multiply(self.vocabulary.idf()[np.newaxis, :]).tocsr()
+        return dict(zip(self.group_labels, top_terms(scores, self.vocabulary.term, top_n)))
+
+    # Written to a temporary file first, so an interrupted save leaves the previous state intact
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        vocabulary = self.vocabulary
+        settings = {'by': self.by, 'n_features': vocabulary.n_features, 'ngram_range': list(vocabulary.ngram_range),
+                    'group_labels': [list(label) if isinstance(label, tuple) else label for label in self.group_labels]}
+        sums = self.group_sums.tocsr()
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path, settings=np.array(json.dumps(settings)), documents=np.array(vocabulary.documents),
+            document_frequency=vocabulary.document_frequency, sums_data=sums.data, sums_indices=sums.indices,
+            sums_indptr=sums.indptr, term_buckets=np.array(list(vocabulary.terms.keys()), dtype=np.int64),
+            term_strings=np.array(list(vocabulary.terms.values()), dtype=str)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, by=('bank',), n_features=STREAMING_N_FEATURES, ngram_range=DEFAULT_NGRAM_RANGE):
+        with np.load(path) as state:
+            settings = json.loads(str(state['settings']))
+            wanted = {'by': list(by), 'n_features': n_features, 'ngram_range': list(ngram_range)}
+            stored = {name: settings[name] for name in wanted}
+            if stored != wanted:
+                raise ValueError(f"Keyword index at {path} was built with {stored}, not {wanted}; "
+                                 f"delete it or use matching settings.")
+            index = cls(by, n_features, ngram_range)
+            vocabulary = index.vocabulary
+            vocabulary.documents = int(state['documents'])
+            vocabulary.document_frequency = state['document_frequency'].astype(np.int64)
+            for label in settings['group_labels']:
+                index._group_row(tuple(label) if isinstance(label, list) else label)
+            index.group_sums = sparse.csr_matrix(
+                (state['sums_data'], state['sums_indices'], state['sums_indptr']),
+                shape=(len(index.group_labels), n_features)
+            )
+            vocabulary.terms = dict(zip(state['term_buckets'].tolist(), state['term_strings'].tolist()))
+        return index
+
+
+# One state file per grouping, e.g. .cache/keywords-bank-month.npz
+def state_path(by, directory=STATE_DIR):
+    return os.path.join(directory, f"keywords-{'-'.join(by)}.npz")
+
+def open_streaming_index(by=('bank',), path=None, fresh=False):
+    path = path or state_path(by)
+    if not fresh and os.path.exists(path):
+        return StreamingKeywordIndex.load(path, by)
+    return StreamingKeywordIndex(by)
+
+def format_group(label):
+    return " / ".join(str(part) for part in label) if isinstance(label, tuple) else str(label)
+
+def print_keywords(keywords, by):
+    for label, terms in keywords.items():
+        print(f"\nTop keywords for {format_group(label)} ({' x '.join(by)}):")
+        for keyword, score in terms:
+            print(f"- {keyword} ({score:.2f})")
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+import numpy as np
+
+from review_cache import SQLITE_MAX_VARIABLES
+
+# --- Near-Duplicate Settings ---
+DEFAULT_INDEX_PATH = os.path.join('.cache', 'near_duplicates.sqlite')
+DEFAULT_THRESHOLD = 0.8 # Estimated Jaccard similarity of shingle sets at or above which a review is a near duplicate
+DEFAULT_NUM_PERM = 128 # MinHash permutations (signature length); more = better estimates, slower hashing
+DEFAULT_SHINGLE_SIZE = 5 # Character shingle length, applied to the normalized text
+HASH_BLOCK_SIZE = 50_000 # Shingles hashed per NumPy block, bounds memory at ~HASH_BLOCK_SIZE x num_perm x 8 bytes
+MINHASH_SEED = 1 # Fixed so signatures stored in the index stay comparable across runs
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHIFT = np.uint64(32)
+
+
+# Lowercase, drop punctuation/emoji and collapse whitespace, so "Very good app!!" and "very good app" match
+def normalize_for_shingles(text):
+    if text is None or (isinstance(text, float) and text != text):
+        return ""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', str(text).lower())).strip()
+
+# 32-bit hashes of the distinct character shingles of a text; short texts are a single shingle
+def shingle_hashes(text, shingle_size=DEFAULT_SHINGLE_SIZE):
+    text = normalize_for_shingles(text)
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    if len(text) <= shingle_size:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+# Pick (bands, rows per band) for `threshold` by minimising the summed false positive and false
+# negative probability of the LSH S-curve (the same criterion datasketch uses)
+def optimal_bands(threshold, num_perm):
+    grid = np.linspace(0.0, 1.0, 1001)
+    step = grid[1] - grid[0]
+    best, best_error = None, None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows == 0:
+            continue
+        candidate = 1 - (1 - grid ** rows) ** bands
+        below, above = grid <= threshold, grid >= threshold
+        false_positive = candidate[below].sum() * step
+        false_negative = (1 - candidate[above]).sum() * step
+        error = false_positive + false_negative
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+# Persistent MinHash LSH index of review signatures. Each bank is its own namespace (as with the
+# exact drop_duplicates on review_text + bank). Work is linear in the number of reviews: each review
+# is hashed once and only compared against the few reviews sharing one of its LSH band keys.
+class NearDuplicateIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE):
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+        self.path = path
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.checked = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+
+        # Multiply-shift hashing, h(x) = (a*x + b) >> 32 with odd a, in wrapping uint64 arithmetic:
+        # a universal family like (a*x + b) mod p but without the slow 64-bit modulo
+        generator = np.random.RandomState(MINHASH_SEED)
+        self.perm_a = generator.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.perm_b = generator.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+        # Single writer; commit()/rollback() may come from a different thread than find_and_add()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """CREATE TABLE IF NOT EXISTS lsh_settings (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS lsh_signatures (doc_id INTEGER PRIMARY KEY, signature BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS lsh_bands (band_key INTEGER NOT NULL, doc_id INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_lsh_bands_key ON lsh_bands (band_key);"""
+        )
+        self._check_settings(num_perm, shingle_size)
+        self.num_perm = num_perm
+        self.bands, self.rows = self._band_layout()
+        self.next_doc_id = (self.connection.execute("SELECT MAX(doc_id) FROM lsh_signatures").fetchone()[0] or 0) + 1
+
+    # Signatures from a different num_perm/shingle size aren't comparable; refuse rather than mis-match
+    def _check_settings(self, num_perm, shingle_size):
+        wanted = {'num_perm': str(num_perm), 'shingle_size': str(shingle_size), 'seed': str(MINHASH_SEED)}
+        stored = dict(self.connection.execute("SELECT name, value FROM lsh_settings").fetchall())
+        stored = {name: value for name, value in stored.items() if name in wanted}
+        if stored and stored != wanted:
+            raise ValueError(f"Near-duplicate index at {self.path} was built with {stored}, not {wanted}; "
+                             f"delete it or use matching settings.")
+        self.connection.executemany("INSERT OR IGNORE INTO lsh_settings (name, value) VALUES (?, ?)", wanted.items())
+        self.connection.commit()
+
+    # (bands, rows per band) the stored band keys were built with. The layout is chosen for the
+    # threshold when the index is created (or reset) and kept after that: band keys from another layout
+    # would never match, silently hiding all history. Another threshold still applies to the
+    # signature comparison of the candidates.
+    def _band_layout(self):
+        stored = dict(self.connection.execute(
+            "SELECT name, value FROM lsh_settings WHERE name IN ('bands', 'rows')").fetchall())
+        if len(stored) == 2:
+            return int(stored['bands']), int(stored['rows'])
+        bands, rows = optimal_bands(self.threshold, self.num_perm)
+        self.connection.executemany("INSERT OR REPLACE INTO lsh_settings (name, value) VALUES (?, ?)",
+                                    [('bands', str(bands)), ('rows', str(rows))])
+        self.connection.commit()
+        return bands, rows
+
+    # MinHash signatures (n x num_perm uint32) for many texts. All shingle hashes go through the
+    # permutations in large NumPy blocks and are reduced per text with minimum.reduceat.
+    def signatures(self, texts):
+        return self._signatures([shingle_hashes(text, self.shingle_size) for text in texts])
+
+    def _signatures(self, hashes):
+        result = np.full((len(hashes), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        start = 0
+        while start < len(hashes):
+            end, total = start, 0
+            while end < len(hashes) and (end == start or total + len(hashes[end]) <= HASH_BLOCK_SIZE):
+                total += len(hashes[end])
+                end += 1
+            block = hashes[start:end]
+            lengths = np.array([len(h) for h in block])
+            if total:
+                values = np.concatenate(block)
+                # (num_perm x shingles) with in-place ops, so the per-text minimum runs along contiguous rows
+                permuted = np.outer(self.perm_a, values)
+                permuted += self.perm_b[:, None]
+                permuted >>= _SHIFT
+                non_empty = np.flatnonzero(lengths)
+                offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])[non_empty]
+                result[start + non_empty] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return result.astype(np.uint32)
+
+    # One 63-bit key per LSH band, salted with the bank and band number
+    def band_keys(self, signature, bank):
+        prefix = str(bank).encode('utf-8') + b'\x1f'
+        return [
+            int.from_bytes(hashlib.blake2b(prefix + bytes([band]) + signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                           digest_size=8).digest(), 'big') >> 1
+            for band in range(self.bands)
+        ]
+
+    def _lookup(self, keys):
+        candidates = {}
+        for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for band_key, doc_id in self.connection.execute(
+                    f"SELECT band_key, doc_id FROM lsh_bands WHERE band_key IN ({placeholders})", chunk):
+                candidates.setdefault(band_key, []).append(doc_id)
+        return candidates
+
+    def _stored_signatures(self, doc_ids):
+        found = {}
+        for start in range(0, len(doc_ids), SQLITE_MAX_VARIABLES):
+            chunk = doc_ids[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for doc_id, blob in self.connection.execute(
+                    f"SELECT doc_id, signature FROM lsh_signatures WHERE doc_id IN ({placeholders})", chunk):
+                found[doc_id] = np.frombuffer(blob, dtype=np.uint32)
+        return found
+
+    # Check a batch of reviews against the index and against each other, in order.
+    # Returns a boolean array (True = near duplicate of an earlier review) and adds the rest to the index.
+    # Changes stay uncommitted until commit(), so a failed run can roll them back.
+    def find_and_add(self, texts, banks):
+        started = time.perf_counter()
+        texts, banks = list(texts), list(banks)
+        hashes = [shingle_hashes(text, self.shingle_size) for text in texts]
+        signatures = self._signatures(hashes)
+        keys = [self.band_keys(signature, bank) for signature, bank in zip(signatures, banks)]
+
+        candidates = self._lookup(list({key for doc_keys in keys for key in doc_keys}))
+        known = self._stored_signatures(list({doc_id for ids in candidates.values() for doc_id in ids}))
+
+        is_duplicate = np.zeros(len(texts), dtype=bool)
+        new_signatures, new_bands = [], []
+        for i, (signature, doc_keys) in enumerate(zip(signatures, keys)):
+            if not len(hashes[i]):
+                continue # Nothing to compare; empty reviews are left to the missing-data step
+            doc_candidates = {doc_id for key in doc_keys for doc_id in candidates.get(key, ())}
+            if any(np.mean(known[doc_id] == signature) >= self.threshold for doc_id in doc_candidates):
+                is_duplicate[i] = True
+                continue
+            doc_id = self.next_doc_id
+            self.next_doc_id += 1
+            known[doc_id] = signature
+            new_signatures.append((doc_id, signature.tobytes()))
+            for key in doc_keys:
+                candidates.setdefault(key, []).append(doc_id)
+                new_bands.append((key, doc_id))
+
+        self.connection.executemany("INSERT INTO lsh_signatures (doc_id, signature) VALUES (?, ?)", new_signatures)
+        self.connection.executemany("INSERT INTO lsh_bands (band_key, doc_id) VALUES (?, ?)", new_bands)
+        self.checked += len(texts)
+        self.duplicates += int(is_duplicate.sum())
+        self.seconds += time.perf_counter() - started
+        return is_duplicate
+
+    def commit(self):
+        self.connection.commit()
+
+    # Forget reviews added since the last commit (e.g. the scrape that produced them failed)
+    def rollback(self):
+        self.connection.rollback()
+        self.bands, self.rows = self._band_layout() # A rolled-back reset() restores the old layout too
+        self.next_doc_id = (self.connection.execute("SELECT MAX(doc_id) FROM lsh_signatures").fetchone()[0] or 0) + 1
+
+    # Drop every indexed review (used when the review files are rebuilt from scratch); takes effect on commit().
+    # With no stored band keys left, the band layout is chosen afresh for the current threshold.
+    def reset(self):
+        self.connection.execute("DELETE FROM lsh_bands")
+        self.connection.execute("DELETE FROM lsh_signatures")
+        self.bands, self.rows = optimal_bands(self.threshold, self.num_perm)
+        self.connection.executemany("INSERT OR REPLACE INTO lsh_settings (name, value) VALUES (?, ?)",
+                                    [('bands', str(self.bands)), ('rows', str(self.rows))])
+        self.next_doc_id = 1
+
+    def stats_summary(self):
+        rate = self.checked / self.seconds if self.seconds else 0.0
+        return (f"Near-duplicate index ({self.path}): {self.checked} reviews checked, {self.duplicates} near duplicates "
+                f"at threshold {self.threshold} ({self.bands} bands x {self.rows} rows), {rate:.0f} reviews/sec.")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,457 @@
+import argparse
+import hashlib
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import review_store
+import scrape_reviews
+from instrumentation import stage as instrumented_stage
+from keyword_extraction import open_streaming_index, print_keywords, state_path
+from topic_discovery import NO_TOPIC, TOPIC_MODEL_PATH, open_topic_model, print_topics
+from near_duplicates import NearDuplicateIndex
+from scrape_reviews import (
+    iter_new_review_pages, load_watermarks, preprocess_reviews, save_watermarks, to_rows, watermark_for, watermark_key
+)
+from scrape_scheduler import APP_REGISTRY_PATH, load_app_registry
+
+# --- Pipeline Settings ---
+# Peak memory is roughly CHUNK_SIZE x (QUEUE_SIZE + workers) per stage, independent of corpus size.
+CHUNK_SIZE = 1000 # Reviews per chunk
+QUEUE_SIZE = 2 # Chunks buffered between two stages; a full queue blocks the upstream stage
+ANALYZED_COLUMNS = ['review', 'rating', 'date', 'bank', 'source', 'sentiment_label', 'sentiment_score', 'identified_themes']
+# Scrape state of the pipeline, kept apart from scrape_reviews.py's: the pipeline writes the analyzed
+# output but not the raw file, so sharing watermarks or near-duplicate history would make either
+# script skip reviews the other one's output never got
+PIPELINE_WATERMARK_PATH = 'pipeline_watermarks.json'
+PIPELINE_NEAR_DUPLICATE_INDEX_PATH = os.path.join('.cache', 'pipeline_near_duplicates.sqlite')
+
+_STOP = object() # End-of-stream marker passed between stages
+
+
+# A pipeline stage: `fn` maps one chunk (DataFrame) to a new chunk, or None to drop it.
+# `workers` threads pull from the stage's input queue; with `processes` > 0 the threads hand each
+# chunk to a process pool of that size instead (fn must then be a module-level function).
+class Stage:
+    def __init__(self, name, fn, workers=1, processes=0):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.processes = processes
+        self.chunks = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, rows_in, rows_out, seconds):
+        with self.lock:
+            self.chunks += 1
+            self.rows_in += rows_in
+            self.rows_out += rows_out
+            self.seconds += seconds
+
+
+# Run `source` (an iterator of DataFrame chunks) through `stages` using bounded queues.
+# Returns True if every chunk made it through without errors.
+def run_pipeline(source, stages, queue_size=QUEUE_SIZE):
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    failed = threading.Event()
+    errors = []
+    pools = [ProcessPoolExecutor(max_workers=stage.processes) if stage.processes else None for stage in stages]
+    remaining_workers = [stage.workers for stage in stages]
+    remaining_lock = threading.Lock()
+
+    def worker(index):
+        stage, pool = stages[index], pools[index]
+        in_queue = queues[index]
+        out_queue = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            chunk = in_queue.get()
+            if chunk is _STOP:
+                break
+            if failed.is_set():
+                continue # Keep draining so upstream stages never block on a full queue
+            started = time.perf_counter()
+            try:
+                with instrumented_stage(stage.name, rows_in=len(chunk)) as metrics:
+                    result = pool.submit(stage.fn, chunk).result() if pool else stage.fn(chunk)
+                    metrics.rows_out = 0 if result is None else len(result)
+            except Exception as e:
+                errors.append((stage.name, e))
+                print(f"Error in pipeline stage '{stage.name}': {e}")
+                failed.set()
+                continue
+            stage.record(len(chunk), 0 if result is None else len(result), time.perf_counter() - started)
+            if out_queue is not None and result is not None and len(result):
+                out_queue.put(result)
+
+        # The last worker of a stage to finish tells every worker of the next stage to stop
+        with remaining_lock:
+            remaining_workers[index] -= 1
+            last = remaining_workers[index] == 0
+        if last and out_queue is not None:
+            for _ in range(stages[index + 1].workers):
+                out_queue.put(_STOP)
+
+    threads = [
+        threading.Thread(target=worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+        for index, stage in enumerate(stages) for n in range(stage.workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    try:
+        for chunk in source:
+            if failed.is_set():
+                break
+            queues[0].put(chunk)
+    except Exception as e:
+        errors.append(('source', e))
+        print(f"Error in pipeline source: {e}")
+        failed.set()
+    finally:
+        for _ in range(stages[0].workers):
+            queues[0].put(_STOP)
+        for thread in threads:
+            thread.join()
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown()
+
+    print_stage_summary(stages, time.perf_counter() - started)
+    return not errors
+
+def print_stage_summary(stages, elapsed):
+    print("\n--- Pipeline Summary ---")
+    print(f"{'Stage':<12} {'Chunks':>6} {'Rows in':>9} {'Rows out':>9} {'Busy s':>8} {'Rows/s':>9}")
+    for stage in stages:
+        rate = stage.rows_in / stage.seconds if stage.seconds else 0.0
+        print(f"{stage.name:<12} {stage.chunks:>6} {stage.rows_in:>9} {stage.rows_out:>9} {stage.seconds:>8.2f} {rate:>9.1f}")
+    print(f"Finished in {elapsed:.2f}s.")
+
+
+# --- Sources ---
+# Watermarks for a scrape of `registry`, and whether this run rebuilds the analyzed output: only when
+# every app already has a watermark (and the output file, if any, exists) are new rows appended to it.
+# Otherwise the apps are scraped from scratch, as in scrape_reviews.load_scrape_state.
+def load_pipeline_scrape_state(registry, output_path=None):
+    watermarks = load_watermarks(PIPELINE_WATERMARK_PATH)
+    keys = [watermark_key(entry['app_id'], entry['country'], entry['lang']) for entry in registry]
+    output_missing = output_path is not None and not os.path.exists(output_path)
+    full_refresh = output_missing or not all(key in watermarks for key in keys)
+    return ({} if full_refresh else watermarks), full_refresh
+
+# Scrape every registry entry page by page; rows are emitted in chunks of about chunk_size.
+# new_watermarks is filled as pages arrive and only saved once the whole run succeeds.
+def scrape_source(registry, watermarks, chunk_size, new_watermarks):
+    buffer = []
+    for entry in registry:
+        bank_name, app_id = entry['bank_name'], entry['app_id']
+        key = watermark_key(app_id, entry['country'], entry['lang'])
+        watermark = watermarks.get(key)
+        max_reviews = None if watermark else scrape_reviews.initial_reviews_per_app
+        print(f"Scraping reviews for {bank_name} (App ID: {app_id}, {entry['country']}/{entry['lang']})...")
+        for page in iter_new_review_pages(app_id, watermark, lang=entry['lang'], country=entry['country'],
+                                          max_reviews=max_reviews):
+            if page and key not in new_watermarks:
+                new_watermarks[key] = watermark_for(page) # Pages are newest first
+            buffer.extend(to_rows(page, bank_name))
+            while len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer[:chunk_size])
+                buffer = buffer[chunk_size:]
+    if buffer:
+        yield pd.DataFrame(buffer)
+
+# Re-run analysis and loading over existing cleaned reviews (CSV or Parquet) without holding them in memory
+def file_source(path, chunk_size):
+    columns = ['review', 'rating', 'date', 'bank', 'source']
+    chunks = review_store.iter_review_chunks(path, chunk_size, columns=columns, optional_columns=['store_review_id'])
+    for chunk in chunks:
+        yield chunk.rename(columns={'review': 'review_text', 'bank': 'bank_name'})
+
+
+# --- Stage Functions ---
+# Drops exact duplicates across the whole stream. A 16-byte digest per review is kept in a SQLite
+# table at `path` (a scratch file for this run), so memory stays bounded by the chunk size however
+# long the stream is. With a NearDuplicateIndex, near duplicates are dropped too (see
+# preprocess_reviews). Must run with a single worker.
+class StreamDeduplicator:
+    def __init__(self, path, near_duplicates=None):
+        self.near_duplicates = near_duplicates
+        # Created here, used from the stage's worker thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=OFF") # Scratch data; nothing to recover after a crash
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS seen_digests (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+
+    def __call__(self, chunk):
+        chunk = preprocess_reviews(chunk, verbose=False, near_duplicates=self.near_duplicates)
+        digests = [
+            hashlib.blake2b(f"{bank}\x1f{review}".encode('utf-8'), digest_size=16).digest()
+            for review, bank in zip(chunk['review'], chunk['bank'])
+        ]
+        # A digest is new exactly when inserting it changes a row (also catches repeats within the chunk)
+        cursor = self.connection.cursor()
+        keep = []
+        for digest in digests:
+            cursor.execute("INSERT OR IGNORE INTO seen_digests (digest) VALUES (?)", (digest,))
+            keep.append(cursor.rowcount == 1)
+        self.connection.commit()
+        cursor.close()
+        return chunk[keep]
+
+    def close(self):
+        self.connection.close()
+
+# Each worker thread (or process) keeps its own SQLite connection to the result cache
+_worker_state = threading.local()
+
+def _worker_cache():
+    import analyze_reviews
+    from review_cache import ReviewCache
+    if not analyze_reviews.USE_CACHE:
+        return None
+    if getattr(_worker_state, 'cache', None) is None:
+        _worker_state.cache = ReviewCache(analyze_reviews.CACHE_PATH, max_entries=analyze_reviews.CACHE_MAX_ENTRIES)
+    return _worker_state.cache
+
+# With --service the models run in a warm scoring_service.py worker; the URL travels in the environment
+# so process-pool workers see it too
+def _scoring_client():
+    url = os.environ.get('BANK_REVIEWS_SCORING_URL')
+    if not url:
+        return None
+    from scoring_service import ScoringClient
+    return ScoringClient(url)
+
+def sentiment_chunk(chunk):
+    client = _scoring_client()
+    if client is not None:
+        return client.add_columns(chunk, ['sentiment'])
+    import analyze_reviews
+    return analyze_reviews.add_sentiment_columns(chunk, _worker_cache())
+
+def themes_chunk(chunk):
+    import analyze_reviews
+    client = _scoring_client()
+    if client is not None:
+        chunk = client.add_columns(chunk, ['processed_review'])
+    else:
+        # In-process spaCy: the stage's own workers (threads or --theme-processes) provide the parallelism
+        chunk = analyze_reviews.add_processed_review_column(chunk, _worker_cache(), n_process=1)
+    chunk['identified_themes'] = analyze_reviews.theme_matcher.assign_themes(chunk['review']).values
+    return chunk
+
+# Folds each chunk into the streaming keyword index and passes it on unchanged. Must run with a single worker.
+class KeywordUpdater:
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, chunk):
+        self.index.partial_fit(chunk)
+        return chunk
+
+
+# Trains the topic model on each chunk (when training) and adds its topic_id column. Must run with a single worker.
+class TopicAssigner:
+    def __init__(self, model, train):
+        self.model = model
+        self.train = train
+
+    def __call__(self, chunk):
+        if self.train:
+            self.model.partial_fit(chunk['processed_review'])
+        # A model still waiting for enough reviews to initialise leaves the chunk without a topic
+        chunk['topic_id'] = self.model.assign(chunk['processed_review']).values if self.model.fitted else NO_TOPIC
+        return chunk
+
+
+# --- Sinks ---
+# Writes analyzed chunks to a CSV file or Parquet dataset; with append=True new rows go after the
+# existing ones, otherwise the first chunk replaces them
+class FileSink:
+    def __init__(self, path, append=False, columns=ANALYZED_COLUMNS):
+        self.path = path
+        self.appending = append and os.path.exists(path)
+        self.columns = columns
+
+    def __call__(self, chunk):
+        # The Play Store review id travels with scraped reviews (and files that have it) for the loader's key
+        columns = self.columns + ['store_review_id'] if 'store_review_id' in chunk.columns else self.columns
+        review_store.write_reviews(chunk[columns], self.path, append=self.appending)
+        self.appending = True
+        return chunk
+
+# Loads analyzed chunks through the shared db_backend (one pooled session per chunk)
+class DatabaseSink:
+    def __init__(self):
+        import insert_data_to_oracle
+        from db_backend import get_backend
+        self.db = insert_data_to_oracle
+        self.backend = get_backend()
+        self.banks = self.db.BankDimension(self.backend)
+        self.themes = self.db.ThemeDimension(self.backend)
+        if self.db.MAINTAIN_ROLLUP:
+            from rollups import ensure_rollup
+            with self.backend.connection() as connection:
+                ensure_rollup(connection, self.backend)
+
+    def __call__(self, chunk):
+        with self.backend.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                bank_id_map = self.banks.resolve(cursor, chunk['bank'].dropna().unique())
+                theme_ids = self.themes.resolve(cursor, chunk['identified_themes'].dropna().unique())
+                rows, rejected, _ = self.db.prepare_review_rows(chunk, bank_id_map, theme_ids)
+                inserted, batch_errors = self.db.load_reviews(cursor, rows, backend=self.backend)
+                connection.commit()
+                self.banks.committed()
+                self.themes.committed()
+                if len(rejected) or batch_errors:
+                    print(f"Load: {len(rejected) + len(batch_errors)} rows rejected in this chunk.")
+            except Exception:
+                connection.rollback()
+                self.banks.rolled_back()
+                self.themes.rolled_back()
+                raise
+            finally:
+                cursor.close()
+        return chunk
+
+    def close(self):
+        from db_backend import close_backend
+        close_backend()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream reviews from scrape to database in bounded-size chunks.")
+    parser.add_argument('--source', choices=['scrape', 'file'], default='scrape')
+    parser.add_argument('--registry', default=APP_REGISTRY_PATH, help="Apps to scrape for --source scrape")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=review_store.INTERMEDIATE_FORMAT,
+                        help="Format of the --input default and the analyzed output written by --sink file")
+    parser.add_argument('--input', help="Cleaned reviews (CSV file or Parquet dataset) for --source file")
+    parser.add_argument('--sink', choices=['file', 'db'], default='file',
+                        help="'db' loads into the database selected in db_backend.py (Oracle or SQLite)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--sentiment-workers', type=int, default=1)
+    parser.add_argument('--theme-workers', type=int, default=1)
+    parser.add_argument('--theme-processes', type=int, default=0,
+                        help="Run the theme stage in a process pool of this size (0 = threads only)")
+    parser.add_argument('--near-duplicate-threshold', type=float, default=scrape_reviews.near_duplicate_threshold,
+                        help="Drop reviews at least this similar to an earlier one (MinHash estimate of Jaccard)")
+    parser.add_argument('--keep-near-duplicates', action='store_true', help="Only drop exact duplicates")
+    parser.add_argument('--keyword-groups', nargs='*', default=['bank'],
+                        help="Columns to group keywords by, e.g. bank month (none = skip keyword extraction)")
+    parser.add_argument('--topics', action='store_true',
+                        help="Add a topic_id column from the saved topic model (trained on the stream if there is none). "
+                             "Appending to output written without topics needs a full re-run first.")
+    parser.add_argument('--train-topics', action='store_true',
+                        help="Keep training the saved topic model on the streamed reviews")
+    parser.add_argument('--service', help="Score with a running scoring_service.py worker at this URL "
+                                          "instead of loading the models in this process")
+    args = parser.parse_args()
+    if args.service:
+        os.environ['BANK_REVIEWS_SCORING_URL'] = args.service
+
+    output_path = review_store.analyzed_path(args.format)
+    # Scrapes append to the analyzed output only when every app has been scraped by the pipeline before;
+    # a re-run over a file always rebuilds it
+    full_refresh = True
+    if args.source == 'scrape':
+        registry = load_app_registry(args.registry)
+        watermarks, full_refresh = load_pipeline_scrape_state(registry, output_path if args.sink == 'file' else None)
+
+    # Scratch files for this run's duplicate state, so it lives on disk rather than in memory
+    scratch = tempfile.TemporaryDirectory(prefix='pipeline-')
+
+    # Scraped reviews are checked against the persistent index of earlier pipeline scrapes; re-runs over
+    # a file only dedupe within that file
+    near_duplicates = None
+    if not args.keep_near_duplicates:
+        if args.source == 'scrape':
+            near_duplicates = NearDuplicateIndex(PIPELINE_NEAR_DUPLICATE_INDEX_PATH,
+                                                 threshold=args.near_duplicate_threshold)
+            if full_refresh:
+                near_duplicates.reset() # The analyzed output is rebuilt, so history starts over too
+        else:
+            near_duplicates = NearDuplicateIndex(os.path.join(scratch.name, 'near_duplicates.sqlite'),
+                                                 threshold=args.near_duplicate_threshold)
+
+    # Scraped deltas are folded into the keyword index of earlier runs; a full refresh rebuilds it
+    keyword_index = None
+    if args.keyword_groups:
+        keyword_index = open_streaming_index(args.keyword_groups, fresh=full_refresh)
+
+    # Without a saved model the first chunks are assigned by a model that is still learning;
+    # run analyze_reviews.py once (or re-run the pipeline over a file) to train it up front
+    topic_model = None
+    if args.topics:
+        topic_model = open_topic_model(TOPIC_MODEL_PATH)
+        train_topics = args.train_topics or not topic_model.fitted
+
+    new_watermarks = {}
+    if args.source == 'scrape':
+        source = scrape_source(registry, watermarks, args.chunk_size, new_watermarks)
+    else:
+        source = file_source(args.input or review_store.raw_path(args.format), args.chunk_size)
+
+    # Scraped deltas are appended to the analyzed output; a full refresh or a re-run over a file rewrites it
+    if args.sink == 'db':
+        sink = DatabaseSink()
+    else:
+        columns = ANALYZED_COLUMNS + ['topic_id'] if topic_model is not None else ANALYZED_COLUMNS
+        sink = FileSink(output_path, append=not full_refresh, columns=columns)
+    deduplicator = StreamDeduplicator(os.path.join(scratch.name, 'seen_digests.sqlite'), near_duplicates)
+    stages = [
+        Stage('clean', deduplicator), # Stateful: single worker
+        Stage('sentiment', sentiment_chunk, workers=args.sentiment_workers),
+        Stage('themes', themes_chunk, workers=args.theme_workers, processes=args.theme_processes),
+    ]
+    if keyword_index is not None:
+        stages.append(Stage('keywords', KeywordUpdater(keyword_index)))
+    if topic_model is not None:
+        stages.append(Stage('topics', TopicAssigner(topic_model, train_topics)))
+    stages.append(Stage('load', sink)) # Single writer keeps CSV appends and DB commits ordered
+    try:
+        succeeded = run_pipeline(source, stages, queue_size=args.queue_size)
+    finally:
+        deduplicator.close()
+        if isinstance(sink, DatabaseSink):
+            sink.close()
+        if near_duplicates is not None:
+            print(near_duplicates.stats_summary())
+
+    # Like the watermarks, the near-duplicate history only advances when the whole run succeeded
+    if near_duplicates is not None:
+        if succeeded:
+            near_duplicates.commit()
+        near_duplicates.close()
+    scratch.cleanup()
+    if keyword_index is not None and succeeded:
+        print_keywords(keyword_index.keywords(), args.keyword_groups)
+        keyword_index.save(state_path(args.keyword_groups))
+        print(f"Keyword index saved to {state_path(args.keyword_groups)}")
+    if topic_model is not None and succeeded and train_topics:
+        print_topics(topic_model)
+        topic_model.save(TOPIC_MODEL_PATH)
+        print(f"Topic model saved to {TOPIC_MODEL_PATH}")
+
+    if args.source == 'scrape':
+        if succeeded and new_watermarks:
+            watermarks.update(new_watermarks)
+            save_watermarks(watermarks, PIPELINE_WATERMARK_PATH)
+            print(f"Watermarks updated in {PIPELINE_WATERMARK_PATH}")
+        elif not succeeded:
+            print("Pipeline failed; watermarks left unchanged so the next run retries these reviews.")
+
+if __name__ == "__main__":
+    main()
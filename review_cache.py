@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# --- Default Cache Settings ---
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'review_cache.sqlite')
+DEFAULT_MAX_ENTRIES = 2_000_000 # Least recently used entries are evicted above this size
+SQLITE_MAX_VARIABLES = 500 # Keep IN (...) lists well below SQLite's bound-parameter limit
+
+
+# Normalize review text so whitespace-only edits don't produce a new cache key
+def normalize_review_text(text):
+    if text is None or (isinstance(text, float) and text != text): # None or NaN
+        return ""
+    return re.sub(r'\s+', ' ', str(text)).strip()
+
+
+# Content-addressed key: hash of (normalized text, model name, model revision)
+def make_cache_key(text, model_name, model_revision):
+    payload = "\x1f".join([normalize_review_text(text), model_name, model_revision])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# On-disk cache of per-review model outputs (sentiment label/score, spaCy tokens, ...).
+# Values are stored as JSON so any stage can cache its own result shape.
+class ReviewCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS review_cache (
+                cache_key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_review_cache_last_used ON review_cache (last_used)")
+        self.connection.commit()
+
+    # Look up many keys at once; returns {key: value} for the keys that were found
+    def get_many(self, keys):
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(unique_keys), SQLITE_MAX_VARIABLES):
+            chunk = unique_keys[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT cache_key, value FROM review_cache WHERE cache_key IN ({placeholders})", chunk
+            ).fetchall()
+            for cache_key, value in rows:
+                found[cache_key] = json.loads(value)
+
+        # Refresh recency of the entries we just used so eviction keeps them
+        now = time.time()
+        self.connection.executemany(
+            "UPDATE review_cache SET last_used = ? WHERE cache_key = ?", [(now, k) for k in found]
+        )
+        self.connection.commit()
+
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    # Store {key: value} pairs, then evict the least recently used entries if over the size bound
+    def put_many(self, items):
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO review_cache (cache_key, value, last_used) VALUES (?, ?, ?)",
+            [(k, json.dumps(v), now) for k, v in items.items()]
+        )
+        self.connection.commit()
+        self.evict()
+
+    def evict(self):
+        (size,) = self.connection.execute("SELECT COUNT(*) FROM review_cache").fetchone()
+        overflow = size - self.max_entries
+        if overflow <= 0:
+            return
+        self.connection.execute(
+            """DELETE FROM review_cache WHERE cache_key IN (
+                SELECT cache_key FROM review_cache ORDER BY last_used ASC LIMIT ?
+            )""",
+            (overflow,)
+        )
+        self.connection.commit()
+        self.evictions += overflow
+
+    def stats_summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (f"Cache {self.path}: {self.hits} hits, {self.misses} misses "
+                f"({hit_rate:.1f}% hit rate), {self.evictions} evicted")
+
+    def close(self):
+        self.connection.close()
+
+
+# Run `compute` only for the texts whose key is not cached; returns results aligned with `texts`.
+# `compute` takes a list of texts and returns a list of JSON-serializable results.
+def cached_map(cache, texts, model_name, model_revision, compute):
+    texts = list(texts)
+    if cache is None:
+        return compute(texts)
+
+    keys = [make_cache_key(text, model_name, model_revision) for text in texts]
+    found = cache.get_many(keys)
+
+    # Score each missing key once, even if the same text appears several times
+    missing = {}
+    for text, key in zip(texts, keys):
+        if key not in found and key not in missing:
+            missing[key] = text
+    if missing:
+        computed = compute(list(missing.values()))
+        new_items = dict(zip(missing.keys(), computed))
+        cache.put_many(new_items)
+        found.update(new_items)
+
+    return [found[key] for key in keys]
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from theme_matcher import NO_THEME_LABEL, split_theme_label
+
+# --- Review Cube ---
+# In-memory bank x rating x sentiment x theme x day cube for interactive filtering (dashboards,
+# notebooks). Reviews are pre-aggregated into one cell per distinct (bank, rating, sentiment,
+# theme_mask, day), with the review count and the sums needed for averages, so a query is a few
+# vectorised comparisons over the cells instead of a scan over every review. Themes are stored as
+# the theme_mask bitmask, so a review with several themes is one cell that matches each of them.
+#   cube = ReviewCube.from_database(connection, backend)
+#   cube.count(bank='CBE', theme='Transaction Performance', start='2025-01-01')
+#   cube.mean('rating', sentiment='negative')
+#   cube.group_counts('theme', bank='CBE')
+CUBE_DIMENSIONS = ('bank', 'rating', 'sentiment', 'theme', 'day')
+MISSING_LABEL = 'unknown'
+# theme_mask of reviews whose themes are unknown (missing label, or loaded before theme_mask existed):
+# only the sign bit, which no theme uses, so they match no theme filter and are not counted as "Other"
+UNKNOWN_THEMES = np.iinfo(np.int64).min
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set, np.ndarray, pd.Index, pd.Series)) else [value]
+
+
+class ReviewCube:
+    # banks / sentiments: names for the codes in `bank` / `sentiment`; themes: theme name per bit
+    # position (None for unused bits). The remaining arguments are equal-length per-cell arrays.
+    def __init__(self, banks, sentiments, themes, bank, rating, sentiment, theme_mask, day,
+                 review_count, scored_count, score_sum, rating_sum):
+        self.banks = list(banks)
+        self.sentiments = list(sentiments)
+        self.themes = list(themes)
+        self.theme_bits = {name: 1 << bit for bit, name in enumerate(self.themes) if name is not None}
+        self.bank = np.asarray(bank, dtype=np.int32)
+        self.rating = np.asarray(rating, dtype=np.int8)
+        self.sentiment = np.asarray(sentiment, dtype=np.int32)
+        self.theme_mask = np.asarray(theme_mask, dtype=np.int64)
+        self.day = np.asarray(day, dtype='datetime64[D]')
+        self.review_count = np.asarray(review_count, dtype=np.int64)
+        self.scored_count = np.asarray(scored_count, dtype=np.int64)
+        self.score_sum = np.asarray(score_sum, dtype=np.float64)
+        self.rating_sum = np.asarray(rating_sum, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.review_count)
+
+    @property
+    def reviews(self):
+        return int(self.review_count.sum())
+
+    # Cells from per-group rows: columns bank, rating, sentiment_label, theme_mask, day, review_count,
+    # scored_count, score_sum, rating_sum (one row per distinct key, as both builders produce)
+    @classmethod
+    def _from_cells(cls, cells, themes):
+        bank_codes, banks = pd.factorize(cells['bank'].fillna(MISSING_LABEL), sort=True)
+        sentiment_codes, sentiments = pd.factorize(cells['sentiment_label'].fillna(MISSING_LABEL), sort=True)
+        return cls(
+            banks, sentiments, themes, bank_codes, cells['rating'].to_numpy(), sentiment_codes,
+            cells['theme_mask'].to_numpy(), pd.to_datetime(cells['day']).to_numpy().astype('datetime64[D]'),
+            cells['review_count'].to_numpy(), cells['scored_count'].to_numpy(),
+            cells['score_sum'].astype(float).to_numpy(), cells['rating_sum'].to_numpy()
+        )
+
+    # From an analyzed reviews frame (bank, rating, date, sentiment_label, sentiment_score,
+    # identified_themes). Theme bits are numbered in sorted name order.
+    @classmethod
+    def from_frame(cls, df):
+        labels = df['identified_themes']
+        themes = sorted({name for label in labels.dropna().unique() for name in split_theme_label(label)})
+        bits = {name: bit for bit, name in enumerate(themes)}
+        lookup = {label: sum(1 << bits[name] for name in set(split_theme_label(label))) for label in labels.dropna().unique()}
+        masks = np.array([lookup.get(label, UNKNOWN_THEMES) for label in labels], dtype=np.int64)
+        scores = pd.to_numeric(df['sentiment_score'], errors='coerce')
+        frame = pd.DataFrame({
+            'bank': df['bank'],
+            'rating': pd.to_numeric(df['rating'], errors='coerce').fillna(0).astype('int64'),
+            'sentiment_label': df['sentiment_label'],
+            'theme_mask': masks,
+            'day': pd.to_datetime(df['date'], errors='coerce').dt.normalize(),
+            'review_count': 1,
+            'scored_count': scores.notna().astype('int64'),
+            'score_sum': scores.fillna(0.0),
+        }).dropna(subset=['day'])
+        frame['rating_sum'] = frame['rating']
+        keys = ['bank', 'rating', 'sentiment_label', 'theme_mask', 'day']
+        cells = frame.groupby(keys, dropna=False, as_index=False)[
+            ['review_count', 'scored_count', 'score_sum', 'rating_sum']
+        ].sum()
+        return cls._from_cells(cells, themes)
+
+    # From the Reviews table in one GROUP BY (theme names from Themes, where theme_id is the bit).
+    # Reviews loaded before theme_mask existed have unknown themes until --backfill-themes runs.
+    @classmethod
+    def from_database(cls, connection, backend):
+        day = f"{backend.day_function}(r.review_date)"
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT theme_id, theme_name FROM Themes")
+            theme_rows = cursor.fetchall()
+            cursor.execute(f"""SELECT b.bank_name, r.rating, r.sentiment_label, COALESCE(r.theme_mask, :unknown), {day},
+                       COUNT(*), COUNT(r.sentiment_score), COALESCE(SUM(r.sentiment_score), 0), SUM(r.rating)
+                FROM Reviews r JOIN Banks b ON b.bank_id = r.bank_id
+                GROUP BY b.bank_name, r.rating, r.sentiment_label, COALESCE(r.theme_mask, :unknown), {day}""",
+                {'unknown': int(UNKNOWN_THEMES)})
+            cells = pd.DataFrame(cursor.fetchall(), columns=[
+                'bank', 'rating', 'sentiment_label', 'theme_mask', 'day',
+                'review_count', 'scored_count', 'score_sum', 'rating_sum'
+            ])
+        finally:
+            cursor.close()
+        themes = [None] * (max((theme_id for theme_id, _ in theme_rows), default=-1) + 1)
+        for theme_id, name in theme_rows:
+            themes[theme_id] = name
+        return cls._from_cells(cells, themes)
+
+    # --- Queries ---
+    # Boolean mask over the cells. Every filter takes one value or a list (any of them):
+    # bank, rating, sentiment, theme (a review matches if it has any of the themes; NO_THEME_LABEL
+    # selects reviews without a theme) and start / end (inclusive days).
+    def select(self, bank=None, rating=None, sentiment=None, theme=None, start=None, end=None):
+        selected = np.ones(len(self), dtype=bool)
+        if bank is not None:
+            selected &= np.isin(self.bank, self._codes(self.banks, bank))
+        if rating is not None:
+            selected &= np.isin(self.rating, np.asarray(_as_list(rating), dtype=np.int8))
+        if sentiment is not None:
+            selected &= np.isin(self.sentiment, self._codes(self.sentiments, sentiment))
+        if theme is not None:
+            names = _as_list(theme)
+            bits = 0
+            for name in names:
+                if name != NO_THEME_LABEL:
+                    if name not in self.theme_bits:
+                        raise KeyError(f"Unknown theme: {name!r}")
+                    bits |= self.theme_bits[name]
+            matched = (self.theme_mask & bits) != 0
+            if NO_THEME_LABEL in names:
+                matched |= self.theme_mask == 0
+            selected &= matched
+        if start is not None:
+            selected &= self.day >= np.datetime64(pd.Timestamp(start).date(), 'D')
+        if end is not None:
+            selected &= self.day <= np.datetime64(pd.Timestamp(end).date(), 'D')
+        return selected
+
+    @staticmethod
+    def _codes(names, values):
+        positions = {name: code for code, name in enumerate(names)}
+        return np.array([positions.get(value, -1) for value in _as_list(values)], dtype=np.int32)
+
+    def count(self, **filters):
+        return int(self.review_count[self.select(**filters)].sum())
+
+    # Mean sentiment score ('score') or rating ('rating') of the matching reviews (NaN if none match)
+    def mean(self, measure='score', **filters):
+        selected = self.select(**filters)
+        if measure == 'score':
+            total, n = self.score_sum[selected].sum(), self.scored_count[selected].sum()
+        elif measure == 'rating':
+            total, n = self.rating_sum[selected].sum(), self.review_count[selected].sum()
+        else:
+            raise ValueError(f"measure must be 'score' or 'rating', not {measure!r}")
+        return float(total / n) if n else float('nan')
+
+    # Review counts of the matching reviews per value of one dimension (see CUBE_DIMENSIONS).
+    # Per theme, a review counts towards each of its themes; NO_THEME_LABEL counts reviews without one
+    # (reviews with unknown themes are left out).
+    def group_counts(self, by, **filters):
+        selected = self.select(**filters)
+        counts = self.review_count[selected]
+        if by == 'bank':
+            return pd.Series(np.bincount(self.bank[selected], counts, len(self.banks)).astype(np.int64), index=self.banks)
+        if by == 'sentiment':
+            return pd.Series(np.bincount(self.sentiment[selected], counts, len(self.sentiments)).astype(np.int64),
+                             index=self.sentiments)
+        if by == 'rating':
+            totals = np.bincount(self.rating[selected], counts, 6).astype(np.int64)
+            return pd.Series(totals[1:], index=pd.RangeIndex(1, 6, name='rating'))
+        if by == 'theme':
+            masks = self.theme_mask[selected]
+            result = {name: int(counts[(masks & bit) != 0].sum()) for name, bit in self.theme_bits.items()}
+            result[NO_THEME_LABEL] = int(counts[masks == 0].sum())
+            return pd.Series(result).sort_values(ascending=False)
+        if by == 'day':
+            days, codes = np.unique(self.day[selected], return_inverse=True)
+            return pd.Series(np.bincount(codes, counts, len(days)).astype(np.int64), index=pd.DatetimeIndex(days))
+        raise ValueError(f"by must be one of {CUBE_DIMENSIONS}, not {by!r}")
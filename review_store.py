@@ -0,0 +1,278 @@
+import argparse
+import glob
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError: # CSV-only installs still work with INTERMEDIATE_FORMAT = 'csv'
+    pa = None
+
+# --- Intermediate Storage Settings ---
+# 'parquet' writes a dataset directory partitioned by bank and month; 'csv' keeps the original single files.
+# With 'parquet', a CSV that exists without its dataset (e.g. the CSVs shipped with the repo) keeps being
+# used until it is converted once with: python review_store.py --convert
+INTERMEDIATE_FORMAT = os.environ.get('BANK_REVIEWS_INTERMEDIATE_FORMAT', 'parquet')
+RAW_CSV_PATH = 'bank_app_reviews.csv'
+RAW_DATASET_PATH = 'bank_app_reviews.parquet'
+ANALYZED_CSV_PATH = 'bank_app_reviews_analyzed.csv'
+ANALYZED_DATASET_PATH = 'bank_app_reviews_analyzed.parquet'
+PARTITION_COLUMNS = ['bank', 'month'] # month is derived from date ('YYYY-MM') and only exists on disk
+PARQUET_COMPRESSION = 'zstd'
+ROW_GROUP_SIZE = 64_000
+COMPARE_MIN_ROWS = 200_000 # The format comparison repeats the sample up to this size so fixed costs don't dominate
+
+# Arrow type per known column; repeated strings are dictionary encoded
+COLUMN_TYPES = {
+    'review': 'string',
+    'store_review_id': 'string', # Play Store reviewId, when the reviews were scraped with it
+    'rating': 'int8',
+    'date': 'date32',
+    'bank': 'dictionary',
+    'source': 'dictionary',
+    'sentiment_label': 'dictionary',
+    'sentiment_score': 'float64',
+    'identified_themes': 'dictionary',
+    'processed_review': 'string',
+    'topic_id': 'int16',
+}
+
+
+def _path_for(fmt, csv_path, dataset_path):
+    if (fmt or INTERMEDIATE_FORMAT) != 'parquet':
+        return csv_path
+    # Until converted, the CSV stays the one copy that is read and rewritten
+    if not os.path.exists(dataset_path) and os.path.exists(csv_path):
+        return csv_path
+    return dataset_path
+
+def raw_path(fmt=None):
+    return _path_for(fmt, RAW_CSV_PATH, RAW_DATASET_PATH)
+
+def analyzed_path(fmt=None):
+    return _path_for(fmt, ANALYZED_CSV_PATH, ANALYZED_DATASET_PATH)
+
+def is_dataset(path):
+    return os.path.isdir(path) or path.endswith('.parquet')
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet intermediates: pip install pyarrow "
+                          "(or set INTERMEDIATE_FORMAT = 'csv')")
+
+def _arrow_type(kind):
+    if kind == 'dictionary':
+        return pa.dictionary(pa.int32(), pa.string())
+    return getattr(pa, kind)()
+
+# Partition values are plain strings in directory names, so they are read as strings and filtered there
+def _partitioning():
+    return ds.partitioning(pa.schema([('bank', pa.string()), ('month', pa.string())]), flavor='hive')
+
+
+# --- Writing ---
+# Cast a reviews DataFrame to the typed Arrow table stored on disk (plus the month partition column)
+def to_arrow_table(df):
+    _require_pyarrow()
+    df = df.copy()
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    df['date'] = dates.dt.date
+    df['month'] = dates.dt.strftime('%Y-%m').fillna('unknown')
+    fields = []
+    for column in df.columns:
+        kind = 'dictionary' if column == 'month' else COLUMN_TYPES.get(column)
+        arrow_type = _arrow_type(kind) if kind else pa.Schema.from_pandas(df[[column]], preserve_index=False).field(column).type
+        fields.append(pa.field(column, arrow_type))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+# Write reviews to `path` in its format. append=True adds new files next to the existing ones;
+# otherwise the dataset (or CSV) is replaced.
+def write_reviews(df, path, append=False):
+    if not is_dataset(path):
+        appending = append and os.path.exists(path)
+        if appending:
+            # Rows follow the existing header (a file written before a column existed keeps its layout)
+            df = df.reindex(columns=_columns_in(path))
+        df.to_csv(path, mode='a' if append else 'w', header=not appending, index=False, encoding='utf-8')
+        return
+    _require_pyarrow()
+    if not append and os.path.exists(path):
+        shutil.rmtree(path)
+    pq.write_to_dataset(
+        to_arrow_table(df), path,
+        partitioning=PARTITION_COLUMNS, partitioning_flavor='hive',
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet", # Unique per write, so appends never collide
+        existing_data_behavior='overwrite_or_ignore',
+        compression=PARQUET_COMPRESSION, row_group_size=ROW_GROUP_SIZE
+    )
+
+
+# --- Reading ---
+def _columns_in(path):
+    if not is_dataset(path):
+        return list(pd.read_csv(path, nrows=0).columns)
+    return _open_dataset(path).schema.names
+
+# `columns` plus those of `optional_columns` the file or dataset has (older files lack e.g. store_review_id)
+def _with_optional(path, columns, optional_columns):
+    if columns is None or not optional_columns:
+        return columns
+    present = set(_columns_in(path))
+    return list(columns) + [column for column in optional_columns if column in present and column not in columns]
+
+# Partition and row-group filter for the optional bank list and inclusive date range
+def _filter_expression(banks=None, start_date=None, end_date=None):
+    expression = None
+    def both(a, b):
+        return b if a is None else a & b
+    if banks is not None:
+        expression = both(expression, ds.field('bank').isin(list(banks)))
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        # The month test prunes whole directories; the date test prunes row groups via their statistics
+        expression = both(expression, (ds.field('month') >= start.strftime('%Y-%m')) & (ds.field('date') >= start.date()))
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        expression = both(expression, (ds.field('month') <= end.strftime('%Y-%m')) & (ds.field('date') <= end.date()))
+    return expression
+
+def _filter_csv(df, banks=None, start_date=None, end_date=None):
+    if banks is not None:
+        df = df[df['bank'].isin(list(banks))]
+    if start_date is not None or end_date is not None:
+        dates = pd.to_datetime(df['date'])
+        keep = pd.Series(True, index=df.index)
+        if start_date is not None:
+            keep &= dates >= pd.Timestamp(start_date)
+        if end_date is not None:
+            keep &= dates <= pd.Timestamp(end_date)
+        df = df[keep]
+    return df
+
+def _open_dataset(path):
+    _require_pyarrow()
+    return ds.dataset(path, format='parquet', partitioning=_partitioning())
+
+def _dataset_columns(dataset, columns):
+    # 'month' is a storage detail; callers see the same columns as the CSV unless they ask for it
+    return columns if columns is not None else [name for name in dataset.schema.names if name != 'month']
+
+def _arrow_to_pandas(table):
+    # Dates come back as datetime64 rather than Python date objects; dictionary columns as categoricals
+    df = table.to_pandas(date_as_object=False)
+    if 'bank' in df.columns:
+        df['bank'] = df['bank'].astype('category')
+    return df
+
+# Read reviews from a CSV file or Parquet dataset. Only `columns` (and those of `optional_columns` that
+# exist) are read, and with Parquet the bank/date filters skip non-matching partitions and row groups
+# instead of filtering after the read.
+def read_reviews(path, columns=None, banks=None, start_date=None, end_date=None, optional_columns=()):
+    columns = _with_optional(path, columns, optional_columns)
+    if not is_dataset(path):
+        filter_columns = [c for c, used in [('bank', banks is not None), ('date', start_date or end_date)] if used]
+        usecols = None if columns is None else list(dict.fromkeys(list(columns) + filter_columns))
+        df = _filter_csv(pd.read_csv(path, usecols=usecols), banks, start_date, end_date)
+        return df if columns is None else df[list(columns)]
+    dataset = _open_dataset(path)
+    table = dataset.to_table(columns=_dataset_columns(dataset, columns),
+                             filter=_filter_expression(banks, start_date, end_date))
+    return _arrow_to_pandas(table)
+
+# Yield DataFrames of about chunk_size rows without loading the whole file or dataset.
+# The order is stable between runs, so row counts can be used as a resume checkpoint.
+def iter_review_chunks(path, chunk_size, columns=None, banks=None, start_date=None, end_date=None,
+                       optional_columns=()):
+    columns = _with_optional(path, columns, optional_columns)
+    if not is_dataset(path):
+        for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=columns):
+            yield _filter_csv(chunk, banks, start_date, end_date)
+        return
+    dataset = _open_dataset(path)
+    scanner = dataset.scanner(columns=_dataset_columns(dataset, columns),
+                              filter=_filter_expression(banks, start_date, end_date), batch_size=chunk_size)
+    buffered = []
+    buffered_rows = 0
+    for batch in scanner.to_batches():
+        buffered.append(batch)
+        buffered_rows += batch.num_rows
+        if buffered_rows >= chunk_size:
+            yield _arrow_to_pandas(pa.Table.from_batches(buffered))
+            buffered, buffered_rows = [], 0
+    if buffered_rows:
+        yield _arrow_to_pandas(pa.Table.from_batches(buffered))
+
+
+# --- Format Comparison ---
+def size_on_disk(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, '**', '*'), recursive=True) if os.path.isfile(f))
+    return os.path.getsize(path)
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+# Write `df` as CSV and as a Parquet dataset, then time a full read and a narrow read
+# (two columns, one bank, last 90 days) of each
+def compare_formats(df, csv_path, dataset_path, columns=('rating', 'sentiment_label')):
+    bank = df['bank'].mode().iloc[0]
+    end_date = pd.to_datetime(df['date']).max()
+    start_date = end_date - pd.Timedelta(days=90)
+    results = []
+    for fmt, path in [('csv', csv_path), ('parquet', dataset_path)]:
+        _, write_seconds = _timed(lambda: write_reviews(df, path))
+        full, full_seconds = _timed(lambda: read_reviews(path))
+        narrow, narrow_seconds = _timed(lambda: read_reviews(path, columns=list(columns), banks=[bank],
+                                                             start_date=start_date, end_date=end_date))
+        results.append({
+            'format': fmt, 'bytes': size_on_disk(path), 'write_s': write_seconds,
+            'read_all_s': full_seconds, 'read_narrow_s': narrow_seconds, 'rows': len(full), 'narrow_rows': len(narrow),
+        })
+    return pd.DataFrame(results).set_index('format')
+
+# One-time CSV -> Parquet conversion of the raw and analyzed files. The CSVs are kept, but once a
+# dataset exists it is the copy every script reads and writes.
+def convert_csv_files():
+    for csv_path, dataset_path in [(RAW_CSV_PATH, RAW_DATASET_PATH), (ANALYZED_CSV_PATH, ANALYZED_DATASET_PATH)]:
+        if os.path.exists(dataset_path):
+            print(f"{dataset_path} already exists; skipping {csv_path}.")
+        elif not os.path.exists(csv_path):
+            print(f"{csv_path} not found; nothing to convert.")
+        else:
+            df = pd.read_csv(csv_path)
+            write_reviews(df, dataset_path)
+            print(f"Converted {csv_path} ({len(df)} rows) to {dataset_path}.")
+
+def main():
+    source = ANALYZED_CSV_PATH if os.path.exists(ANALYZED_CSV_PATH) else RAW_CSV_PATH
+    df = pd.read_csv(source)
+    repeats = max(1, -(-COMPARE_MIN_ROWS // len(df)))
+    df = pd.concat([df] * repeats, ignore_index=True)
+    print(f"Comparing CSV and Parquet using {len(df)} rows ({source} repeated {repeats}x)...")
+    results = compare_formats(df, os.path.join('.cache', 'format_compare.csv'),
+                              os.path.join('.cache', 'format_compare.parquet'))
+    pd.set_option('display.float_format', lambda v: f"{v:.4f}")
+    print(results)
+    csv, parquet = results.loc['csv'], results.loc['parquet']
+    print(f"CSV/Parquet ratios - size: {csv['bytes'] / parquet['bytes']:.1f}x, write time: "
+          f"{csv['write_s'] / parquet['write_s']:.1f}x, full read: {csv['read_all_s'] / parquet['read_all_s']:.1f}x, "
+          f"narrow read: {csv['read_narrow_s'] / parquet['read_narrow_s']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CSV and Parquet intermediates, or convert the CSVs.")
+    parser.add_argument('--convert', action='store_true',
+                        help="Convert the raw and analyzed CSVs to Parquet datasets (used from then on)")
+    args = parser.parse_args()
+    if args.convert:
+        convert_csv_files()
+    else:
+        os.makedirs('.cache', exist_ok=True)
+        main()
@@ -0,0 +1,172 @@
+import pandas as pd
+
+from theme_matcher import split_theme_label
+
+# --- Daily Rollup Settings ---
+# Review_Daily_Rollup holds one row per bank x day x rating x sentiment_label x identified_themes with
+# the review count and the sums of sentiment scores and ratings. The loader keeps it current inside
+# the same transaction as each chunk, so trend queries read a few thousand rollup rows instead of
+# scanning Reviews. identified_themes is the stored label (e.g. "Customer Support, Feature Requests"),
+# so every review is counted exactly once; per-theme views split the labels after reading.
+ROLLUP_TABLE = 'Review_Daily_Rollup'
+ROLLUP_KEY_COLUMNS = ['bank_id', 'review_day', 'rating', 'sentiment_label', 'identified_themes']
+ROLLUP_VALUE_COLUMNS = ['review_count', 'score_sum', 'rating_sum']
+MISSING_VALUE = 'unknown' # Stands in for a NULL label/theme, so the rollup key never contains NULL
+SCORE_DECIMALS = 4 # SENTIMENT_SCORE is NUMBER(5,4); deltas use the value as stored
+NEGATIVE_LABEL = 'negative'
+# Column order of the loader's Reviews bind rows (see insert_data_to_oracle.prepare_review_rows)
+REVIEW_ROW_COLUMNS = ['bank_id', 'review_text', 'rating', 'review_date', 'source',
+                      'sentiment_label', 'sentiment_score', 'identified_themes', 'theme_mask', 'review_key']
+
+
+# --- Incremental Maintenance ---
+# Per-review rollup contributions (one row per review) from rows shaped like the Reviews table
+def _contributions(df, sign):
+    dates = pd.to_datetime(df['review_date'], errors='coerce')
+    return pd.DataFrame({
+        'bank_id': df['bank_id'].astype('int64'),
+        'review_day': dates.dt.normalize(),
+        'rating': df['rating'].astype('int64'),
+        'sentiment_label': df['sentiment_label'].fillna(MISSING_VALUE).astype(str),
+        'identified_themes': df['identified_themes'].fillna(MISSING_VALUE).astype(str),
+        'review_count': sign,
+        'score_sum': sign * pd.to_numeric(df['sentiment_score'], errors='coerce').fillna(0.0).round(SCORE_DECIMALS),
+        'rating_sum': sign * df['rating'].astype('int64'),
+    })
+
+# Reviews rows already stored under the given keys (read before a MERGE overwrites them)
+def fetch_existing_reviews(cursor, backend, keys):
+    columns = ['review_key', 'bank_id', 'rating', 'review_date', 'sentiment_label', 'sentiment_score', 'identified_themes',
+               'theme_mask']
+    rows = []
+    limit = backend.in_list_limit
+    for start in range(0, len(keys), limit):
+        chunk = keys[start:start + limit]
+        cursor.execute(f"SELECT {', '.join(columns)} FROM Reviews WHERE review_key IN ({backend.placeholders(len(chunk))})",
+                       chunk)
+        rows.extend(cursor.fetchall())
+    return pd.DataFrame(rows, columns=columns)
+
+# Net change to the rollup from writing `rows` (prepared Reviews bind rows) over `existing` (the rows
+# those keys held before; None for plain inserts). Rows refused by the database (batch_errors offsets)
+# change nothing. Unchanged reviews cancel out, so a reload of the same data yields no delta.
+def rollup_delta(rows, existing=None, batch_errors=()):
+    written = pd.DataFrame(rows, columns=REVIEW_ROW_COLUMNS)
+    refused = [offset for offset, _ in batch_errors]
+    if refused:
+        written = written.drop(index=refused)
+    parts = [_contributions(written, 1)]
+    if existing is not None and len(existing):
+        existing = existing[existing['review_key'].isin(written['review_key'])]
+        parts.append(_contributions(existing, -1))
+    delta = pd.concat(parts).groupby(ROLLUP_KEY_COLUMNS, as_index=False)[ROLLUP_VALUE_COLUMNS].sum()
+    delta['score_sum'] = delta['score_sum'].round(SCORE_DECIMALS)
+    changed = (delta['review_count'] != 0) | (delta['score_sum'] != 0) | (delta['rating_sum'] != 0)
+    return delta[changed]
+
+# Add a delta to the rollup table through the backend's upsert; the caller commits
+def apply_rollup_delta(cursor, backend, delta):
+    if delta.empty:
+        return 0
+    rows = [
+        (int(bank_id), backend.day_value(review_day), int(rating), label, themes, int(count), float(score_sum), int(rating_sum))
+        for bank_id, review_day, rating, label, themes, count, score_sum, rating_sum
+        in delta[ROLLUP_KEY_COLUMNS + ROLLUP_VALUE_COLUMNS].itertuples(index=False, name=None)
+    ]
+    backend.upsert_rollup(cursor, rows)
+    if (delta['review_count'] < 0).any():
+        cursor.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE review_count = 0")
+    return len(rows)
+
+# Recompute the whole rollup from Reviews (first use on an existing database, or to repair drift)
+def rebuild_rollup(connection, backend):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        cursor.execute(backend.REBUILD_ROLLUP_SQL)
+        connection.commit()
+        cursor.execute(f"SELECT COUNT(*), SUM(review_count) FROM {ROLLUP_TABLE}")
+        groups, reviews = cursor.fetchone()
+        print(f"Rebuilt {ROLLUP_TABLE}: {groups} rows covering {reviews or 0} reviews.")
+    finally:
+        cursor.close()
+
+
+# Build the rollup once for a database that already held reviews before the rollup existed
+def ensure_rollup(connection, backend):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(bank_id) FROM {ROLLUP_TABLE}")
+        has_rollup = cursor.fetchone()[0] is not None
+        cursor.execute("SELECT MIN(review_id) FROM Reviews")
+        has_reviews = cursor.fetchone()[0] is not None
+    finally:
+        cursor.close()
+    if has_reviews and not has_rollup:
+        print(f"{ROLLUP_TABLE} is empty; building it from the existing reviews...")
+        rebuild_rollup(connection, backend)
+
+
+# --- Trend Queries (read the rollup only) ---
+def load_daily_rollup(connection, backend, since=None):
+    sql = f"""SELECT b.bank_name, r.review_day, r.rating, r.sentiment_label, r.identified_themes,
+               r.review_count, r.score_sum, r.rating_sum
+        FROM {ROLLUP_TABLE} r JOIN Banks b ON b.bank_id = r.bank_id"""
+    params = {}
+    if since is not None:
+        sql += " WHERE r.review_day >= :since"
+        params['since'] = backend.day_value(pd.Timestamp(since))
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        daily = pd.DataFrame(cursor.fetchall(), columns=[
+            'bank', 'day', 'rating', 'sentiment_label', 'identified_themes', 'review_count', 'score_sum', 'rating_sum'
+        ])
+    finally:
+        cursor.close()
+    daily['day'] = pd.to_datetime(daily['day'])
+    daily[['score_sum']] = daily[['score_sum']].astype(float)
+    return daily
+
+# Per bank and calendar day (days without reviews included): review count, share of positive reviews
+# and mean sentiment score over trailing windows of each length in `windows` days
+def rolling_sentiment(daily, windows=(7, 30), positive_label='positive'):
+    if daily.empty:
+        return pd.DataFrame()
+    per_day = daily.assign(positive=daily['review_count'].where(daily['sentiment_label'] == positive_label, 0))
+    per_day = per_day.groupby(['bank', 'day'])[['review_count', 'positive', 'score_sum']].sum()
+    frames = []
+    for bank, group in per_day.groupby(level='bank'):
+        group = group.droplevel('bank')
+        group = group.reindex(pd.date_range(group.index.min(), group.index.max(), freq='D'), fill_value=0)
+        result = pd.DataFrame({'reviews': group['review_count']}, index=group.index)
+        for window in windows:
+            totals = group.rolling(window, min_periods=1).sum()
+            reviews = totals['review_count'].where(totals['review_count'] > 0)
+            result[f'positive_share_{window}d'] = totals['positive'] / reviews
+            result[f'mean_score_{window}d'] = totals['score_sum'] / reviews
+        frames.append(result.assign(bank=bank))
+    return pd.concat(frames).rename_axis('day').reset_index().set_index(['bank', 'day'])
+
+# Negative reviews per bank, theme and week (weeks start on Monday) with the change from the week before.
+# Multi-theme labels are split, so a review counts once towards each of its themes.
+def week_over_week_pain_points(daily, negative_label=NEGATIVE_LABEL):
+    negatives = daily[daily['sentiment_label'] == negative_label]
+    if negatives.empty:
+        return pd.DataFrame(columns=['bank', 'theme', 'week', 'negative_reviews', 'previous_week', 'delta'])
+    negatives = negatives.assign(
+        theme=negatives['identified_themes'].map(lambda label: split_theme_label(label) or [label]),
+        week=negatives['day'].dt.to_period('W-SUN').dt.start_time
+    ).explode('theme')
+    weekly = negatives.groupby(['bank', 'theme', 'week'])['review_count'].sum()
+    frames = []
+    for (bank, theme), group in weekly.groupby(level=['bank', 'theme']):
+        group = group.droplevel(['bank', 'theme'])
+        group = group.reindex(pd.date_range(group.index.min(), group.index.max(), freq='W-MON'), fill_value=0)
+        frames.append(pd.DataFrame({
+            'bank': bank, 'theme': theme, 'week': group.index,
+            'negative_reviews': group.to_numpy(), 'previous_week': group.shift(1, fill_value=0).to_numpy(),
+        }))
+    result = pd.concat(frames, ignore_index=True)
+    result['delta'] = result['negative_reviews'] - result['previous_week']
+    return result
@@ -28,7 +28,9 @@
 	"SOURCE" VARCHAR2(50 BYTE), 
 	"SENTIMENT_LABEL" VARCHAR2(20 BYTE), 
 	"SENTIMENT_SCORE" NUMBER(5,4), 
-	"IDENTIFIED_THEMES" VARCHAR2(255 BYTE)
+	"IDENTIFIED_THEMES" VARCHAR2(255 BYTE), 
+	"THEME_MASK" NUMBER(19,0), 
+	"REVIEW_KEY" VARCHAR2(64 BYTE)
    ) SEGMENT CREATION IMMEDIATE 
   PCTFREE 10 PCTUSED 40 INITRANS 1 MAXTRANS 255 
  NOCOMPRESS LOGGING
@@ -43,6 +45,82 @@
   PCTINCREASE 0
   BUFFER_POOL DEFAULT FLASH_CACHE DEFAULT CELL_FLASH_CACHE DEFAULT)) ;
 --------------------------------------------------------
+--  DDL for Table REVIEWS_STAGE
+--  (per-session staging area for MERGE loads; emptied on commit)
+--------------------------------------------------------
+
+  CREATE GLOBAL TEMPORARY TABLE "BANK_REVIEWS_USER"."REVIEWS_STAGE" 
+   (	"BANK_ID" NUMBER, 
+	"REVIEW_TEXT" CLOB, 
+	"RATING" NUMBER(1,0), 
+	"REVIEW_DATE" DATE, 
+	"SOURCE" VARCHAR2(50 BYTE), 
+	"SENTIMENT_LABEL" VARCHAR2(20 BYTE), 
+	"SENTIMENT_SCORE" NUMBER(5,4), 
+	"IDENTIFIED_THEMES" VARCHAR2(255 BYTE), 
+	"THEME_MASK" NUMBER(19,0), 
+	"REVIEW_KEY" VARCHAR2(64 BYTE)
+   ) ON COMMIT DELETE ROWS ;
+--------------------------------------------------------
+--  DDL for Table REVIEW_DAILY_ROLLUP
+--  (bank x day x rating x sentiment x themes counts and sums, kept current by the loader;
+--   see rollups.py)
+--------------------------------------------------------
+
+  CREATE TABLE "BANK_REVIEWS_USER"."REVIEW_DAILY_ROLLUP" 
+   (	"BANK_ID" NUMBER NOT NULL ENABLE, 
+	"REVIEW_DAY" DATE NOT NULL ENABLE, 
+	"RATING" NUMBER(1,0) NOT NULL ENABLE, 
+	"SENTIMENT_LABEL" VARCHAR2(20 BYTE) NOT NULL ENABLE, 
+	"IDENTIFIED_THEMES" VARCHAR2(255 BYTE) NOT NULL ENABLE, 
+	"REVIEW_COUNT" NUMBER NOT NULL ENABLE, 
+	"SCORE_SUM" NUMBER NOT NULL ENABLE, 
+	"RATING_SUM" NUMBER NOT NULL ENABLE, 
+	 CONSTRAINT "PK_REVIEW_DAILY_ROLLUP" PRIMARY KEY ("BANK_ID", "REVIEW_DAY", "RATING", "SENTIMENT_LABEL", "IDENTIFIED_THEMES")
+	 USING INDEX TABLESPACE "USERS" ENABLE, 
+	 FOREIGN KEY ("BANK_ID") REFERENCES "BANK_REVIEWS_USER"."BANKS" ("BANK_ID") ENABLE
+   ) SEGMENT CREATION IMMEDIATE 
+  PCTFREE 10 PCTUSED 40 INITRANS 1 MAXTRANS 255 
+ NOCOMPRESS LOGGING
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Table THEMES
+--  (THEME_ID is the theme's bit in REVIEWS.THEME_MASK: a review has the theme when
+--   BITAND(THEME_MASK, POWER(2, THEME_ID)) > 0; at most 63 themes)
+--------------------------------------------------------
+
+  CREATE TABLE "BANK_REVIEWS_USER"."THEMES" 
+   (	"THEME_ID" NUMBER(2,0) NOT NULL ENABLE, 
+	"THEME_NAME" VARCHAR2(100 BYTE) NOT NULL ENABLE, 
+	 CONSTRAINT "PK_THEMES" PRIMARY KEY ("THEME_ID")
+	 USING INDEX TABLESPACE "USERS" ENABLE, 
+	 CONSTRAINT "UQ_THEMES_THEME_NAME" UNIQUE ("THEME_NAME")
+	 USING INDEX TABLESPACE "USERS" ENABLE, 
+	 CONSTRAINT "CK_THEMES_THEME_ID" CHECK ("THEME_ID" BETWEEN 0 AND 62) ENABLE
+   ) SEGMENT CREATION IMMEDIATE 
+  PCTFREE 10 PCTUSED 40 INITRANS 1 MAXTRANS 255 
+ NOCOMPRESS LOGGING
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Table REVIEW_THEMES
+--  (one row per review and theme, kept in step with THEME_MASK by the loader)
+--------------------------------------------------------
+
+  CREATE TABLE "BANK_REVIEWS_USER"."REVIEW_THEMES" 
+   (	"REVIEW_ID" NUMBER NOT NULL ENABLE, 
+	"THEME_ID" NUMBER(2,0) NOT NULL ENABLE, 
+	 CONSTRAINT "PK_REVIEW_THEMES" PRIMARY KEY ("REVIEW_ID", "THEME_ID") ENABLE, 
+	 FOREIGN KEY ("REVIEW_ID") REFERENCES "BANK_REVIEWS_USER"."REVIEWS" ("REVIEW_ID") ON DELETE CASCADE ENABLE, 
+	 FOREIGN KEY ("THEME_ID") REFERENCES "BANK_REVIEWS_USER"."THEMES" ("THEME_ID") ENABLE
+   ) ORGANIZATION INDEX 
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Index IDX_REVIEW_THEMES_THEME_ID
+--------------------------------------------------------
+
+  CREATE INDEX "BANK_REVIEWS_USER"."IDX_REVIEW_THEMES_THEME_ID" ON "BANK_REVIEWS_USER"."REVIEW_THEMES" ("THEME_ID", "REVIEW_ID") 
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
 --  DDL for Index SYS_C008222
 --------------------------------------------------------
 
@@ -73,6 +151,43 @@
   BUFFER_POOL DEFAULT FLASH_CACHE DEFAULT CELL_FLASH_CACHE DEFAULT)
   TABLESPACE "USERS" ;
 --------------------------------------------------------
+--  DDL for Index IDX_REVIEWS_REVIEW_KEY
+--------------------------------------------------------
+
+  CREATE UNIQUE INDEX "BANK_REVIEWS_USER"."IDX_REVIEWS_REVIEW_KEY" ON "BANK_REVIEWS_USER"."REVIEWS" ("REVIEW_KEY") 
+  PCTFREE 10 INITRANS 2 MAXTRANS 255 
+  STORAGE(INITIAL 65536 NEXT 1048576 MINEXTENTS 1 MAXEXTENTS 2147483645
+  PCTINCREASE 0 FREELISTS 1 FREELIST GROUPS 1
+  BUFFER_POOL DEFAULT FLASH_CACHE DEFAULT CELL_FLASH_CACHE DEFAULT)
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Index IDX_REVIEWS_REVIEW_DATE
+--  (date-range drill-downs from the trend views)
+--------------------------------------------------------
+
+  CREATE INDEX "BANK_REVIEWS_USER"."IDX_REVIEWS_REVIEW_DATE" ON "BANK_REVIEWS_USER"."REVIEWS" ("REVIEW_DATE") 
+  PCTFREE 10 INITRANS 2 MAXTRANS 255 COMPUTE STATISTICS 
+  STORAGE(INITIAL 65536 NEXT 1048576 MINEXTENTS 1 MAXEXTENTS 2147483645
+  PCTINCREASE 0 FREELISTS 1 FREELIST GROUPS 1
+  BUFFER_POOL DEFAULT FLASH_CACHE DEFAULT CELL_FLASH_CACHE DEFAULT)
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Index IDX_REVIEWS_BANK_SENTIMENT
+--------------------------------------------------------
+
+  CREATE INDEX "BANK_REVIEWS_USER"."IDX_REVIEWS_BANK_SENTIMENT" ON "BANK_REVIEWS_USER"."REVIEWS" ("BANK_ID", "SENTIMENT_LABEL") 
+  PCTFREE 10 INITRANS 2 MAXTRANS 255 COMPUTE STATISTICS 
+  STORAGE(INITIAL 65536 NEXT 1048576 MINEXTENTS 1 MAXEXTENTS 2147483645
+  PCTINCREASE 0 FREELISTS 1 FREELIST GROUPS 1
+  BUFFER_POOL DEFAULT FLASH_CACHE DEFAULT CELL_FLASH_CACHE DEFAULT)
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
+--  DDL for Index IDX_ROLLUP_REVIEW_DAY
+--------------------------------------------------------
+
+  CREATE INDEX "BANK_REVIEWS_USER"."IDX_ROLLUP_REVIEW_DAY" ON "BANK_REVIEWS_USER"."REVIEW_DAILY_ROLLUP" ("REVIEW_DAY") 
+  TABLESPACE "USERS" ;
+--------------------------------------------------------
 --  DDL for Index SYS_C008230
 --------------------------------------------------------
 
@@ -122,3 +237,25 @@
 
   ALTER TABLE "BANK_REVIEWS_USER"."REVIEWS" ADD FOREIGN KEY ("BANK_ID")
 	  REFERENCES "BANK_REVIEWS_USER"."BANKS" ("BANK_ID") ENABLE;
+--------------------------------------------------------
+--  Migration for databases created before REVIEW_KEY
+--  (rows loaded earlier keep a NULL key; truncate REVIEWS and reload once to key them)
+--------------------------------------------------------
+
+--  ALTER TABLE "BANK_REVIEWS_USER"."REVIEWS" ADD ("REVIEW_KEY" VARCHAR2(64 BYTE));
+--  then run the REVIEWS_STAGE and IDX_REVIEWS_REVIEW_KEY statements above.
+--------------------------------------------------------
+--  Migration for databases created before REVIEW_DAILY_ROLLUP
+--------------------------------------------------------
+
+--  Run the REVIEW_DAILY_ROLLUP, IDX_REVIEWS_REVIEW_DATE, IDX_REVIEWS_BANK_SENTIMENT and
+--  IDX_ROLLUP_REVIEW_DAY statements above. The next insert_data_to_oracle.py run fills the empty
+--  rollup from REVIEWS (or run: python insert_data_to_oracle.py --rebuild-rollup).
+--------------------------------------------------------
+--  Migration for databases created before THEME_MASK / THEMES
+--------------------------------------------------------
+
+--  ALTER TABLE "BANK_REVIEWS_USER"."REVIEWS" ADD ("THEME_MASK" NUMBER(19,0));
+--  then drop and re-create REVIEWS_STAGE and run the THEMES, REVIEW_THEMES and
+--  IDX_REVIEW_THEMES_THEME_ID statements above. Fill the masks and the bridge table for the rows
+--  already loaded with: python insert_data_to_oracle.py --backfill-themes
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib import error as urlerror
+from urllib import request as urlrequest
+
+# --- Scoring Service Settings ---
+# The worker loads distilbert and spaCy once and then scores batches sent over local HTTP.
+SERVICE_HOST = os.environ.get('BANK_REVIEWS_SERVICE_HOST', '127.0.0.1') # Local only: there is no authentication
+SERVICE_PORT = int(os.environ.get('BANK_REVIEWS_SERVICE_PORT', 8765))
+SERVICE_URL = f"http://{SERVICE_HOST}:{SERVICE_PORT}"
+CLIENT_TIMEOUT_SECONDS = 600 # Large batches on a busy worker can take minutes
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+STEPS = ['sentiment', 'processed_review', 'identified_themes']
+BENCH_INPUT_PATH = 'bank_app_reviews_analyzed.csv'
+
+
+# --- Server ---
+# Warm models plus request counters. Imports analyze_reviews (and through it the models) only here,
+# so the client side of this module stays lightweight.
+class ScoringWorker:
+    def __init__(self, use_cache=True):
+        started = time.perf_counter()
+        import analyze_reviews
+        from review_cache import ReviewCache
+        self.analyze = analyze_reviews
+        self.cache = None
+        if use_cache and analyze_reviews.USE_CACHE:
+            self.cache = ReviewCache(analyze_reviews.CACHE_PATH, max_entries=analyze_reviews.CACHE_MAX_ENTRIES)
+        analyze_reviews.get_sentiment_pipeline()
+        analyze_reviews.get_nlp()
+        self.cold_start_seconds = time.perf_counter() - started
+        self.started_at = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+
+    # Returns {column: list} for the requested steps, aligned with `reviews`. Star ratings (optional,
+    # aligned with `reviews`) let the sentiment triage answer more reviews without the model.
+    def score(self, reviews, steps, ratings=None):
+        import pandas as pd
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f"Unknown steps {unknown}; choose from {STEPS}")
+        started = time.perf_counter()
+        df = pd.DataFrame({'review': reviews})
+        if ratings is not None:
+            df['rating'] = ratings
+        result = {}
+        if 'sentiment' in steps:
+            df = self.analyze.add_sentiment_columns(df, self.cache)
+            result['sentiment_label'] = df['sentiment_label'].tolist()
+            result['sentiment_score'] = [float(score) for score in df['sentiment_score']]
+        if 'processed_review' in steps:
+            df = self.analyze.add_processed_review_column(df, self.cache, n_process=1) # No worker fork per request
+            result['processed_review'] = df['processed_review'].tolist()
+        if 'identified_themes' in steps:
+            result['identified_themes'] = self.analyze.theme_matcher.assign_themes(df['review']).tolist()
+        self.requests += 1
+        self.rows += len(reviews)
+        self.busy_seconds += time.perf_counter() - started
+        return result
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'sentiment_backend': self.analyze.SENTIMENT_BACKEND,
+            'cold_start_seconds': round(self.cold_start_seconds, 3),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'requests': self.requests,
+            'rows': self.rows,
+            'busy_seconds': round(self.busy_seconds, 3),
+        }
+
+def make_handler(worker):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, worker.health())
+            else:
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+        # POST /score {"reviews": [...], "steps": ["sentiment", ...], "ratings": [...] (optional)}
+        def do_POST(self):
+            if self.path != '/score':
+                self._send_json(404, {'error': f"Unknown path {self.path}"})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            if length > MAX_REQUEST_BYTES:
+                self._send_json(413, {'error': f"Request larger than {MAX_REQUEST_BYTES} bytes; send smaller batches"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length))
+                self._send_json(200, worker.score(payload['reviews'], payload.get('steps', STEPS), payload.get('ratings')))
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                print(f"Error scoring batch: {e}")
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            pass # The per-request access log is noise; scoring itself prints throughput
+
+    return ScoringHandler
+
+# Requests are handled one at a time: the models already use every core, so concurrent batches
+# would only compete for them. Clients queue on the socket instead.
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, use_cache=True):
+    print("Loading models...")
+    worker = ScoringWorker(use_cache)
+    server = HTTPServer((host, port), make_handler(worker))
+    print(f"Scoring service ready on http://{host}:{port} (cold start {worker.cold_start_seconds:.2f}s).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down scoring service.")
+    finally:
+        server.server_close()
+        if worker.cache is not None:
+            print(worker.cache.stats_summary())
+            worker.cache.close()
+
+
+# --- Client ---
+# Thin HTTP client used by analyze_reviews.py --service and pipeline.py --service; imports nothing heavy
+class ScoringClient:
+    def __init__(self, url=SERVICE_URL, timeout=CLIENT_TIMEOUT_SECONDS):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        req = urlrequest.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urlerror.HTTPError as e:
+            raise RuntimeError(f"Scoring service error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+        except urlerror.URLError as e:
+            raise RuntimeError(f"Scoring service not reachable at {self.url} ({e.reason}); "
+                               f"start it with: python scoring_service.py serve") from e
+
+    def health(self):
+        return self._request('/health')
+
+    def score(self, reviews, steps=STEPS, ratings=None):
+        # NaN/None reviews are sent as null and come back neutral / empty, as in analyze_reviews
+        reviews = [text if isinstance(text, str) else None for text in reviews]
+        payload = {'reviews': reviews, 'steps': list(steps)}
+        if ratings is not None:
+            import pandas as pd
+            payload['ratings'] = [None if pd.isna(rating) else int(rating) for rating in ratings]
+        return self._request('/score', payload)
+
+    def add_columns(self, df, steps=STEPS):
+        ratings = df['rating'] if 'rating' in df.columns else None
+        return df.assign(**self.score(df['review'], steps, ratings))
+
+
+# --- Cold vs Warm Latency ---
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+# One-shot scoring in a fresh process (what every analyze_reviews.py run used to pay); used by bench
+def score_once(batch_path):
+    with open(batch_path, encoding='utf-8') as f:
+        reviews = json.load(f)
+    ScoringWorker(use_cache=False).score(reviews, STEPS)
+
+# Cold: a new process imports, loads both models and scores one batch. Warm: the same batch size
+# sent to the running service. Texts get a unique suffix so the service cache can't answer them.
+def bench(url=SERVICE_URL, batch_size=32, requests=20, input_path=BENCH_INPUT_PATH):
+    import pandas as pd
+    texts = pd.read_csv(input_path, usecols=['review'])['review'].dropna().astype(str).tolist()
+    batch = texts[:batch_size]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(batch, f)
+        batch_path = f.name
+    try:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, __file__, 'score-once', batch_path], check=True, stdout=subprocess.DEVNULL)
+        cold_seconds = time.perf_counter() - started
+    finally:
+        os.remove(batch_path)
+
+    client = ScoringClient(url)
+    warm = []
+    for n in range(requests):
+        unique_batch = [f"{text} #{n}" for text in batch]
+        started = time.perf_counter()
+        client.score(unique_batch, STEPS)
+        warm.append(time.perf_counter() - started)
+
+    report = {
+        'batch_size': len(batch),
+        'cold_process_seconds': round(cold_seconds, 3),
+        'service_cold_start_seconds': client.health()['cold_start_seconds'],
+        'warm_p50_seconds': round(_percentile(warm, 0.5), 3),
+        'warm_p95_seconds': round(_percentile(warm, 0.95), 3),
+        'speedup_p50': round(cold_seconds / _percentile(warm, 0.5), 1),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident sentiment/theme scoring worker and its client.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="Load the models and serve batches over HTTP")
+    serve_parser.add_argument('--host', default=SERVICE_HOST)
+    serve_parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    serve_parser.add_argument('--no-cache', action='store_true', help="Don't use the on-disk result cache")
+    health_parser = commands.add_parser('health', help="Print the running service's status")
+    health_parser.add_argument('--url', default=SERVICE_URL)
+    bench_parser = commands.add_parser('bench', help="Compare cold-start and warm batch latency")
+    bench_parser.add_argument('--url', default=SERVICE_URL)
+    bench_parser.add_argument('--batch-size', type=int, default=32)
+    bench_parser.add_argument('--requests', type=int, default=20)
+    bench_parser.add_argument('--input', default=BENCH_INPUT_PATH)
+    once_parser = commands.add_parser('score-once', help=argparse.SUPPRESS)
+    once_parser.add_argument('batch_path')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port, use_cache=not args.no_cache)
+    elif args.command == 'health':
+        print(json.dumps(ScoringClient(args.url).health(), indent=2))
+    elif args.command == 'bench':
+        bench(args.url, args.batch_size, args.requests, args.input)
+    else:
+        score_once(args.batch_path)
@@ -1,6 +1,12 @@
 from google_play_scraper import Sort, reviews
 import pandas as pd
 import datetime
+import json
+import os
+
+import review_store
+from instrumentation import stage
+from near_duplicates import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD, NearDuplicateIndex
 
 # Define the app IDs for each bank
 # IMPORTANT: Replace these with the actual app IDs you find on the Play Store
@@ -10,92 +16,262 @@ app_ids = {
     "Dashen Bank": "com.dashen.dashensuperapppyr"       # Example ID, find actual
 }
 
-all_reviews = []
 min_reviews_per_bank = 400
+initial_reviews_per_app = min_reviews_per_bank + 100 # Cap for an app's first scrape (no watermark yet)
+page_size = 200 # Reviews requested per page; continuation tokens fetch the next page
+
+output_format = review_store.INTERMEDIATE_FORMAT # 'parquet' (dataset partitioned by bank and month) or 'csv'
+output_filename = review_store.raw_path(output_format)
+# Newest review seen per app (and country/lang), so later runs only fetch reviews newer than this
+watermark_filename = 'scrape_watermarks.json'
+default_lang = 'en'
+default_country = 'et'
+
+# Near-duplicate removal (MinHash LSH). The index keeps every saved review, so later scrapes are
+# checked against history as well as against each other.
+remove_near_duplicates = True
+near_duplicate_threshold = DEFAULT_THRESHOLD # Estimated Jaccard similarity of character shingles
+near_duplicate_index_path = DEFAULT_INDEX_PATH
+
+
+# --- Watermarks ---
+# The same app can be scraped for several country/lang combos, each with its own position
+def watermark_key(app_id, country=default_country, lang=default_lang):
+    return f"{app_id}:{country}:{lang}"
+
+def load_watermarks(path=watermark_filename):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_watermarks(watermarks, path=watermark_filename):
+    # Write to a temp file first so an interrupted run never leaves a half-written watermark file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# Watermark for a page of reviews sorted newest first: the newest timestamp plus the ids sharing it
+def watermark_for(new_reviews):
+    newest_at = max(r['at'] for r in new_reviews)
+    return {
+        'at': newest_at.isoformat(),
+        'review_ids': sorted(r['reviewId'] for r in new_reviews if r['at'] == newest_at)
+    }
+
+def is_already_ingested(review, watermark):
+    if watermark is None:
+        return False
+    watermark_at = datetime.datetime.fromisoformat(watermark['at'])
+    if review['at'] != watermark_at:
+        return review['at'] < watermark_at
+    return review['reviewId'] in watermark['review_ids']
 
-print("Starting review scraping...")
-
-for bank_name, app_id in app_ids.items():
-    print(f"\nScraping reviews for {bank_name} (App ID: {app_id})...")
-    try:
-        # You can adjust count to get more or fewer reviews.
-        # Use 'sort=Sort.NEWEST' to get the most recent reviews.
-        # Using 'count' directly can be tricky for exact numbers,
-        # as it might return less if there aren't enough or more if it hits a page limit.
-        # We'll aim for 400+ and then handle duplicates/missing later.
-        result, continuation_token = reviews(
+
+# --- Scraping ---
+# Follow continuation tokens page by page (newest first) until we reach a review at or before
+# the app's watermark, run out of pages, or collect max_reviews. Yields each page's new reviews.
+# `reviews_fn` defaults to google_play_scraper.reviews and can be replaced by a local fake
+# with the same signature.
+def iter_new_review_pages(app_id, watermark=None, lang=default_lang, country=default_country, max_reviews=None,
+                          reviews_fn=reviews, page_size=page_size):
+    collected = 0
+    continuation_token = None
+    while True:
+        count = page_size if max_reviews is None else min(page_size, max_reviews - collected)
+        result, continuation_token = reviews_fn(
             app_id,
-            lang='en',      # Language of reviews
-            country='et',   # Country (Ethiopia)
+            lang=lang,      # Language of reviews
+            country=country,   # Country (Ethiopia)
             sort=Sort.NEWEST, # Get newest reviews first
-            count=min_reviews_per_bank + 100 # Request a bit more to ensure we get enough after cleaning
+            count=count,
+            continuation_token=continuation_token
         )
 
-        # Process scraped reviews
+        page = []
+        reached_watermark = False
         for r in result:
-            all_reviews.append({
-                'review_text': r['content'],
-                'rating': r['score'],
-                'date': r['at'],
-                'bank_name': bank_name,
-                'source': 'Google Play Store'
-            })
-        print(f"Successfully scraped {len(result)} reviews for {bank_name}.")
+            if is_already_ingested(r, watermark):
+                reached_watermark = True
+                break
+            page.append(r)
+        # google_play_scraper takes count from the continuation token after the first page, so later
+        # pages come back full-sized; trim the last one to max_reviews here
+        if max_reviews is not None:
+            page = page[:max_reviews - collected]
+        collected += len(page)
+        yield page
+
+        if (reached_watermark or not result
+                or (max_reviews is not None and collected >= max_reviews)
+                or continuation_token is None or getattr(continuation_token, 'token', '') is None):
+            break
 
-    except Exception as e:
-        print(f"Error scraping reviews for {bank_name}: {e}")
-        print("Please ensure the App ID is correct and the app exists in the specified country/language.")
+# Collect every new review for an app; returns (reviews, pages fetched)
+def fetch_new_reviews(app_id, watermark=None, lang=default_lang, country=default_country, max_reviews=None,
+                      reviews_fn=reviews, page_size=page_size):
+    new_reviews = []
+    pages = 0
+    for page in iter_new_review_pages(app_id, watermark, lang, country, max_reviews, reviews_fn, page_size):
+        new_reviews.extend(page)
+        pages += 1
+    return new_reviews, pages
 
-# Convert to DataFrame
-df = pd.DataFrame(all_reviews)
+def to_rows(scraped_reviews, bank_name):
+    return [{
+        'review_text': r['content'],
+        'rating': r['score'],
+        'date': r['at'],
+        'bank_name': bank_name,
+        'source': 'Google Play Store',
+        'store_review_id': r['reviewId'] # Natural key for the loader (see insert_data_to_oracle.review_key)
+    } for r in scraped_reviews]
 
-print(f"\nTotal reviews scraped before preprocessing: {len(df)}")
 
 # --- Preprocessing ---
-print("\nStarting preprocessing...")
-
-# 1. Handle Duplicates
-# Drop rows where 'review_text' and 'bank_name' are identical, keeping the first occurrence.
-# We include 'bank_name' in the subset to avoid dropping reviews that might be identical
-# in text but refer to different banks (though unlikely for app reviews).
-initial_rows = len(df)
-df.drop_duplicates(subset=['review_text', 'bank_name'], inplace=True)
-print(f"Removed {initial_rows - len(df)} duplicate reviews.")
-
-# 2. Handle Missing Data
-# Check for missing values
-print("Missing values before handling:")
-print(df.isnull().sum())
-# Drop rows where 'review_text' or 'rating' is missing, as these are critical for analysis
-df.dropna(subset=['review_text', 'rating'], inplace=True)
-print("Missing values after handling (dropped rows with missing review_text or rating):")
-print(df.isnull().sum())
-
-
-# 3. Normalize Dates
-# Convert 'date' column to datetime objects, then format to YYYY-MM-DD
-df['date'] = pd.to_datetime(df['date'])
-df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-print("Dates normalized to YYYY-MM-DD format.")
-
-# Rename columns for clarity (as specified in the assignment)
-df = df.rename(columns={'review_text': 'review', 'bank_name': 'bank'})
-
-# Ensure minimum reviews per bank
-for bank_name in app_ids.keys():
-    bank_df = df[df['bank'] == bank_name]
-    if len(bank_df) < min_reviews_per_bank:
-        print(f"WARNING: Only {len(bank_df)} reviews collected for {bank_name}. Target was {min_reviews_per_bank}.")
+def preprocess_reviews(df, verbose=True, near_duplicates=None):
+    # 1. Handle Duplicates
+    # Drop rows where 'review_text' and 'bank_name' are identical, keeping the first occurrence.
+    # We include 'bank_name' in the subset to avoid dropping reviews that might be identical
+    # in text but refer to different banks (though unlikely for app reviews).
+    initial_rows = len(df)
+    df = df.drop_duplicates(subset=['review_text', 'bank_name'])
+    if verbose:
+        print(f"Removed {initial_rows - len(df)} duplicate reviews.")
+
+    # 2. Handle Missing Data
+    # Check for missing values
+    if verbose:
+        print("Missing values before handling:")
+        print(df.isnull().sum())
+    # Drop rows where 'review_text' or 'rating' is missing, as these are critical for analysis
+    df = df.dropna(subset=['review_text', 'rating'])
+    if verbose:
+        print("Missing values after handling (dropped rows with missing review_text or rating):")
+        print(df.isnull().sum())
+
+    # Near duplicates (copy-paste and spam bursts with small edits), checked against the index's history
+    if near_duplicates is not None and len(df):
+        initial_rows = len(df)
+        df = df[~near_duplicates.find_and_add(df['review_text'], df['bank_name'])]
+        if verbose:
+            print(f"Removed {initial_rows - len(df)} near-duplicate reviews "
+                  f"(similarity >= {near_duplicates.threshold}).")
+
+    # 3. Normalize Dates
+    # Convert 'date' column to datetime objects, then format to YYYY-MM-DD
+    df['date'] = pd.to_datetime(df['date'])
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    if verbose:
+        print("Dates normalized to YYYY-MM-DD format.")
+
+    # Rename columns for clarity (as specified in the assignment)
+    return df.rename(columns={'review_text': 'review', 'bank_name': 'bank'})
+
+
+# Near-duplicate index for this run (None when disabled). Changes stay uncommitted until the reviews are saved.
+def open_near_duplicate_index(full_refresh):
+    if not remove_near_duplicates:
+        return None
+    near_duplicates = NearDuplicateIndex(near_duplicate_index_path, threshold=near_duplicate_threshold)
+    if full_refresh:
+        near_duplicates.reset() # The review files are rebuilt, so history starts over too
+    return near_duplicates
+
+
+# Load watermarks and decide whether this run rebuilds the CSV or appends to it
+def load_scrape_state():
+    watermarks = load_watermarks()
+    # Without any watermarks (first run) the CSV is rebuilt; afterwards only new rows are appended
+    full_refresh = not watermarks or not os.path.exists(output_filename)
+    if full_refresh:
+        watermarks = {}
+    return watermarks, full_refresh
+
+
+# Clean the scraped rows, write/append them to the CSV and advance the watermarks
+def save_scraped_reviews(all_reviews, watermarks, new_watermarks, full_refresh, bank_names):
+    # Convert to DataFrame
+    df = pd.DataFrame(all_reviews, columns=['review_text', 'rating', 'date', 'bank_name', 'source', 'store_review_id'])
+
+    print(f"\nTotal reviews scraped before preprocessing: {len(df)}")
+    if df.empty:
+        print("No new reviews since the last run; nothing to save.")
+        return
+
+    # --- Preprocessing ---
+    print("\nStarting preprocessing...")
+    near_duplicates = open_near_duplicate_index(full_refresh)
+    with stage('preprocess', rows_in=len(df)) as record:
+        df = preprocess_reviews(df, near_duplicates=near_duplicates)
+        record.rows_out = len(df)
+
+    # Ensure minimum reviews per bank
+    if full_refresh:
+        for bank_name in bank_names:
+            bank_df = df[df['bank'] == bank_name]
+            if len(bank_df) < min_reviews_per_bank:
+                print(f"WARNING: Only {len(bank_df)} reviews collected for {bank_name}. Target was {min_reviews_per_bank}.")
+            else:
+                print(f"Collected {len(bank_df)} reviews for {bank_name} (target met).")
+
+    print(f"\nTotal unique and cleaned reviews: {len(df)}")
+    print("First 5 rows of the cleaned data:")
+    print(df.head())
+    print("\nData types:")
+    print(df.info())
+
+    # Save (append only the new rows once the file or dataset exists)
+    with stage('save', rows_in=len(df)) as record:
+        review_store.write_reviews(df, output_filename, append=not full_refresh)
+        record.rows_out = len(df)
+    if near_duplicates is not None:
+        # Committed only now: if anything above failed, the unsaved reviews never become history
+        near_duplicates.commit()
+        print(near_duplicates.stats_summary())
+        near_duplicates.close()
+    if full_refresh:
+        print(f"\nCleaned data saved to {output_filename}")
     else:
-        print(f"Collected {len(bank_df)} reviews for {bank_name} (target met).")
-
-print(f"\nTotal unique and cleaned reviews: {len(df)}")
-print("First 5 rows of the cleaned data:")
-print(df.head())
-print("\nData types:")
-print(df.info())
-
-# Save to CSV
-output_filename = 'bank_app_reviews.csv'
-df.to_csv(output_filename, index=False, encoding='utf-8')
-print(f"\nCleaned data saved to {output_filename}")
\ No newline at end of file
+        print(f"\nAppended {len(df)} new reviews to {output_filename}")
+
+    # Only move watermarks forward once the rows they cover are safely on disk
+    watermarks.update(new_watermarks)
+    save_watermarks(watermarks)
+    print(f"Watermarks updated in {watermark_filename}")
+
+
+def main(reviews_fn=reviews):
+    watermarks, full_refresh = load_scrape_state()
+
+    all_reviews = []
+    new_watermarks = {}
+
+    print("Starting review scraping...")
+
+    for bank_name, app_id in app_ids.items():
+        key = watermark_key(app_id)
+        watermark = watermarks.get(key)
+        print(f"\nScraping reviews for {bank_name} (App ID: {app_id})...")
+        try:
+            # Apps scraped before only fetch what is newer than their watermark; new apps get
+            # an initial batch so there is enough to analyze after cleaning.
+            max_reviews = None if watermark else initial_reviews_per_app
+            with stage('scrape') as record:
+                result, pages = fetch_new_reviews(app_id, watermark, max_reviews=max_reviews, reviews_fn=reviews_fn)
+                record.rows_out = len(result)
+                record.extra.update({'bank': bank_name, 'pages': pages})
+            all_reviews.extend(to_rows(result, bank_name))
+            if result:
+                new_watermarks[key] = watermark_for(result)
+            print(f"Successfully scraped {len(result)} new reviews for {bank_name} in {pages} page(s).")
+
+        except Exception as e:
+            print(f"Error scraping reviews for {bank_name}: {e}")
+            print("Please ensure the App ID is correct and the app exists in the specified country/language.")
+
+    save_scraped_reviews(all_reviews, watermarks, new_watermarks, full_refresh, list(app_ids.keys()))
+
+if __name__ == "__main__":
+    main()
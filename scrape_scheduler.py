@@ -0,0 +1,150 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from google_play_scraper import reviews
+
+import scrape_reviews
+from scrape_reviews import (
+    fetch_new_reviews, load_scrape_state, save_scraped_reviews, to_rows, watermark_for, watermark_key
+)
+
+# --- Scheduler Settings ---
+APP_REGISTRY_PATH = 'app_registry.json'
+MAX_CONCURRENT_APPS = 8 # Apps scraped at the same time
+REQUESTS_PER_SECOND = 4.0 # Global page-request rate across all workers
+BURST_SIZE = 4 # Requests allowed back to back before the rate limit kicks in
+MAX_RETRIES = 4 # Retries per page request before the app is marked as failed
+BACKOFF_BASE_SECONDS = 1.0 # Retry n waits about BACKOFF_BASE_SECONDS * 2**n (with jitter)
+
+
+# Registry entries: {"bank_name", "app_id", optional "country", optional "lang"}
+def load_app_registry(path=APP_REGISTRY_PATH):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    for entry in entries:
+        entry.setdefault('country', scrape_reviews.default_country)
+        entry.setdefault('lang', scrape_reviews.default_lang)
+    return entries
+
+
+# Thread-safe token bucket shared by every worker: each page request takes one token
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Wrap a reviews()-style function so each page call is rate limited, retried with exponential
+# backoff, and counted in `stats`
+def make_page_fetcher(reviews_fn, bucket, stats, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS):
+    def fetch_page(app_id, **kwargs):
+        for attempt in range(max_retries + 1):
+            bucket.acquire()
+            request_start = time.perf_counter()
+            try:
+                page = reviews_fn(app_id, **kwargs)
+                stats['request_seconds'] += time.perf_counter() - request_start
+                return page
+            except Exception as e:
+                stats['request_seconds'] += time.perf_counter() - request_start
+                if attempt == max_retries:
+                    raise
+                stats['retries'] += 1
+                delay = backoff_base * (2 ** attempt) * (1 + random.random())
+                print(f"Retrying {app_id} in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+    return fetch_page
+
+
+def scrape_app(entry, watermark, reviews_fn, bucket):
+    stats = {'retries': 0, 'request_seconds': 0.0}
+    fetch_page = make_page_fetcher(reviews_fn, bucket, stats)
+    summary = {
+        'bank_name': entry['bank_name'], 'app_id': entry['app_id'],
+        'country': entry['country'], 'lang': entry['lang'],
+        'pages': 0, 'reviews': 0, 'error': None
+    }
+    started = time.perf_counter()
+    result = []
+    try:
+        max_reviews = None if watermark else scrape_reviews.initial_reviews_per_app
+        result, summary['pages'] = fetch_new_reviews(
+            entry['app_id'], watermark, lang=entry['lang'], country=entry['country'],
+            max_reviews=max_reviews, reviews_fn=fetch_page
+        )
+        summary['reviews'] = len(result)
+    except Exception as e:
+        summary['error'] = str(e)
+    summary['retries'] = stats['retries']
+    summary['seconds'] = time.perf_counter() - started
+    summary['avg_request_seconds'] = stats['request_seconds'] / max(summary['pages'] + stats['retries'], 1)
+    return result, summary
+
+
+def print_summary(summaries, elapsed):
+    print("\n--- Scrape Summary ---")
+    print(f"{'Bank':<30} {'App ID':<32} {'cc/lang':<8} {'Pages':>5} {'Reviews':>7} {'Retries':>7} {'Seconds':>8}  Status")
+    for s in sorted(summaries, key=lambda s: (s['bank_name'], s['country'], s['lang'])):
+        status = "ok" if s['error'] is None else f"FAILED: {s['error']}"
+        print(f"{s['bank_name'][:30]:<30} {s['app_id'][:32]:<32} {s['country'] + '/' + s['lang']:<8} "
+              f"{s['pages']:>5} {s['reviews']:>7} {s['retries']:>7} {s['seconds']:>8.2f}  {status}")
+    total_reviews = sum(s['reviews'] for s in summaries)
+    failed = sum(1 for s in summaries if s['error'] is not None)
+    print(f"Scraped {total_reviews} new reviews from {len(summaries)} app(s) in {elapsed:.2f}s ({failed} failed).")
+
+
+# Scrape every registry entry concurrently, then clean and save the new rows in one go.
+# Wall-clock time is bounded by the rate limit and max_workers rather than the number of apps.
+def run_scheduler(registry_path=APP_REGISTRY_PATH, max_workers=MAX_CONCURRENT_APPS,
+                  requests_per_second=REQUESTS_PER_SECOND, burst_size=BURST_SIZE, reviews_fn=reviews):
+    registry = load_app_registry(registry_path)
+    watermarks, full_refresh = load_scrape_state()
+    bucket = TokenBucket(requests_per_second, burst_size)
+
+    all_reviews = []
+    new_watermarks = {}
+    summaries = []
+
+    print(f"Scraping {len(registry)} app(s) with up to {max_workers} concurrent workers "
+          f"at {requests_per_second} requests/sec...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for entry in registry:
+            key = watermark_key(entry['app_id'], entry['country'], entry['lang'])
+            future = executor.submit(scrape_app, entry, watermarks.get(key), reviews_fn, bucket)
+            futures[future] = (entry, key)
+        for future in as_completed(futures):
+            entry, key = futures[future]
+            result, summary = future.result()
+            summaries.append(summary)
+            all_reviews.extend(to_rows(result, entry['bank_name']))
+            if result:
+                new_watermarks[key] = watermark_for(result)
+    print_summary(summaries, time.perf_counter() - started)
+
+    bank_names = list(dict.fromkeys(entry['bank_name'] for entry in registry))
+    save_scraped_reviews(all_reviews, watermarks, new_watermarks, full_refresh, bank_names)
+    return summaries
+
+
+if __name__ == "__main__":
+    run_scheduler()
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Sentiment Backend Settings ---
+# 'torch'      - the original fp32 PyTorch pipeline
+# 'torch_int8' - the same model with its Linear layers dynamically quantized to int8
+# 'onnx'       - the model exported to ONNX and run with ONNX Runtime
+# 'onnx_int8'  - the ONNX export with dynamically quantized int8 weights
+BACKENDS = ['torch', 'torch_int8', 'onnx', 'onnx_int8']
+ONNX_MODEL_DIR = os.path.join('.cache', 'onnx')
+ONNX_OPSET = 14
+PARITY_REFERENCE_PATH = 'bank_app_reviews_analyzed.csv' # Labels/scores written by the fp32 pipeline
+PARITY_MIN_LABEL_AGREEMENT = 0.99 # Share of reviews whose label must match the reference
+PARITY_MAX_SCORE_DIFF = 0.02 # Mean absolute score difference allowed against the reference
+LATENCY_SAMPLES = 50 # Single-review calls timed per backend for the latency percentiles
+
+
+# Cached results depend on the backend as well as the model, so non-default backends get their own key
+def cache_model_name(model_name, backend):
+    return model_name if backend == 'torch' else f"{model_name}@{backend}"
+
+def set_torch_threads(num_threads):
+    import torch
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+
+# --- PyTorch Backends ---
+def load_torch_pipeline(model_name, revision, num_threads=0, quantize=False):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    set_torch_threads(num_threads)
+    if not quantize:
+        return pipeline("sentiment-analysis", model=model_name, revision=revision, device=-1)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision).eval()
+    # Weights of every Linear layer become int8; activations are quantized on the fly per batch
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+
+
+# --- ONNX Runtime Backends ---
+def onnx_model_path(model_name, revision, quantize=False):
+    stem = f"{model_name.replace('/', '--')}-{revision}"
+    return os.path.join(ONNX_MODEL_DIR, stem + ('-int8' if quantize else '') + '.onnx')
+
+# Export the model once (and quantize it, if asked); later runs reuse the files under ONNX_MODEL_DIR
+def export_onnx_model(model_name, revision, quantize=False):
+    path = onnx_model_path(model_name, revision, quantize)
+    if os.path.exists(path):
+        return path
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    fp32_path = onnx_model_path(model_name, revision)
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        print(f"Exporting {model_name}@{revision} to ONNX ({fp32_path})...")
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision).eval()
+        sample = AutoTokenizer.from_pretrained(model_name, revision=revision)(["export sample"], return_tensors='pt')
+        with torch.no_grad():
+            torch.onnx.export(
+                model, (sample['input_ids'], sample['attention_mask']), fp32_path,
+                input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+                dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'},
+                              'attention_mask': {0: 'batch', 1: 'sequence'},
+                              'logits': {0: 'batch'}},
+                opset_version=ONNX_OPSET
+            )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        print(f"Quantizing {fp32_path} to int8 ({path})...")
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+    return path
+
+# Minimal stand-in for the transformers text-classification pipeline on top of an ONNX Runtime session:
+# same call signature and the same [{'label', 'score'}] results, so analyze_reviews can use either
+class OnnxSentimentPipeline:
+    def __init__(self, model_path, tokenizer, id2label, num_threads=0):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.tokenizer = tokenizer
+        self.id2label = id2label
+
+    def __call__(self, texts, batch_size=32, truncation=True, max_length=512):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        results = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=truncation,
+                                     max_length=max_length, return_tensors='np')
+            logits = self.session.run(None, {name: encoded[name].astype(np.int64) for name in self.input_names})[0]
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            for row in probabilities:
+                best = int(row.argmax())
+                results.append({'label': self.id2label[best], 'score': float(row[best])})
+        return results
+
+def load_onnx_pipeline(model_name, revision, num_threads=0, quantize=False):
+    from transformers import AutoConfig, AutoTokenizer
+    model_path = export_onnx_model(model_name, revision, quantize)
+    config = AutoConfig.from_pretrained(model_name, revision=revision)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    return OnnxSentimentPipeline(model_path, tokenizer, config.id2label, num_threads)
+
+
+# Build the sentiment pipeline for `backend`; num_threads = 0 keeps the library's default thread count
+def load_sentiment_pipeline(backend, model_name, revision, num_threads=0):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}; choose one of {BACKENDS}")
+    if backend.startswith('onnx'):
+        return load_onnx_pipeline(model_name, revision, num_threads, quantize=backend == 'onnx_int8')
+    return load_torch_pipeline(model_name, revision, num_threads, quantize=backend == 'torch_int8')
+
+
+# --- Parity and Speed Comparison ---
+# Score the reference reviews with one backend and compare against the fp32 labels/scores on disk
+def evaluate_backend(backend, reference, num_threads=0):
+    import analyze_reviews
+    started = time.perf_counter()
+    pipe = load_sentiment_pipeline(backend, analyze_reviews.SENTIMENT_MODEL, analyze_reviews.SENTIMENT_MODEL_REVISION,
+                                   num_threads)
+    load_seconds = time.perf_counter() - started
+
+    texts = reference['review'].tolist()
+    pipe(texts[:analyze_reviews.SENTIMENT_BATCH_SIZE]) # Warm-up (first call allocates buffers)
+    started = time.perf_counter()
+    labels, scores = analyze_reviews.get_sentiment_batched(texts, pipe=pipe)
+    batch_seconds = time.perf_counter() - started
+
+    sample = [text for text in texts if isinstance(text, str) and text.strip()][:LATENCY_SAMPLES]
+    latencies = []
+    for text in sample:
+        call_start = time.perf_counter()
+        pipe(text, truncation=True, max_length=analyze_reviews.SENTIMENT_MAX_LENGTH)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+
+    label_agreement = float(np.mean(np.array(labels) == reference['sentiment_label'].to_numpy()))
+    score_diff = np.abs(np.array(scores, dtype=float) - reference['sentiment_score'].to_numpy(dtype=float))
+    return {
+        'backend': backend,
+        'threads': num_threads or 'default',
+        'load_s': round(load_seconds, 2),
+        'reviews_per_s': round(len(texts) / batch_seconds, 1),
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)), 2) if latencies else None,
+        'label_agreement': round(label_agreement, 4),
+        'mean_score_diff': round(float(score_diff.mean()), 4),
+        'max_score_diff': round(float(score_diff.max()), 4),
+        'within_tolerance': bool(label_agreement >= PARITY_MIN_LABEL_AGREEMENT
+                                 and score_diff.mean() <= PARITY_MAX_SCORE_DIFF),
+    }
+
+def compare_backends(backends=BACKENDS, num_threads=0, reference_path=PARITY_REFERENCE_PATH):
+    reference = pd.read_csv(reference_path, usecols=['review', 'sentiment_label', 'sentiment_score'])
+    print(f"Comparing sentiment backends on {len(reference)} reviews from {reference_path}...")
+    results = []
+    for backend in backends:
+        try:
+            results.append(evaluate_backend(backend, reference, num_threads))
+        except ImportError as e:
+            print(f"Skipping {backend}: {e}")
+    if not results:
+        return results
+
+    table = pd.DataFrame(results).set_index('backend')
+    print(table.to_string())
+    passing = table[table['within_tolerance']]
+    if len(passing):
+        print(f"Fastest backend within tolerance: {passing['reviews_per_s'].idxmax()} "
+              f"(set SENTIMENT_BACKEND in analyze_reviews.py).")
+    else:
+        print("No backend is within tolerance of the reference.")
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check sentiment backends for parity and speed.")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--threads', type=int, default=0, help="Intra-op threads (0 = library default)")
+    parser.add_argument('--reference', default=PARITY_REFERENCE_PATH)
+    parser.add_argument('--output', help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+    comparison = compare_backends(args.backends, args.threads, args.reference)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,115 @@
+import re
+from functools import reduce
+import operator
+
+import pandas as pd
+
+# Common English endings accepted after a keyword ('crash' also matches 'crashes'/'crashed').
+# Keywords themselves are matched on word boundaries, so 'add' no longer matches 'address'.
+DEFAULT_INFLECTION_SUFFIXES = ('s', 'es', 'ed', 'd', 'ing')
+NO_THEME_LABEL = "Other"
+THEME_SEPARATOR = ", " # Between theme names in an identified_themes label
+
+
+def normalize_keyword(keyword):
+    return " ".join(str(keyword).lower().split())
+
+# Theme names in an identified_themes label; "Other" (and missing labels) mean no theme
+def split_theme_label(label):
+    if not isinstance(label, str) or label == NO_THEME_LABEL or not label.strip():
+        return []
+    return [name.strip() for name in label.split(THEME_SEPARATOR.strip()) if name.strip()]
+
+
+# Build a regex from a character trie of the keywords so alternatives sharing a prefix are
+# only tried once per position (the regex equivalent of an Aho-Corasick goto function).
+def _build_trie(keywords):
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True # End-of-keyword marker
+    return trie
+
+def _trie_to_pattern(node):
+    is_end = '' in node
+    branches = []
+    for char in sorted(k for k in node if k != ''):
+        char_pattern = r'\s+' if char == ' ' else re.escape(char) # 'sign in' also matches 'sign  in'
+        branches.append(char_pattern + _trie_to_pattern(node[char]))
+    if not branches:
+        return ''
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if is_end else pattern
+
+
+# Compiles a {theme: [keywords]} map once and matches it against whole review columns.
+# Each theme gets one bit (in theme_keywords order); a review's themes are the OR of the bits
+# of every keyword found in it.
+class ThemeMatcher:
+    def __init__(self, theme_keywords_map, inflection_suffixes=DEFAULT_INFLECTION_SUFFIXES):
+        self.themes = list(theme_keywords_map.keys())
+        self.theme_bits = {theme: 1 << i for i, theme in enumerate(self.themes)}
+
+        self.keyword_masks = {}
+        for theme, keywords in theme_keywords_map.items():
+            for keyword in keywords:
+                keyword = normalize_keyword(keyword)
+                if keyword:
+                    self.keyword_masks[keyword] = self.keyword_masks.get(keyword, 0) | self.theme_bits[theme]
+
+        # A match reports one keyword per start position (the longest), so a keyword also carries the
+        # bits of any shorter keyword it starts with ('send money' implies 'send' if both are keywords).
+        masks = dict(self.keyword_masks)
+        for keyword in self.keyword_masks:
+            words = keyword.split(' ')
+            for n in range(1, len(words)):
+                prefix = ' '.join(words[:n])
+                if prefix in self.keyword_masks:
+                    masks[keyword] |= self.keyword_masks[prefix]
+        self.keyword_masks = masks
+
+        suffix_pattern = ''
+        if inflection_suffixes:
+            suffix_pattern = '(?:' + '|'.join(re.escape(s) for s in sorted(inflection_suffixes, key=len, reverse=True)) + ')?'
+        # The lookahead makes matches zero-width, so keywords that overlap ('customer service' and
+        # 'service') are all found; the capture group holds the keyword without its suffix.
+        trie_pattern = _trie_to_pattern(_build_trie(self.keyword_masks)) if self.keyword_masks else '(?!)'
+        self.pattern = re.compile(rf'\b(?=({trie_pattern}){suffix_pattern}\b)', re.IGNORECASE)
+        self._label_cache = {}
+
+    # Matched keywords per review (normalized, without duplicates)
+    def match_keywords(self, texts):
+        texts = pd.Series(texts).fillna('').astype(str)
+        return texts.str.findall(self.pattern).map(lambda found: {normalize_keyword(k) for k in found})
+
+    # Theme bitmask per review; 0 means no theme matched
+    def theme_masks(self, texts):
+        keyword_masks = self.keyword_masks
+        masks = self.match_keywords(texts).map(
+            lambda found: reduce(operator.or_, (keyword_masks[k] for k in found), 0)
+        )
+        # Up to 63 themes fit in a native integer column; larger taxonomies keep Python ints
+        return masks.astype('int64') if len(self.themes) < 64 else masks
+
+    def themes_from_mask(self, mask):
+        return [theme for theme in self.themes if mask & self.theme_bits[theme]]
+
+    # Theme sets per review
+    def theme_sets(self, texts):
+        return self.theme_masks(texts).map(lambda mask: frozenset(self.themes_from_mask(mask)))
+
+    # Comma-joined theme names per review, in theme_keywords order ("Other" if none matched),
+    # i.e. the identified_themes column format
+    def assign_themes(self, texts):
+        return self.theme_masks(texts).map(self.label_for_mask)
+
+    def label_for_mask(self, mask):
+        mask = int(mask)
+        if mask not in self._label_cache:
+            themes = self.themes_from_mask(mask)
+            self._label_cache[mask] = THEME_SEPARATOR.join(themes) if themes else NO_THEME_LABEL
+        return self._label_cache[mask]
@@ -0,0 +1,117 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from keyword_extraction import HashedVocabulary
+
+# --- Topic Discovery Settings ---
+# Topics are learnt with mini-batch NMF over hashed TF-IDF features of processed_review, so the model
+# trains incrementally (partial_fit per chunk) with memory bounded by N_TOPICS x N_FEATURES (plus at
+# most one bucket name per feature in the hashed vocabulary), however many reviews it has seen. It
+# complements the hand-written theme_keywords: look at the topics of reviews still themed "Other" to
+# find what the keyword lists miss.
+TOPIC_MODEL_PATH = os.path.join('.cache', 'topic_model.joblib')
+N_TOPICS = 12
+N_FEATURES = 2 ** 17 # Hash buckets; the NMF components are a dense N_TOPICS x N_FEATURES array (~12 MB)
+NGRAM_RANGE = (1, 2)
+MINI_BATCH_SIZE = 2048 # Reviews per NMF update step
+TOP_TERMS = 10
+NO_TOPIC = -1 # Reviews with no known terms (empty after preprocessing)
+RANDOM_STATE = 0
+
+
+class TopicModel:
+    def __init__(self, n_topics=N_TOPICS, n_features=N_FEATURES, ngram_range=NGRAM_RANGE,
+                 mini_batch_size=MINI_BATCH_SIZE, random_state=RANDOM_STATE):
+        from sklearn.decomposition import MiniBatchNMF
+        self.n_topics = n_topics
+        self.mini_batch_size = mini_batch_size
+        self.vocabulary = HashedVocabulary(n_features, ngram_range)
+        self.nmf = MiniBatchNMF(n_components=n_topics, batch_size=mini_batch_size, init='nndsvda',
+                                random_state=random_state)
+        self.reviews_seen = 0
+
+    @property
+    def fitted(self):
+        return hasattr(self.nmf, 'components_')
+
+    # One NMF update per mini-batch of the chunk; IDF is refreshed with the chunk before it is vectorised
+    def partial_fit(self, texts):
+        texts = pd.Series(texts)
+        if not len(texts):
+            return self
+        features = self.vocabulary.tfidf(texts)
+        for start in range(0, features.shape[0], self.mini_batch_size):
+            batch = features[start:start + self.mini_batch_size]
+            # NNDSVD initialisation needs more rows than topics; a tiny first chunk waits for the next one
+            if not self.fitted and batch.shape[0] < self.n_topics:
+                continue
+            self.nmf.partial_fit(batch)
+            self.reviews_seen += batch.shape[0] # Only reviews the NMF actually trained on
+        return self
+
+    # Topic id per text (the topic with the largest weight), NO_TOPIC for texts without any known terms
+    def assign(self, texts):
+        texts = pd.Series(texts)
+        if not self.fitted:
+            raise ValueError("Topic model has not been trained yet; call partial_fit() first.")
+        if not len(texts):
+            return pd.Series([], dtype='int16', index=texts.index)
+        weights = self.nmf.transform(self.vocabulary.tfidf(texts, update=False))
+        topics = weights.argmax(axis=1)
+        topics[weights.max(axis=1) <= 0] = NO_TOPIC
+        return pd.Series(topics.astype('int16'), index=texts.index)
+
+    # [(topic id, [term, ...]), ...]
+    def top_terms(self, top_n=TOP_TERMS):
+        if not self.fitted:
+            return []
+        result = []
+        for topic, component in enumerate(self.nmf.components_):
+            top = np.argpartition(component, -top_n)[-top_n:]
+            top = top[np.argsort(-component[top], kind='stable')]
+            result.append((topic, [self.vocabulary.term(bucket) for bucket in top if component[bucket] > 0]))
+        return result
+
+    # Written to a temporary file first, so an interrupted save leaves the previous model intact
+    def save(self, path=TOPIC_MODEL_PATH):
+        import joblib
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = path + '.tmp'
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def load_topic_model(path=TOPIC_MODEL_PATH):
+    import joblib
+    return joblib.load(path)
+
+# The saved model, or a new untrained one if there is none (or fresh=True)
+def open_topic_model(path=TOPIC_MODEL_PATH, fresh=False):
+    if not fresh and os.path.exists(path):
+        return load_topic_model(path)
+    return TopicModel()
+
+def print_topics(model, top_n=TOP_TERMS):
+    print(f"\nDiscovered topics ({model.n_topics} topics, trained on {model.reviews_seen} reviews):")
+    for topic, terms in model.top_terms(top_n):
+        print(f"- Topic {topic}: {', '.join(terms)}")
+
+# How the reviews of each topic split across the hand-written themes (e.g. which topics fill "Other")
+def topic_theme_summary(topic_ids, themes):
+    return pd.crosstab(np.asarray(topic_ids), np.asarray(themes), rownames=['topic_id'], colnames=['identified_themes'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the topics of the saved topic model.")
+    parser.add_argument('--model', default=TOPIC_MODEL_PATH)
+    parser.add_argument('--top-terms', type=int, default=TOP_TERMS)
+    args = parser.parse_args()
+    if not os.path.exists(args.model):
+        print(f"No topic model at {args.model}; run analyze_reviews.py or pipeline.py first.")
+    else:
+        print_topics(load_topic_model(args.model), args.top_terms)
@@ -0,0 +1,153 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from review_cache import normalize_review_text
+
+# --- Sentiment Triage Settings ---
+# Decides per review whether distilbert needs to see it at all. Many reviews are a word or two
+# ("good", "Best of all", "worst app"), emoji only, or not English; those are answered here, and
+# every distinct text that still needs the model is scored once however often it repeats.
+TRIAGE_CONFIDENCE_THRESHOLD = float(os.environ.get('BANK_REVIEWS_TRIAGE_CONFIDENCE', 0.9)) # Fast path only at or above this
+FAST_PATH_MAX_WORDS = 6 # Longer reviews always go to the model
+NON_LATIN_MAX_SHARE = 0.3 # Reviews with a larger share of non-Latin letters (e.g. Amharic) skip the English-only model
+
+# Routes, as reported in the triage summary
+ROUTE_MODEL = 'model'
+ROUTE_EMPTY = 'empty' # Missing or blank text: neutral, as get_sentiment does
+ROUTE_LEXICON = 'lexicon' # Short text fully explained by the sentiment lexicon, confirmed by the rating
+ROUTE_NO_LETTERS = 'no_letters' # Emoji / punctuation only: emoji lexicon, else the rating
+ROUTE_NON_ENGLISH = 'non_english' # Other scripts: the rating
+ROUTES = [ROUTE_MODEL, ROUTE_EMPTY, ROUTE_LEXICON, ROUTE_NO_LETTERS, ROUTE_NON_ENGLISH]
+
+POSITIVE_WORDS = {
+    'good', 'great', 'best', 'excellent', 'nice', 'amazing', 'awesome', 'perfect', 'love', 'like', 'wonderful',
+    'fantastic', 'super', 'cool', 'fast', 'easy', 'helpful', 'useful', 'convenient', 'reliable', 'smooth',
+    'thanks', 'thank', 'wow', 'brilliant', 'outstanding', 'satisfied', 'fine', 'ok', 'okay', 'goood', 'gud',
+}
+NEGATIVE_WORDS = {
+    'bad', 'worst', 'poor', 'terrible', 'horrible', 'awful', 'useless', 'slow', 'boring', 'hate', 'disappointed',
+    'disappointing', 'fail', 'failed', 'fails', 'failure', 'crash', 'crashes', 'crashing', 'error', 'errors',
+    'bug', 'buggy', 'broken', 'stuck', 'problem', 'problems', 'issue', 'issues', 'rubbish', 'trash', 'waste',
+    'annoying', 'fake', 'scam', 'unreliable',
+}
+# A negation or contrast anywhere sends the review to the model ("not good", "good but slow")
+NEGATIONS = {'not', 'no', 'never', 'dont', "don't", 'doesnt', "doesn't", 'cant', "can't", 'cannot', 'isnt', "isn't",
+             'wont', "won't", 'without', 'but', 'however', 'although', 'except', 'nothing', 'hardly'}
+# Words that carry no sentiment of their own, so "very good app" is still fully explained by "good"
+NEUTRAL_WORDS = {
+    'a', 'an', 'the', 'this', 'that', 'it', 'its', 'is', 'was', 'are', 'be', 'so', 'very', 'really', 'too', 'much',
+    'of', 'all', 'for', 'and', 'to', 'in', 'on', 'my', 'me', 'i', 'you', 'your', 'we', 'our', 'app', 'application',
+    'apps', 'bank', 'banking', 'service', 'services', 'mobile', 'system', 'one', 'ever', 'just', 'most', 'job',
+    'experience', 'keep', 'up', 'guys', 'cbe', 'boa', 'dashen', 'abyssinia', 'birr', 'telebirr',
+}
+POSITIVE_EMOJI = set('👍👏🙏❤♥💯😍😊😀😁😃😄🥰😘🤩✅⭐🌟💚💙🔥')
+NEGATIVE_EMOJI = set('👎😡😠🤬😞😢😭💔😤😒🙄❌')
+
+_WORD_PATTERN = re.compile(r"[a-z']+")
+
+# Sentiment implied by the star rating alone: (label, score); used where the text can't be read
+RATING_SENTIMENT = {
+    1: ('negative', 0.9), 2: ('negative', 0.75), 3: ('neutral', 0.5), 4: ('positive', 0.75), 5: ('positive', 0.9),
+}
+LEXICON_CONFIDENCE = {'full': 0.8, 'partial': 0.6} # Before the rating adjustment; 'full' = every word explained
+RATING_AGREES_BONUS = 0.15 # Rating 4-5 for positive text, 1-2 for negative
+RATING_CONTRADICTS_PENALTY = 0.3
+
+
+# --- Text Features (once per distinct text) ---
+# (script, polarity, coverage) of one normalized text. script: 'empty', 'no_letters', 'non_latin' or
+# 'latin'; polarity: +1 / -1 from the lexicon (0 if none, mixed, negated or too long); coverage: 'full'
+# or 'partial' share of words the lexicon explains.
+def text_features(text):
+    if not text:
+        return 'empty', 0, None
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        positive = sum(c in POSITIVE_EMOJI for c in text)
+        negative = sum(c in NEGATIVE_EMOJI for c in text)
+        return 'no_letters', int(np.sign(positive - negative)) if not (positive and negative) else 0, None
+    non_latin = sum(ord(c) > 0x24F for c in letters) # Beyond the Latin Extended blocks
+    if non_latin / len(letters) > NON_LATIN_MAX_SHARE:
+        return 'non_latin', 0, None
+
+    words = _WORD_PATTERN.findall(text.lower())
+    if not words or len(words) > FAST_PATH_MAX_WORDS or any(word in NEGATIONS for word in words):
+        return 'latin', 0, None
+    positive = sum(word in POSITIVE_WORDS for word in words)
+    negative = sum(word in NEGATIVE_WORDS for word in words)
+    if bool(positive) == bool(negative): # Neither, or both
+        return 'latin', 0, None
+    explained = sum(word in POSITIVE_WORDS or word in NEGATIVE_WORDS or word in NEUTRAL_WORDS for word in words)
+    return 'latin', 1 if positive else -1, 'full' if explained == len(words) else 'partial'
+
+
+# --- Triage ---
+# Route every review and answer the ones that don't need the model. Returns a DataFrame aligned with
+# `texts` (same index) with columns route, sentiment_label, sentiment_score (missing where route is
+# 'model') and text_key (the whitespace-normalized, lower-cased text, so callers score each distinct
+# model text once: the default SST-2 distilbert is uncased, so case never changes its output).
+def triage_reviews(texts, ratings=None, threshold=TRIAGE_CONFIDENCE_THRESHOLD):
+    texts = pd.Series(texts)
+    keys = pd.Series([normalize_review_text(text).lower() for text in texts], index=texts.index)
+    features = {key: text_features(key) for key in keys.unique()}
+    script = keys.map(lambda key: features[key][0]).to_numpy(dtype=object)
+    polarity = keys.map(lambda key: features[key][1]).to_numpy(dtype=np.int8)
+    coverage = keys.map(lambda key: features[key][2]).to_numpy(dtype=object)
+    if ratings is None:
+        rating = np.zeros(len(texts), dtype=np.int64)
+    else:
+        rating = pd.to_numeric(pd.Series(ratings, index=texts.index), errors='coerce').fillna(0).astype('int64').to_numpy()
+
+    route = np.full(len(texts), ROUTE_MODEL, dtype=object)
+    labels = np.full(len(texts), None, dtype=object)
+    scores = np.full(len(texts), np.nan)
+
+    rating_labels = np.array([RATING_SENTIMENT.get(r, ('neutral', 0.5))[0] for r in rating], dtype=object)
+    rating_scores = np.array([RATING_SENTIMENT.get(r, ('neutral', 0.5))[1] for r in rating])
+
+    empty = script == 'empty'
+    route[empty], labels[empty], scores[empty] = ROUTE_EMPTY, 'neutral', 0.5
+
+    non_english = script == 'non_latin'
+    route[non_english] = ROUTE_NON_ENGLISH
+    labels[non_english], scores[non_english] = rating_labels[non_english], rating_scores[non_english]
+
+    # Lexicon confidence, adjusted by whether the rating agrees with the text's polarity
+    confidence = np.array([LEXICON_CONFIDENCE.get(c, 0.0) for c in coverage])
+    agrees = ((polarity > 0) & (rating >= 4)) | ((polarity < 0) & (rating >= 1) & (rating <= 2))
+    contradicts = ((polarity > 0) & (rating >= 1) & (rating <= 2)) | ((polarity < 0) & (rating >= 4))
+    adjustment = RATING_AGREES_BONUS * agrees - RATING_CONTRADICTS_PENALTY * contradicts
+
+    # Emoji-only text (the model reads it as unknown tokens): the emoji lexicon when it has a polarity,
+    # the rating otherwise
+    no_letters = script == 'no_letters'
+    route[no_letters] = ROUTE_NO_LETTERS
+    labels[no_letters], scores[no_letters] = rating_labels[no_letters], rating_scores[no_letters]
+    emoji = no_letters & (polarity != 0)
+    labels[emoji] = np.where(polarity[emoji] > 0, 'positive', 'negative')
+    scores[emoji] = np.clip(LEXICON_CONFIDENCE['full'] + adjustment[emoji], 0.5, 1.0)
+
+    # Short English text with a clear lexicon polarity, when confident enough
+    fast = (script == 'latin') & (polarity != 0) & (confidence + adjustment >= threshold)
+    route[fast] = ROUTE_LEXICON
+    labels[fast] = np.where(polarity[fast] > 0, 'positive', 'negative')
+    scores[fast] = np.minimum(confidence[fast] + adjustment[fast], 1.0)
+
+    return pd.DataFrame({
+        'route': route, 'sentiment_label': labels, 'sentiment_score': scores, 'text_key': keys.to_numpy(dtype=object),
+    }, index=texts.index)
+
+# Counts for the triage summary: rows per route, distinct texts sent to the model and the share of
+# rows that never reached it
+def triage_summary(triaged):
+    needs_model = triaged['route'] == ROUTE_MODEL
+    model_texts = int(triaged.loc[needs_model, 'text_key'].nunique())
+    rows = len(triaged)
+    summary = {f'rows_{route}': int((triaged['route'] == route).sum()) for route in ROUTES}
+    summary['rows_duplicate'] = int(needs_model.sum()) - model_texts
+    summary['model_texts'] = model_texts
+    summary['skipped_fraction'] = round(1 - model_texts / rows, 4) if rows else 0.0
+    return summary